@@ -1,55 +1,53 @@
 # %%
 
 
+import time
+
+STARTED = time.perf_counter()  # For the time-to-first-window measurement
+
+import argparse
+import os
+import sys
 import tkinter as tk
-from tkinter import messagebox
-import pandas as pd
-import yfinance as yf
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.ticker import FuncFormatter
-import wrds
+from tkinter import filedialog, messagebox
+import data_sources
+import engine
+import instrumentation
+from background import BackgroundTask
+from reactive import Debouncer, Graph
+from data_sources import fetch_many, fetch_fama_french
+from session_data import SessionData
+
+# pandas, matplotlib, yfinance and wrds are imported on first use; importing them
+# here would add seconds to startup before the window can appear.
 
 
 # Global variable declarations
 selected_stocks_data = []  # Stores the selected stocks globally
 current_allocation = {"Stocks": 0, "Bonds": 0}  # Default allocation
+current_weights = {}  # Per-ticker allocation in percent from the optimizer
 current_value = 0  # Tracks the current portfolio value
 goal_value = 100000  # Default goal value
+goal_probability = None  # Simulated chance of reaching the goal
+current_factor_fit = None  # Fama-French regressions of the selected stocks
+current_risk = None  # Risk metrics of the selected stocks and the portfolio
+monthly_contribution = None  # Contribution from the last calculation; None until one has finished
 
+# Prices, returns and statistics of the current selection, shared by the calculation and all views
+session = SessionData(fetch_many, fetch_fama_french)
 
-# WRDS connection
-db = wrds.Connection()
-
-# Functions for Data Fetching and Visualization
-def fetch_data(ticker, start="2020-01-01", end="2024-11-01"):
-    data = yf.download(ticker, start=start, end=end)
-    return data["Adj Close"]
-
+# Results derived from the inputs and the last calculation; input edits recompute only what depends on them
+results_graph = Graph()
 
-def fetch_fama_french():
-    ff_data = db.get_table('ff', 'factors_daily')
-    ff_data['date'] = pd.to_datetime(ff_data['date'], format='%Y%m%d')
-    ff_data = ff_data.set_index('date')
-    return ff_data[['mktrf', 'smb', 'hml', 'rf']]
-
-def calculate_performance(stock_data, bond_data, ff_data, allocation):
-    stock_returns = stock_data.pct_change().dropna()
-    bond_returns = bond_data.pct_change().dropna()
-    weighted_returns = allocation["Stocks"] * stock_returns.mean() + allocation["Bonds"] * bond_returns.mean()
-    avg_rf = ff_data['rf'].mean() / 100
-    portfolio_return = weighted_returns - avg_rf
-    return portfolio_return
-
-def calculate_monthly_contribution(goal_value, current_value, time_horizon):
-    """
-    Calculate the monthly contribution needed to reach the goal value within the given time horizon.
-    """
-    remaining_value = max(goal_value - current_value, 0)
-    months = time_horizon * 12
-    if months > 0:
-        return remaining_value / months
-    return 0
+STARTUP_BUDGET = 1.0  # Seconds from launch to first window for --measure-startup
+SESSION_EXTENSION = ".smartinvest"
+DRIFT_WARNING = 0.05  # Stock share away from target at which the live view turns red
+GOAL_MULTIPLES = (0.5, 0.75, 1, 1.25, 1.5, 2, 3)  # Goals of the what-if table, relative to the current goal
+WHAT_IF_HORIZONS = (5, 10, 15, 20, 25, 30, 35, 40)  # Years in the what-if table
+STOCK_SHARES = tuple(range(0, 101, 10))  # Stock allocations (percent) the what-if grid covers
+WHAT_IF_CACHE_SIZE = 16  # What-if grids kept before the cache is emptied
+INPUT_DEBOUNCE_MS = 150  # Pause in typing after which edited inputs are applied
+SELECTION_SIZE = 12  # Tickers offered per selection popup when the screening index is built
 
 
 def update_goal_based_on_type():
@@ -58,16 +56,9 @@ def update_goal_based_on_type():
     The most recent input (dropdown or manual) is always reflected.
     """
     goal_type = goal_type_var.get()
-    default_goals = {
-        "House": 300000,
-        "Retirement": 1000000,
-        "Business": 500000,
-        "Vacation": 20000,
-        "College": 100000,
-    }
 
     # Get the goal value based on the dropdown
-    new_goal = default_goals.get(goal_type, 100000)
+    new_goal = engine.default_goal(goal_type)
 
     # Update the input box and status label with the dropdown selection
     goal_var.set(str(new_goal))
@@ -119,6 +110,19 @@ def open_stock_selection(category, stock_list, selected_var):
     tk.Button(popup, text="Done", command=lambda: [popup.destroy(), update_selected_stocks()]).pack(pady=10)
 
 
+def stock_choices(risk_tolerance, fallback):
+    """
+    Tickers for a selection popup: the best returning ones in the volatility band of
+    the risk tolerance from the screening index, or fallback until the index is built.
+    """
+    import screening
+
+    index = data_sources.get_screening_index()
+    if not len(index):
+        return fallback
+    return index.query(volatility=screening.RISK_BANDS[risk_tolerance], limit=SELECTION_SIZE) or fallback
+
+
 def get_selected_stocks_from_checkboxes(selected_var):
     """
     Retrieves the list of selected stocks from the checkboxes.
@@ -159,94 +163,74 @@ def update_selected_stocks():
 
 
 # Visualization Functions
+chart_views = {}  # ChartView per chart frame, kept for the life of the frame
+
+
+def get_chart_view(frame, draw, update, figsize, tight_layout=False):
+    """
+    The chart view of frame, created with its navigation buttons on first use.
+    """
+    from chart_views import ChartView
+
+    view = chart_views.get(frame)
+    if view is None or view.canvas is None:
+        for widget in frame.winfo_children():
+            widget.destroy()
+        view = chart_views[frame] = ChartView(frame, draw, update, figsize, tight_layout)
+        add_back_to_dashboard_button(frame)
+    return view
+
+
+@instrumentation.instrument("render.pie_chart")
 def display_pie_chart(frame):
-    for widget in frame.winfo_children():
-        widget.destroy()
-    labels = list(current_allocation.keys())
-    sizes = list(current_allocation.values())
-    fig, ax = plt.subplots(figsize=(4, 4))
-    ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90)
-    ax.set_title("Portfolio Allocation")
-    canvas = FigureCanvasTkAgg(fig, frame)
-    canvas.get_tk_widget().pack(pady=10)
-    add_back_to_dashboard_button(frame)
+    import charts
+
+    view = get_chart_view(frame, charts.draw_allocation, charts.update_allocation, (4, 4))
+    view.show(charts.allocation_slices(current_allocation, current_weights))
 
+@instrumentation.instrument("render.goal_progress")
 def display_goal_progress(frame):
-    for widget in frame.winfo_children():
-        widget.destroy()
-    fig, ax = plt.subplots(figsize=(6, 5))
-    ax.bar(["Goal", "Current Value"], [goal_value, current_value], color=["green", "blue"])
-    ax.set_title("Progress Toward Investment Goal", fontsize=14)
-    ax.set_ylabel("Value ($)", fontsize=12)
-
-    for bar, value in zip(ax.patches, [goal_value, current_value]):
-        ax.text(
-            bar.get_x() + bar.get_width() / 2,
-            bar.get_height() / 2,
-            f"${int(value):,}",
-            ha="center",
-            va="center",
-            fontsize=12,
-            color="white" if value > goal_value * 0.7 else "black"
-        )
+    import charts
 
-    ax.yaxis.set_major_formatter(FuncFormatter(lambda x, _: f"${int(x):,}"))
-    plt.tight_layout()
-    canvas = FigureCanvasTkAgg(fig, frame)
-    canvas.get_tk_widget().pack(pady=10)
-    add_back_to_dashboard_button(frame)
+    view = get_chart_view(frame, charts.draw_goal_progress, charts.update_goal_progress, (6, 5), tight_layout=True)
+    view.show(goal_value, current_value)
 
 
 
+@instrumentation.instrument("render.risk_return")
 def display_risk_return(frame):
-    for widget in frame.winfo_children():
-        widget.destroy()
+    import charts
 
-    # Fetch data for all selected stocks
+    view = get_chart_view(frame, charts.draw_risk_return, charts.update_risk_return, (6, 4), tight_layout=True)
+
+    # Statistics come from the session, which already holds the data of the last calculation
     risk_return_data = []
-    for ticker in selected_stocks_data:
-        try:
-            stock_prices = fetch_data(ticker)
-            if stock_prices.empty:
+    try:
+        stats = session.stats(selected_stocks_data)
+        for ticker in selected_stocks_data:
+            if ticker not in stats.index:
                 print(f"Warning: No data available for {ticker}. Skipping.")
-                continue
-            returns = stock_prices.pct_change().dropna()
-            avg_return = returns.mean()
-            volatility = returns.std()
-            risk_return_data.append((ticker, avg_return, volatility))
-        except Exception as e:
-            print(f"Error fetching data for {ticker}: {e}")
+        if not stats.empty:
+            risk_return_data = charts.risk_return_rows(stats)
+    except Exception as e:
+        print(f"Error fetching data for selected stocks: {e}")
 
     if not risk_return_data:
-        tk.Label(frame, text="No valid data for selected stocks.", font=("Arial", 12), fg="red").pack(pady=10)
+        view.show_message("No valid data for selected stocks.")
         return
 
-    # Sort data for visualization
-    risk_return_data.sort(key=lambda x: x[1], reverse=True)
-    tickers = [data[0] for data in risk_return_data]
-    returns = [data[1] for data in risk_return_data]
-    volatilities = [data[2] for data in risk_return_data]
-
-    # Create horizontal bar chart
-    fig, ax = plt.subplots(figsize=(6, 4))
-    bar_width = 0.4
-    x_positions = range(len(tickers))
+    view.show(risk_return_data)
 
-    ax.barh(x_positions, returns, height=bar_width, label="Return", color="blue")
-    ax.barh(x_positions, volatilities, height=bar_width, label="Volatility (Risk)", color="orange", alpha=0.7)
 
-    ax.set_yticks(x_positions)
-    ax.set_yticklabels(tickers)
-    ax.set_title("Risk vs Return for Selected Stocks", fontsize=14)
-    ax.set_xlabel("Value")
+@instrumentation.instrument("render.factor_exposure")
+def display_factor_exposure(frame):
+    import charts
 
-    # Format X-axis to show percentages
-    ax.xaxis.set_major_formatter(FuncFormatter(lambda x, _: f"{x * 100:.1f}%"))
-    ax.legend()
-    plt.tight_layout()
-    canvas = FigureCanvasTkAgg(fig, frame)
-    canvas.get_tk_widget().pack(pady=10)
-    add_back_to_dashboard_button(frame)
+    view = get_chart_view(frame, charts.draw_factor_exposure, charts.update_factor_exposure, (6, 4), tight_layout=True)
+    if current_factor_fit is None:
+        view.show_message("Run a calculation to see factor exposures.")
+        return
+    view.show(charts.factor_exposure_rows(current_factor_fit))
 
 
 # Summary Page
@@ -254,6 +238,7 @@ def display_summary():
     """
     Updates and displays the summary page with user inputs and calculated results.
     """
+    pull_derived_results()
     for widget in summary_frame.winfo_children():
         widget.destroy()
 
@@ -269,11 +254,26 @@ def display_summary():
 
     # Display Results
     tk.Label(summary_frame, text=f"Current Portfolio Value: ${current_value:,.2f}", font=("Arial", 12)).pack(anchor="w", padx=20)
-    tk.Label(summary_frame, text=f"Monthly Contribution Needed: ${calculate_monthly_contribution(goal_value, current_value, int(time_var.get())):,.2f}", font=("Arial", 12)).pack(anchor="w", padx=20)
+    tk.Label(summary_frame, text=f"Monthly Contribution Needed: ${monthly_contribution:,.2f}", font=("Arial", 12)).pack(anchor="w", padx=20)
+    if goal_probability is not None:
+        tk.Label(summary_frame, text=f"Chance of Reaching Goal: {goal_probability:.1%}", font=("Arial", 12)).pack(anchor="w", padx=20)
 
     # Display Portfolio Allocation
     allocation_text = f"Portfolio Allocation: {current_allocation['Stocks']}% Stocks, {current_allocation['Bonds']}% Bonds"
     tk.Label(summary_frame, text=allocation_text, font=("Arial", 12)).pack(anchor="w", padx=20)
+    if current_weights:
+        weights_text = ", ".join(f"{ticker} {weight:.1f}%" for ticker, weight in current_weights.items() if weight >= 0.5)
+        tk.Label(summary_frame, text=f"Weights: {weights_text}", font=("Arial", 10)).pack(anchor="w", padx=20)
+    if current_risk is not None:
+        risk = current_risk.row("Portfolio")
+        risk_text = (f"Risk: 1-day {current_risk.confidence:.0%} VaR {risk['var_historical']:.2%}, "
+                     f"CVaR {risk['cvar_historical']:.2%}, Max Drawdown {risk['max_drawdown']:.1%}, "
+                     f"Sortino {risk['sortino']:.2f}")
+        tk.Label(summary_frame, text=risk_text, font=("Arial", 10)).pack(anchor="w", padx=20)
+    if current_factor_fit is not None:
+        betas_text = ", ".join(f"{ticker} {beta:.2f}" for ticker, beta in zip(current_factor_fit.tickers, current_factor_fit.betas[:, 0])
+                               if ticker != "BND")
+        tk.Label(summary_frame, text=f"Market Beta: {betas_text}", font=("Arial", 10)).pack(anchor="w", padx=20)
 
     # Suggested Adjustments (if necessary)
     if current_value < goal_value * 0.5:
@@ -286,78 +286,343 @@ def display_summary():
     tk.Button(summary_frame, text="Portfolio Allocation", command=lambda: [show_frame(pie_chart_frame), display_pie_chart(pie_chart_frame)]).pack(pady=5)
     tk.Button(summary_frame, text="Goal Progress", command=lambda: [show_frame(goal_progress_frame), display_goal_progress(goal_progress_frame)]).pack(pady=5)
     tk.Button(summary_frame, text="Risk vs Return", command=lambda: [show_frame(risk_return_frame), display_risk_return(risk_return_frame)]).pack(pady=5)
+    tk.Button(summary_frame, text="Factor Exposure", command=lambda: [show_frame(factor_frame), display_factor_exposure(factor_frame)]).pack(pady=5)
+    tk.Button(summary_frame, text="What-If Contributions", command=lambda: [show_frame(what_if_frame), display_what_if(what_if_frame)]).pack(pady=5)
 
     # Navigate to Summary Page
     show_frame(summary_frame)
 
 
+# What-If Page
+what_if_cache = {}  # (panel, weights, goals) -> contribution grid over goals, horizons and stock shares
+what_if_table = None  # chart_views.HeatmapTable, built on first display
+what_if_share = None  # Stock share (percent) of the slice shown
+
+
+def what_if_grid():
+    """
+    Goals and the (goals, horizons, stock shares) grid of monthly contributions for the
+    last calculation, computed in one vectorized call and reused while nothing changed.
+    """
+    panel = results_graph.get("panel")
+    goals = tuple(goal_value * multiple for multiple in GOAL_MULTIPLES)
+    key = (panel, tuple(current_weights.items()), goals)
+    grid = what_if_cache.get(key)
+    if grid is None:
+        returns = engine.allocation_returns(panel, current_weights, STOCK_SHARES)
+        grid = engine.contribution_grid(goals, WHAT_IF_HORIZONS, returns)
+        if len(what_if_cache) >= WHAT_IF_CACHE_SIZE:
+            what_if_cache.clear()
+        what_if_cache[key] = grid
+    return goals, grid
+
+
+def display_what_if(frame):
+    """
+    Table of the monthly contribution needed for each goal and horizon at a chosen stock allocation.
+    """
+    global what_if_table, what_if_share
+    if what_if_table is None:
+        from chart_views import HeatmapTable
+
+        tk.Label(frame, text="Monthly Contribution by Goal and Time Horizon", font=("Arial", 14)).pack(pady=10)
+        what_if_share = tk.IntVar(value=0)
+        tk.Scale(frame, from_=0, to=100, resolution=10, orient=tk.HORIZONTAL, length=300, label="Stocks (%)",
+                 variable=what_if_share, command=lambda _: show_what_if()).pack()
+        what_if_table = HeatmapTable(frame, len(GOAL_MULTIPLES), len(WHAT_IF_HORIZONS))
+        add_back_to_dashboard_button(frame)
+    what_if_share.set(int(round(current_allocation["Stocks"], -1)))
+    show_what_if()
+
+
+def show_what_if():
+    if results_graph.get("panel") is None:
+        return
+    goals, grid = what_if_grid()
+    horizon = results_graph.get("time_horizon")
+    highlight = (GOAL_MULTIPLES.index(1), WHAT_IF_HORIZONS.index(horizon)) if horizon in WHAT_IF_HORIZONS else None
+    what_if_table.show("Goal \\ Years", [f"${goal:,.0f}" for goal in goals], [str(years) for years in WHAT_IF_HORIZONS],
+                       grid[:, :, STOCK_SHARES.index(what_if_share.get())].tolist(), lambda value: f"${value:,.0f}",
+                       highlight)
+
+
+# Diagnostics Page
+def display_diagnostics():
+    """
+    Show per-stage timings, call counts, bytes fetched and peak memory.
+    """
+    for widget in diagnostics_frame.winfo_children():
+        widget.destroy()
+
+    tk.Label(diagnostics_frame, text="Diagnostics", font=("Arial", 16)).grid(row=0, column=0, columnspan=6, pady=10)
+
+    profiling_var = tk.BooleanVar(value=instrumentation.enabled)
+    memory_var = tk.BooleanVar(value=instrumentation.enabled and instrumentation.tracing_memory())
+    tk.Checkbutton(diagnostics_frame, text="Record timings", variable=profiling_var,
+                   command=lambda: set_profiling(profiling_var.get(), memory_var.get())).grid(row=1, column=0, columnspan=3)
+    tk.Checkbutton(diagnostics_frame, text="Track memory (slower)", variable=memory_var,
+                   command=lambda: set_profiling(profiling_var.get(), memory_var.get())).grid(row=1, column=3, columnspan=3)
+
+    headers = ["Stage", "Calls", "Total (s)", "Max (s)", "Bytes", "Peak Memory"]
+    for column, header in enumerate(headers):
+        tk.Label(diagnostics_frame, text=header, font=("Arial", 10, "bold")).grid(row=2, column=column, padx=5, sticky="w")
+    rows = instrumentation.summary()
+    for row_number, row in enumerate(rows, start=3):
+        peak = f"{row['peak_memory'] / 1e6:,.1f} MB" if row["peak_memory"] is not None else "-"
+        values = [row["name"], row["calls"], f"{row['total_s']:.3f}", f"{row['max_s']:.3f}", f"{row['bytes']:,}", peak]
+        for column, value in enumerate(values):
+            tk.Label(diagnostics_frame, text=value, font=("Arial", 10)).grid(row=row_number, column=column, padx=5, sticky="w")
+    if not rows:
+        text = "No stages recorded yet." if instrumentation.enabled else "Turn on \"Record timings\" and run a calculation."
+        tk.Label(diagnostics_frame, text=text, font=("Arial", 10), fg="blue").grid(row=3, column=0, columnspan=6, pady=5)
+
+    buttons = tk.Frame(diagnostics_frame)
+    buttons.grid(row=len(rows) + 4, column=0, columnspan=6, pady=10)
+    tk.Button(buttons, text="Refresh", command=display_diagnostics).pack(side="left", padx=5)
+    tk.Button(buttons, text="Reset", command=lambda: [instrumentation.reset(), display_diagnostics()]).pack(side="left", padx=5)
+    tk.Button(buttons, text="Export JSON", command=lambda: export_diagnostics("json")).pack(side="left", padx=5)
+    tk.Button(buttons, text="Export Trace", command=lambda: export_diagnostics("trace")).pack(side="left", padx=5)
+    tk.Button(buttons, text="Back to Dashboard", command=lambda: show_frame(robo_advisor_frame)).pack(side="left", padx=5)
+
+    show_frame(diagnostics_frame)
+
+
+def set_profiling(record_timings, track_memory):
+    if record_timings:
+        if not track_memory and instrumentation.tracing_memory():
+            instrumentation.disable()
+        instrumentation.enable(trace_memory=track_memory)
+    else:
+        instrumentation.disable()
+
+
+def export_diagnostics(kind):
+    if kind == "json":
+        path = filedialog.asksaveasfilename(defaultextension=".json", initialfile="smartinvest-stages.json")
+        if path:
+            instrumentation.export_json(path)
+    else:
+        path = filedialog.asksaveasfilename(defaultextension=".json", initialfile="smartinvest-trace.json")
+        if path:
+            instrumentation.export_chrome_trace(path)
+
+
 def add_back_to_dashboard_button(frame):
     tk.Button(frame, text="Back to Dashboard", command=lambda: show_frame(robo_advisor_frame)).pack(pady=10)
     tk.Button(frame, text="Go to Summary Page", command=display_summary).pack(pady=5)
 
 
 # Robo-Advisor Functions
+calculation_task = None  # BackgroundTask of the calculation in progress, if any
+
+
 def calculate_results():
     """
-    Calculate portfolio performance, update monthly contribution, and enable visualizations.
+    Start the portfolio calculation on a worker thread.
+    The engine does the work; results are applied on the main loop by apply_results,
+    so the window stays responsive.
     """
-    status_label.config(text="Calculations in Progress...", fg="orange")
-    root.update_idletasks()
+    global calculation_task
+    if calculation_task is not None and calculation_task.running:
+        status_label.config(text="A calculation is already running.", fg="orange")
+        return
 
     # Get all selected stocks (manual + recommended)
     selected_stocks = get_selected_stocks()  # Fetch all stocks
-    investment_goal = float(goal_var.get() or 100000)
-    time_horizon = int(time_var.get() or 10)
+    profile = engine.Profile(
+        risk_tolerance=risk_var.get(),
+        goal_type=goal_type_var.get(),
+        goal_value=float(goal_var.get() or 100000),
+        time_horizon=int(time_var.get() or 10),
+        tickers=selected_stocks,
+    )
 
     if not selected_stocks:
         status_label.config(text="No stocks selected. Please select stocks.", fg="red")
         return
 
-    try:
-        # Fetch stock and bond data
-        stock_data = pd.DataFrame()
-        for ticker in selected_stocks:
-            data = fetch_data(ticker)
-            if data.empty:
-                print(f"Warning: No data found for {ticker}. Skipping.")
-                continue
-            stock_data[ticker] = data
-
-        if stock_data.empty:
-            status_label.config(text="Error: No valid stock data found.", fg="red")
-            return
-
-        stock_data = stock_data.mean(axis=1)  # Average performance across selected stocks
-        bond_data = fetch_data("BND")
-        ff_data = fetch_fama_french()
-
-        # Calculate performance
-        allocation = recommend_allocation(risk_var.get())
-        performance = calculate_performance(stock_data, bond_data, ff_data, allocation)
-
-        # Update global variables
-        global current_allocation, current_value, goal_value
-        current_allocation = allocation
-        current_value = (1 + performance) ** time_horizon * 100000  # Compound growth
-        goal_value = investment_goal
-
-        # Calculate monthly contribution
-        monthly_contribution = calculate_monthly_contribution(goal_value, current_value, time_horizon)
-        monthly_contribution_label.config(
-            text=f"Monthly Contribution Needed: ${monthly_contribution:,.2f}"
-        )
+    status_label.config(text="Calculations in Progress...", fg="orange")
+    calculation_task = BackgroundTask(
+        root,
+        lambda task: engine.evaluate_profile(profile, session.fetch_many, session.fetch_fama_french, progress=task.progress),
+        on_progress=show_calculation_progress,
+        on_done=lambda result: apply_results(result, profile),
+        on_error=lambda e: finish_calculation(f"Error: {str(e)}", "red"),
+        on_cancel=lambda: finish_calculation("Calculation cancelled.", "blue"),
+    )
+    calculate_button.config(state=tk.DISABLED)
+    cancel_button.config(state=tk.NORMAL)
+    calculation_task.start()
 
-        # Update the selected stocks display
-        update_selected_stocks()
 
-        status_label.config(text="Calculations Complete!", fg="green")
-        enable_visualization_buttons()
-    except Exception as e:
-        status_label.config(text=f"Error: {str(e)}", fg="red")
+def build_results_graph():
+    """
+    Define the nodes between the inputs, the last calculation and the views.
+    The calculation result supplies the returns panel; the allocation, projection,
+    contribution, risk and simulation follow from it and the inputs without any I/O.
+    """
+    graph = results_graph
+    graph.input("goal_value", goal_value)
+    graph.input("time_horizon", 10)
+    graph.input("risk_tolerance", "Medium")
+    graph.input("result", None)
+    graph.node("panel", lambda result: result.panel if result is not None else None, "result")
+    graph.node("allocation", lambda panel, risk: engine.optimize_allocation(panel, risk) if panel is not None else None,
+               "panel", "risk_tolerance")
+    graph.node("performance",
+               lambda panel, allocation: engine.calculate_performance(panel, allocation[1]) if panel is not None else None,
+               "panel", "allocation")
+    graph.node("current_value",
+               lambda performance, years: engine.project_value(performance, years) if performance is not None else None,
+               "performance", "time_horizon")
+    graph.node("monthly_contribution", contribution_needed, "goal_value", "current_value", "time_horizon", "performance")
+    graph.node("risk", portfolio_risk, "panel", "allocation")
+    graph.node("simulation", simulated_outcomes, "panel", "allocation", "goal_value", "time_horizon", "monthly_contribution")
+    graph.node("goal_probability", lambda simulation: simulation.probability if simulation is not None else None,
+               "simulation")
+    graph.watch(show_derived_results, "allocation", "current_value", "goal_value", "monthly_contribution")
+
+
+def contribution_needed(goal, value, time_horizon, performance):
+    if value is None:
+        return None
+    return engine.calculate_monthly_contribution(goal, value, time_horizon, performance)
+
+
+def portfolio_risk(panel, allocation):
+    import risk_metrics
+
+    if panel is None:
+        return None
+    return risk_metrics.compute_risk(panel, [allocation[1].get(ticker, 0) / 100 for ticker in panel.tickers])
+
+
+def simulated_outcomes(panel, allocation, goal, time_horizon, contribution):
+    if panel is None:
+        return None
+    return engine.simulate_profile(panel, allocation[1], goal, time_horizon, contribution)
+
+
+def show_derived_results(allocation, value, goal, contribution):
+    """
+    Watcher of the graph: publish recomputed results to the views.
+    """
+    global current_allocation, current_weights, current_value, goal_value, monthly_contribution
+    goal_value = goal
+    if allocation is None:
+        return
+    current_allocation, current_weights = allocation
+    current_value = value
+    monthly_contribution = contribution
+    monthly_contribution_label.config(text=f"Monthly Contribution Needed: ${contribution:,.2f}")
+    rebind_live_quotes()
+
+
+def provide_result(result):
+    """
+    Make result the calculation the graph derives from, with its figures as the current values.
+    """
+    results_graph.set("result", result)
+    results_graph.provide("allocation", (result.allocation, result.weights))
+    results_graph.provide("performance", engine.calculate_performance(result.panel, result.weights))
+    results_graph.provide("current_value", result.current_value)
+    results_graph.provide("monthly_contribution", result.monthly_contribution)
+    results_graph.provide("risk", result.risk)
+    results_graph.provide("simulation", result.simulation)
+
+
+def pull_derived_results():
+    """
+    Bring the results that are only computed on demand (risk, goal probability) up to date.
+    """
+    global current_risk, goal_probability
+    if results_graph.get("result") is None:
+        return
+    current_risk = results_graph.get("risk")
+    goal_probability = results_graph.get("goal_probability")
+
+
+def push_inputs():
+    """
+    Apply the current input fields to the graph and update what depends on them.
+    Invalid fields are left at their last valid value.
+    """
+    goal = goal_var.get().strip()
+    years = time_var.get().strip()
+    if goal.replace(".", "", 1).isdigit():
+        results_graph.set("goal_value", float(goal))
+    if years.isdigit() and int(years) > 0:
+        results_graph.set("time_horizon", int(years))
+    results_graph.set("risk_tolerance", risk_var.get())
+    results_graph.flush()
+
+
+def show_calculation_progress(stage, step, total):
+    status_label.config(text=f"{stage}... ({step}/{total})", fg="orange")
+
+
+def apply_results(result, profile):
+    """
+    Store the results of a finished calculation and update the dashboard.
+    """
+    for ticker in result.failed_tickers:
+        print(f"Warning: No data found for {ticker}. Skipping.")
+
+    global current_allocation, current_weights, current_value, goal_value, goal_probability, current_factor_fit
+    global current_risk, monthly_contribution
+    current_allocation = result.allocation
+    current_weights = result.weights
+    current_value = result.current_value
+    goal_value = result.goal_value
+    goal_probability = result.goal_probability
+    current_factor_fit = result.factor_fit
+    current_risk = result.risk
+    monthly_contribution = result.monthly_contribution
+
+    monthly_contribution_label.config(
+        text=f"Monthly Contribution Needed: ${result.monthly_contribution:,.2f}"
+    )
+
+    # The result covers the inputs it was calculated for; edits made meanwhile are applied on top
+    results_graph.set("goal_value", profile.goal_value)
+    results_graph.set("time_horizon", profile.time_horizon)
+    results_graph.set("risk_tolerance", profile.risk_tolerance)
+    provide_result(result)
+    push_inputs()
+
+    # Update the selected stocks display
+    update_selected_stocks()
+
+    finish_calculation("Calculations Complete!", "green")
+    enable_visualization_buttons()
+
+
+def finish_calculation(message, color):
+    status_label.config(text=message, fg=color)
+    reset_calculation_buttons()
+
+
+def reset_calculation_buttons():
+    calculate_button.config(state=tk.NORMAL)
+    cancel_button.config(state=tk.DISABLED)
+
+
+def cancel_calculation(quiet=False):
+    """
+    Stop the running calculation. With quiet, its outcome only resets the buttons
+    and leaves the status line to the caller.
+    """
+    if calculation_task is not None and calculation_task.running:
+        calculation_task.cancel()
+        if quiet:
+            calculation_task.on_cancel = reset_calculation_buttons
+            calculation_task.on_error = lambda e: reset_calculation_buttons()
+        else:
+            status_label.config(text="Cancelling...", fg="orange")
 
 
 def enable_visualization_buttons():
-    for button in [pie_chart_button, goal_progress_button, risk_return_button]:
+    for button in [pie_chart_button, goal_progress_button, risk_return_button, live_button]:
         button.config(state=tk.NORMAL)
     summary_button.config(state=tk.NORMAL)  # Enable the summary button
 
@@ -367,29 +632,8 @@ def recommend_stocks():
     Suggest stocks based on the user's risk tolerance and goal type,
     and display the recommendations on the dashboard.
     """
-    risk_tolerance = risk_var.get()
-    goal_type = goal_type_var.get()
-
-    # Define stock recommendations by risk tolerance
-    stock_pool = {
-        "Low": ["KO", "JNJ", "WMT", "HD", "PG"],
-        "Medium": ["AAPL", "MSFT", "GOOGL", "AMZN", "NVDA"],
-        "High": ["TSLA", "PLTR", "GME", "AMC", "COIN"],
-    }
-
-    # Define goal-specific stocks
-    goal_specific_stocks = {
-        "House": ["HD", "LOW", "TOL"],
-        "Retirement": ["VTI", "VOO", "SPY"],
-        "Business": ["CRM", "ADBE", "MSFT"],
-        "Vacation": ["DAL", "BKNG", "ABNB"],
-        "College": ["SCHD", "QQQ", "VOO"],
-    }
-
-    # Get recommendations
-    recommendations = stock_pool.get(risk_tolerance, [])
-    goal_recommendations = goal_specific_stocks.get(goal_type, [])
-    final_recommendations = list(set(recommendations + goal_recommendations))
+    final_recommendations = engine.recommend_stocks(risk_var.get(), goal_type_var.get(), current_factor_fit,
+                                                     data_sources.get_screening_index())
 
     # Update the dashboard with recommendations
     if final_recommendations:
@@ -418,23 +662,27 @@ def add_recommended_stocks_to_selection():
 
 
 
-def recommend_allocation(risk_tolerance):
-    if risk_tolerance == "Low":
-        return {"Stocks": 30, "Bonds": 70}
-    elif risk_tolerance == "Medium":
-        return {"Stocks": 60, "Bonds": 40}
-    elif risk_tolerance == "High":
-        return {"Stocks": 80, "Bonds": 20}
-
 def clear_transactions():
     """
     Reset all user selections and calculations to start fresh.
     """
+    # Discard any calculation still running
+    cancel_calculation(quiet=True)
+    stop_live_quotes()
+
     # Reset global variables
-    global selected_stocks_data, current_allocation, current_value, goal_value
+    global selected_stocks_data, current_allocation, current_weights, current_value, goal_value, goal_probability
+    global current_factor_fit, current_risk, monthly_contribution
     selected_stocks_data = []
     current_allocation = {"Stocks": 0, "Bonds": 0}
+    current_weights = {}
     current_value = 0
+    goal_probability = None
+    current_factor_fit = None
+    current_risk = None
+    monthly_contribution = None
+    results_graph.set("result", None)
+    what_if_cache.clear()
     goal_value = float(goal_var.get() or 100000)
 
     # Reset input variables
@@ -458,121 +706,370 @@ def clear_transactions():
     status_label.config(text="Waiting for input...", fg="blue")
 
     # Disable visualization buttons
-    for button in [pie_chart_button, goal_progress_button, risk_return_button, summary_button]:
+    for button in [pie_chart_button, goal_progress_button, risk_return_button, summary_button, live_button]:
         button.config(state=tk.DISABLED)
 
 
-# GUI Setup
-root = tk.Tk()
-root.title("SmartInvest: Your Personal Robo Advisor")
-
-# Frames for GUI
-main_menu = tk.Frame(root)
-robo_advisor_frame = tk.Frame(root)
-pie_chart_frame = tk.Frame(root)
-goal_progress_frame = tk.Frame(root)
-risk_return_frame = tk.Frame(root)
-summary_frame = tk.Frame(root)
-summary_frame.grid(row=0, column=0, sticky="nsew")
-
-
-for frame in (main_menu, robo_advisor_frame, pie_chart_frame, goal_progress_frame, risk_return_frame):
-    frame.grid(row=0, column=0, sticky="nsew")
-
-# Main Menu
-tk.Label(main_menu, text="Welcome to SmartInvest: Your Personal Robo Advisor!", font=("Arial", 16)).pack(pady=20)
-tk.Button(main_menu, text="Dashboard", command=lambda: show_frame(robo_advisor_frame)).pack(pady=10)
-
-# Robo-Advisor Frame
-tk.Label(robo_advisor_frame, text="Dashboard", font=("Arial", 14)).grid(row=0, column=0, columnspan=3, pady=10)
-status_label = tk.Label(robo_advisor_frame, text="Waiting for input...", font=("Arial", 10), fg="blue")
-status_label.grid(row=1, column=0, columnspan=3, pady=5)
-
-
-# Goal Type Dropdown
-tk.Label(robo_advisor_frame, text="Goal Type:").grid(row=2, column=0, padx=10, pady=5)
-goal_type_var = tk.StringVar(value="Retirement")
-goal_types = ["House", "Retirement", "Business", "Vacation", "College"]
-tk.OptionMenu(robo_advisor_frame, goal_type_var, *goal_types, command=lambda _: update_goal_based_on_type()).grid(row=2, column=1, padx=10, pady=5)
-
-# Investment Goal Input
-tk.Label(robo_advisor_frame, text="Investment Goal ($):").grid(row=3, column=0, padx=10, pady=5)
-goal_var = tk.StringVar(value="100000")
-goal_var.trace_add("write", manual_goal_update)
-tk.Entry(robo_advisor_frame, textvariable=goal_var).grid(row=3, column=1, padx=10, pady=5)
-
-# Risk Tolerance Input
-tk.Label(robo_advisor_frame, text="Risk Tolerance:").grid(row=4, column=0, padx=10, pady=5)
-risk_var = tk.StringVar(value="Medium")
-tk.OptionMenu(robo_advisor_frame, risk_var, "Low", "Medium", "High").grid(row=4, column=1, padx=10, pady=5)
-
-# Time Horizon Input
-tk.Label(robo_advisor_frame, text="Time Horizon (Years):").grid(row=5, column=0, padx=10, pady=5)
-time_var = tk.StringVar(value="10")
-tk.Entry(robo_advisor_frame, textvariable=time_var).grid(row=5, column=1, padx=10, pady=5)
-
-# Stock Selection Buttons
-risky_stocks = ["TSLA", "GME", "AMC", "PLTR", "COIN", "SPCE", "NIO"]
-medium_risk_stocks = ["AAPL", "MSFT", "GOOGL", "AMZN", "NVDA", "CRM", "ADBE"]
-stable_stocks = ["JNJ", "PG", "KO", "WMT", "HD", "VTI", "VOO", "SPY"]
+# Live Quotes
+live_task = None  # BackgroundTask loading the last prices; set while the live mode is on
+live_feed = None  # Quote feed while the live mode is on
+live_updater = None  # live_quotes.LiveUpdater redrawing the live label
 
 
-risky_selected = {}
-medium_selected = {}
-stable_selected = {}
+def start_live_quotes():
+    """
+    Value the calculated portfolio at streaming quotes; the label is redrawn once per frame.
+    The last prices are loaded on a worker thread, as they may need a download.
+    """
+    global live_task
+    weights, value, goal = current_weights, current_value, goal_value
+    task = live_task = BackgroundTask(
+        root,
+        lambda task: session.fetch_many(list(weights))[0],
+        on_done=lambda prices: begin_live_quotes(prices, weights, value, goal),
+        on_error=lambda e: live_quotes_failed(task, e),
+    )
+    live_button.config(text="Stop Live Quotes", command=stop_live_quotes)
+    live_label.config(text="Loading prices...", fg="orange")
+    task.start()
 
 
-# Stock Selection Buttons
-tk.Button(robo_advisor_frame, text="Select Risky Stocks", command=lambda: open_stock_selection("Risky", risky_stocks, risky_selected)).grid(row=6, column=0, padx=10, pady=5)
-tk.Button(robo_advisor_frame, text="Select Medium Risk Stocks", command=lambda: open_stock_selection("Medium Risk", medium_risk_stocks, medium_selected)).grid(row=6, column=1, padx=10, pady=5)
-tk.Button(robo_advisor_frame, text="Select Stable Stocks", command=lambda: open_stock_selection("Stable", stable_stocks, stable_selected)).grid(row=6, column=2, padx=10, pady=5)
+def begin_live_quotes(prices, weights, value, goal):
+    global live_feed, live_updater
+    from live_quotes import LivePortfolio, LiveUpdater
 
-# Display Selected Stocks
-selected_stocks_label = tk.Label(robo_advisor_frame, text="Selected Stocks: None", font=("Arial", 10), fg="blue")
-selected_stocks_label.grid(row=7, column=0, columnspan=3, pady=5)
+    last_prices = prices.ffill().iloc[-1].dropna().to_dict()
+    portfolio = LivePortfolio.from_weights(value, weights, last_prices, goal)
+    live_feed = data_sources.open_quote_feed(last_prices)
+    live_feed.subscribe(portfolio.apply)
+    live_updater = LiveUpdater(root, portfolio, show_live_state)
+    live_updater.start()
 
-# Calculate Button
-tk.Button(robo_advisor_frame, text="Calculate", command=calculate_results).grid(row=8, column=0, columnspan=3, pady=10)
 
-# Monthly Contribution Display
-monthly_contribution_label = tk.Label(robo_advisor_frame, text="Monthly Contribution Needed: $0", font=("Arial", 10), fg="green")
-monthly_contribution_label.grid(row=9, column=0, columnspan=3, pady=5)
+def live_quotes_failed(task, error):
+    if task is live_task:
+        stop_live_quotes()
+        live_label.config(text=f"Live quotes unavailable: {error}", fg="red")
 
-# Clear Transactions Button
-tk.Button(robo_advisor_frame, text="Clear Transactions", command=clear_transactions).grid(row=11, column=0, columnspan=3, pady=10)
 
-# Recommended Stocks Section
-recommended_stocks_label = tk.Label(robo_advisor_frame, text="Recommended Stocks: None", font=("Arial", 10), fg="blue")
-recommended_stocks_label.grid(row=10, column=0, columnspan=3, pady=5)
-tk.Button(robo_advisor_frame, text="Get Stock Recommendations", command=recommend_stocks).grid(row=13, column=0, columnspan=3, pady=5)
-tk.Button(robo_advisor_frame, text="Add Recommended Stocks", command=add_recommended_stocks_to_selection).grid(row=14, column=0, columnspan=3, pady=5)
+def rebind_live_quotes():
+    """
+    Restart live mode, when it is on, on the current weights, value and goal;
+    it values the portfolio it was started with.
+    """
+    if live_task is not None:
+        stop_live_quotes()
+        start_live_quotes()
+
+
+def stop_live_quotes():
+    global live_task, live_feed, live_updater
+    if live_task is not None:
+        live_task.cancel()  # A load still running is discarded
+        live_task = None
+    if live_updater is not None:
+        live_updater.stop()
+        live_updater = None
+    if live_feed is not None:
+        live_feed.close()
+        live_feed = None
+    live_button.config(text="Start Live Quotes", command=start_live_quotes)
+    live_label.config(text="")
+
+
+def show_live_state(state):
+    live_label.config(
+        text=(f"Live: ${state.value:,.2f} | Stocks {state.stock_share:.1%} "
+              f"(target {state.target_stock_share:.1%}, drift {state.drift:+.1%}) | "
+              f"Goal {state.goal_progress:.1%} | {state.ticks:,} quotes"),
+        fg="red" if abs(state.drift) > DRIFT_WARNING else "green",
+    )
 
-# Visualization Buttons Section
-pie_chart_button = tk.Button(robo_advisor_frame, text="Portfolio Allocation", command=lambda: [show_frame(pie_chart_frame), display_pie_chart(pie_chart_frame)], state=tk.DISABLED)
-pie_chart_button.grid(row=16, column=0, columnspan=3, pady=5)
 
-goal_progress_button = tk.Button(robo_advisor_frame, text="Goal Progress", command=lambda: [show_frame(goal_progress_frame), display_goal_progress(goal_progress_frame)], state=tk.DISABLED)
-goal_progress_button.grid(row=17, column=0, columnspan=3, pady=5)
+# Saved Sessions
+def save_session(path):
+    """
+    Write the inputs, results and loaded prices and factors to a session file.
+    """
+    import snapshot
+
+    pull_derived_results()
+    tickers, prices, factors, panel = session.loaded()
+    state = {
+        "goal_type": goal_type_var.get(),
+        "goal": goal_var.get(),
+        "risk_tolerance": risk_var.get(),
+        "time_horizon": time_var.get(),
+        "selected_stocks": get_selected_stocks(),
+        "recommended_stocks": recommended_stocks_label.cget("text"),
+        "session_tickers": sorted(tickers) if tickers else None,
+        "allocation": {name: int(share) for name, share in current_allocation.items()},
+        "weights": {ticker: float(weight) for ticker, weight in current_weights.items()},
+        "current_value": float(current_value),
+        "goal_value": float(goal_value),
+        "goal_probability": None if goal_probability is None else float(goal_probability),
+        "monthly_contribution": None if monthly_contribution is None else float(monthly_contribution),
+    }
+    snapshot.save_snapshot(path, state, prices=prices, factors=factors, panel=panel,
+                           results={"factor_fit": current_factor_fit, "risk": current_risk})
 
-risk_return_button = tk.Button(robo_advisor_frame, text="Risk vs Return", command=lambda: [show_frame(risk_return_frame), display_risk_return(risk_return_frame)], state=tk.DISABLED)
-risk_return_button.grid(row=18, column=0, columnspan=3, pady=5)
 
-# Summary Button
-summary_button = tk.Button(robo_advisor_frame, text="View Summary", command=display_summary, state=tk.DISABLED)
-summary_button.grid(row=19, column=0, columnspan=3, pady=10)
+def load_session(path):
+    """
+    Restore a session file: inputs, results and market data, without fetching anything.
+    """
+    import snapshot
+
+    saved = snapshot.load_snapshot(path)
+    state = saved.state
+    clear_transactions()
+
+    global selected_stocks_data, current_allocation, current_weights, current_value, goal_value, goal_probability
+    global current_factor_fit, current_risk, monthly_contribution
+    goal_type_var.set(state["goal_type"])
+    goal_var.set(state["goal"])
+    risk_var.set(state["risk_tolerance"])
+    time_var.set(state["time_horizon"])
+    selected_stocks_data = list(state["selected_stocks"])
+    recommended_stocks_label.config(text=state["recommended_stocks"])
+    prices, factors = saved.prices(), saved.factors()
+    session.restore(state["session_tickers"] or [], prices, factors, saved.panel())
+
+    current_allocation = state["allocation"]
+    current_weights = state["weights"]
+    current_value = state["current_value"]
+    goal_value = state["goal_value"]
+    goal_probability = state["goal_probability"]
+    current_factor_fit = saved.result("factor_fit")
+    current_risk = saved.result("risk")
+    monthly_contribution = state["monthly_contribution"]
+
+    update_selected_stocks()
+    push_inputs()
+    if monthly_contribution is not None:
+        from returns_panel import ReturnsPanel
+
+        # Later input edits are derived from the saved calculation like from a new one
+        panel = ReturnsPanel.from_prices(prices[sorted(current_weights)], factors)
+        provide_result(engine.PortfolioResult(current_allocation, current_value, goal_value, monthly_contribution,
+                                              current_weights, factor_fit=current_factor_fit, risk=current_risk,
+                                              panel=panel))
+        results_graph.provide("goal_probability", goal_probability)
+        results_graph.flush()
+        enable_visualization_buttons()
+    status_label.config(text=f"Session loaded from {os.path.basename(path)}.", fg="green")
 
 
+def ask_save_session():
+    path = filedialog.asksaveasfilename(title="Save Session", defaultextension=SESSION_EXTENSION,
+                                        filetypes=[("SmartInvest session", f"*{SESSION_EXTENSION}")])
+    if not path:
+        return
+    try:
+        save_session(path)
+    except (OSError, TypeError, ValueError) as e:
+        status_label.config(text=f"Could not save the session: {e}", fg="red")
+        return
+    status_label.config(text=f"Session saved to {os.path.basename(path)}.", fg="green")
+
+
+def ask_load_session():
+    path = filedialog.askopenfilename(title="Load Session",
+                                      filetypes=[("SmartInvest session", f"*{SESSION_EXTENSION}")])
+    if not path:
+        return
+    try:
+        load_session(path)
+    except (OSError, KeyError, ValueError) as e:
+        status_label.config(text=f"Could not load the session: {e}", fg="red")
 
-# Start with Main Menu
-def show_frame(frame):
-    frame.tkraise()
 
-show_frame(main_menu)
-root.mainloop()
+# Stock Selection Buttons (fallback lists until the screening index is built)
+risky_stocks = ["TSLA", "GME", "AMC", "PLTR", "COIN", "SPCE", "NIO"]
+medium_risk_stocks = ["AAPL", "MSFT", "GOOGL", "AMZN", "NVDA", "CRM", "ADBE"]
+stable_stocks = ["JNJ", "PG", "KO", "WMT", "HD", "VTI", "VOO", "SPY"]
 
 
+risky_selected = {}
+medium_selected = {}
+stable_selected = {}
 
 
-# %%
+# GUI Setup
+def build_gui():
+    """
+    Create the main window and all frames and widgets.
+    """
+    global root, main_menu, robo_advisor_frame, pie_chart_frame, goal_progress_frame, risk_return_frame, summary_frame
+    global factor_frame, what_if_frame
+    global status_label, goal_type_var, goal_var, risk_var, time_var, selected_stocks_label
+    global calculate_button, cancel_button, monthly_contribution_label, recommended_stocks_label
+    global pie_chart_button, goal_progress_button, risk_return_button, summary_button, diagnostics_frame
+    global live_button, live_label, input_changed
+
+    root = tk.Tk()
+    root.title("SmartInvest: Your Personal Robo Advisor")
+    build_results_graph()
+    input_changed = Debouncer(root, INPUT_DEBOUNCE_MS, push_inputs)
+
+    # Frames for GUI
+    main_menu = tk.Frame(root)
+    robo_advisor_frame = tk.Frame(root)
+    pie_chart_frame = tk.Frame(root)
+    goal_progress_frame = tk.Frame(root)
+    risk_return_frame = tk.Frame(root)
+    factor_frame = tk.Frame(root)
+    what_if_frame = tk.Frame(root)
+    summary_frame = tk.Frame(root)
+    summary_frame.grid(row=0, column=0, sticky="nsew")
+    diagnostics_frame = tk.Frame(root)
+
+
+    for frame in (main_menu, robo_advisor_frame, pie_chart_frame, goal_progress_frame, risk_return_frame, factor_frame,
+                  what_if_frame, diagnostics_frame):
+        frame.grid(row=0, column=0, sticky="nsew")
+
+    # Main Menu
+    tk.Label(main_menu, text="Welcome to SmartInvest: Your Personal Robo Advisor!", font=("Arial", 16)).pack(pady=20)
+    tk.Button(main_menu, text="Dashboard", command=lambda: show_frame(robo_advisor_frame)).pack(pady=10)
+
+    # Robo-Advisor Frame
+    tk.Label(robo_advisor_frame, text="Dashboard", font=("Arial", 14)).grid(row=0, column=0, columnspan=3, pady=10)
+    status_label = tk.Label(robo_advisor_frame, text="Waiting for input...", font=("Arial", 10), fg="blue")
+    status_label.grid(row=1, column=0, columnspan=3, pady=5)
+
+
+    # Goal Type Dropdown
+    tk.Label(robo_advisor_frame, text="Goal Type:").grid(row=2, column=0, padx=10, pady=5)
+    goal_type_var = tk.StringVar(value="Retirement")
+    goal_types = ["House", "Retirement", "Business", "Vacation", "College"]
+    tk.OptionMenu(robo_advisor_frame, goal_type_var, *goal_types, command=lambda _: update_goal_based_on_type()).grid(row=2, column=1, padx=10, pady=5)
+
+    # Investment Goal Input
+    tk.Label(robo_advisor_frame, text="Investment Goal ($):").grid(row=3, column=0, padx=10, pady=5)
+    goal_var = tk.StringVar(value="100000")
+    goal_var.trace_add("write", manual_goal_update)
+    goal_var.trace_add("write", input_changed)
+    tk.Entry(robo_advisor_frame, textvariable=goal_var).grid(row=3, column=1, padx=10, pady=5)
+
+    # Risk Tolerance Input
+    tk.Label(robo_advisor_frame, text="Risk Tolerance:").grid(row=4, column=0, padx=10, pady=5)
+    risk_var = tk.StringVar(value="Medium")
+    risk_var.trace_add("write", input_changed)
+    tk.OptionMenu(robo_advisor_frame, risk_var, "Low", "Medium", "High").grid(row=4, column=1, padx=10, pady=5)
+
+    # Time Horizon Input
+    tk.Label(robo_advisor_frame, text="Time Horizon (Years):").grid(row=5, column=0, padx=10, pady=5)
+    time_var = tk.StringVar(value="10")
+    time_var.trace_add("write", input_changed)
+    tk.Entry(robo_advisor_frame, textvariable=time_var).grid(row=5, column=1, padx=10, pady=5)
+
+    # Stock Selection Buttons
+    tk.Button(robo_advisor_frame, text="Select Risky Stocks", command=lambda: open_stock_selection("Risky", stock_choices("High", risky_stocks), risky_selected)).grid(row=6, column=0, padx=10, pady=5)
+    tk.Button(robo_advisor_frame, text="Select Medium Risk Stocks", command=lambda: open_stock_selection("Medium Risk", stock_choices("Medium", medium_risk_stocks), medium_selected)).grid(row=6, column=1, padx=10, pady=5)
+    tk.Button(robo_advisor_frame, text="Select Stable Stocks", command=lambda: open_stock_selection("Stable", stock_choices("Low", stable_stocks), stable_selected)).grid(row=6, column=2, padx=10, pady=5)
+
+    # Display Selected Stocks
+    selected_stocks_label = tk.Label(robo_advisor_frame, text="Selected Stocks: None", font=("Arial", 10), fg="blue")
+    selected_stocks_label.grid(row=7, column=0, columnspan=3, pady=5)
+
+    # Calculate and Cancel Buttons
+    calculate_button = tk.Button(robo_advisor_frame, text="Calculate", command=calculate_results)
+    calculate_button.grid(row=8, column=0, columnspan=2, pady=10)
+    cancel_button = tk.Button(robo_advisor_frame, text="Cancel", command=cancel_calculation, state=tk.DISABLED)
+    cancel_button.grid(row=8, column=2, pady=10)
+
+    # Monthly Contribution Display
+    monthly_contribution_label = tk.Label(robo_advisor_frame, text="Monthly Contribution Needed: $0", font=("Arial", 10), fg="green")
+    monthly_contribution_label.grid(row=9, column=0, columnspan=3, pady=5)
+
+    # Clear Transactions Button
+    tk.Button(robo_advisor_frame, text="Clear Transactions", command=clear_transactions).grid(row=11, column=0, columnspan=3, pady=10)
+
+    # Recommended Stocks Section
+    recommended_stocks_label = tk.Label(robo_advisor_frame, text="Recommended Stocks: None", font=("Arial", 10), fg="blue")
+    recommended_stocks_label.grid(row=10, column=0, columnspan=3, pady=5)
+    tk.Button(robo_advisor_frame, text="Get Stock Recommendations", command=recommend_stocks).grid(row=13, column=0, columnspan=3, pady=5)
+    tk.Button(robo_advisor_frame, text="Add Recommended Stocks", command=add_recommended_stocks_to_selection).grid(row=14, column=0, columnspan=3, pady=5)
+
+    # Visualization Buttons Section
+    pie_chart_button = tk.Button(robo_advisor_frame, text="Portfolio Allocation", command=lambda: [show_frame(pie_chart_frame), display_pie_chart(pie_chart_frame)], state=tk.DISABLED)
+    pie_chart_button.grid(row=16, column=0, columnspan=3, pady=5)
+
+    goal_progress_button = tk.Button(robo_advisor_frame, text="Goal Progress", command=lambda: [show_frame(goal_progress_frame), display_goal_progress(goal_progress_frame)], state=tk.DISABLED)
+    goal_progress_button.grid(row=17, column=0, columnspan=3, pady=5)
+
+    risk_return_button = tk.Button(robo_advisor_frame, text="Risk vs Return", command=lambda: [show_frame(risk_return_frame), display_risk_return(risk_return_frame)], state=tk.DISABLED)
+    risk_return_button.grid(row=18, column=0, columnspan=3, pady=5)
+
+    # Summary Button
+    summary_button = tk.Button(robo_advisor_frame, text="View Summary", command=display_summary, state=tk.DISABLED)
+    summary_button.grid(row=19, column=0, columnspan=3, pady=10)
+
+    # Diagnostics Button
+    tk.Button(robo_advisor_frame, text="Diagnostics", command=display_diagnostics).grid(row=20, column=0, columnspan=3, pady=5)
+
+    # Live Quotes
+    live_button = tk.Button(robo_advisor_frame, text="Start Live Quotes", command=start_live_quotes, state=tk.DISABLED)
+    live_button.grid(row=22, column=0, columnspan=3, pady=5)
+    live_label = tk.Label(robo_advisor_frame, text="", font=("Arial", 10))
+    live_label.grid(row=23, column=0, columnspan=3, pady=5)
+
+    # Session Buttons
+    tk.Button(robo_advisor_frame, text="Save Session", command=ask_save_session).grid(row=21, column=0, pady=5)
+    tk.Button(robo_advisor_frame, text="Load Session", command=ask_load_session).grid(row=21, column=2, pady=5)
+
+
+def show_frame(frame):
+    frame.tkraise()
+
+
+def measure_startup(budget):
+    """
+    Build the window, wait until it has been drawn and report the time to first window.
+    Returns an exit status: 0 within budget, 1 over budget.
+    """
+    build_gui()
+    show_frame(main_menu)
+    root.update()
+    elapsed = time.perf_counter() - STARTED
+    within_budget = elapsed <= budget
+    print(f"Time to first window: {elapsed:.3f}s (budget {budget:.3f}s, {'OK' if within_budget else 'OVER BUDGET'})")
+    root.destroy()
+    return 0 if within_budget else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SmartInvest: Your Personal Robo Advisor")
+    parser.add_argument("--offline", action="store_true",
+                        help="use seeded synthetic prices and factors instead of Yahoo Finance and WRDS")
+    parser.add_argument("--profile", action="store_true",
+                        help="record per-stage timings from the start (see Diagnostics on the dashboard)")
+    parser.add_argument("--session", metavar="FILE", help="resume a saved session")
+    parser.add_argument("--measure-startup", nargs="?", type=float, const=STARTUP_BUDGET, metavar="BUDGET",
+                        help=f"print the time to first window and exit (default budget {STARTUP_BUDGET}s)")
+    args = parser.parse_args(argv)
+
+    if args.offline or os.environ.get("SMARTINVEST_OFFLINE") == "1":
+        data_sources.use_offline_data()
+    if args.profile or os.environ.get("SMARTINVEST_PROFILE") == "1":
+        instrumentation.enable()
+    if args.measure_startup is not None:
+        return measure_startup(args.measure_startup)
+
+    build_gui()
+
+    # Start with Main Menu, or the dashboard of a resumed session
+    show_frame(main_menu)
+    if args.session:
+        load_session(args.session)
+        show_frame(robo_advisor_frame)
+    root.mainloop()
+    if live_feed is not None:
+        live_feed.close()
+    data_sources.close_connections()
+    return 0
 
 
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Run long calculations off the Tk main thread.
+
+Tk widgets may only be touched from the thread running the main loop, so the
+worker never calls into Tk.  It posts progress and its result to a queue that
+the main loop drains with root.after.
+"""
+
+import queue
+import threading
+
+
+class Cancelled(Exception):
+    """
+    Raised inside the worker when the user has cancelled the task.
+    """
+
+
+class BackgroundTask:
+    """
+    Runs func(task) on a worker thread and calls the callbacks on the Tk main loop.
+
+    on_progress(stage, step, total) is called for every task.progress() call,
+    on_done(result) when func returns, on_error(exception) when it raises and
+    on_cancel() when it stopped after cancel() was requested.
+    """
+
+    def __init__(self, root, func, on_progress=None, on_done=None, on_error=None, on_cancel=None, poll_ms=50):
+        self.root = root
+        self.func = func
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+        self.poll_ms = poll_ms
+        self._events = queue.Queue()
+        self._cancel_event = threading.Event()
+        self._thread = None
+        self._finished = False
+
+    @property
+    def running(self):
+        """
+        True from start() until the outcome has been delivered, including after a cancel request.
+        """
+        return self._thread is not None and not self._finished
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self.root.after(self.poll_ms, self._poll)
+
+    def cancel(self):
+        """
+        Ask the worker to stop at its next checkpoint.
+        Work already in flight (e.g. a download) finishes, but its result is discarded.
+        """
+        self._cancel_event.set()
+
+    # Called from the worker thread
+    def progress(self, stage, step, total):
+        self.check_cancelled()
+        self._events.put(("progress", (stage, step, total)))
+
+    def check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise Cancelled()
+
+    def _run(self):
+        try:
+            result = self.func(self)
+            self.check_cancelled()
+            self._events.put(("done", result))
+        except Cancelled:
+            self._events.put(("cancel", None))
+        except Exception as e:
+            self._events.put(("error", e))
+
+    # Called on the Tk main loop
+    def _poll(self):
+        finished = False
+        while True:
+            try:
+                kind, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                if self.on_progress and not self.cancelled:
+                    self.on_progress(*payload)
+                continue
+            finished = self._finished = True
+            if kind == "done" and self.cancelled:
+                kind = "cancel"
+            if kind == "done" and self.on_done:
+                self.on_done(payload)
+            elif kind == "error" and self.on_error:
+                self.on_error(payload)
+            elif kind == "cancel" and self.on_cancel:
+                self.on_cancel()
+        if not finished:
+            self.root.after(self.poll_ms, self._poll)
@@ -0,0 +1,161 @@
+"""
+Historical backtests of target-weight portfolios over a ReturnsPanel.
+
+Many strategies run together: targets is a (strategies, tickers) matrix of
+weights over the columns of the panel. The loop is over months, not days or
+assets. Within a month holdings only drift, so every day of the month is one
+cumulative product of the panel rows and one matrix product with the
+holdings. At each month start the monthly contribution is invested at the
+target weights and the portfolio is rebalanced when the rule says so, paying
+a proportional cost on the traded amount.
+
+Rebalancing rules:
+    "monthly"    every month start
+    "quarterly"  the first month start of each calendar quarter
+    "threshold"  any month start where a weight drifted more than threshold
+                 from its target
+    "never"      buy and hold; contributions still go in at target weights
+
+Days without a return for a ticker (before it listed, gaps) count as 0%.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from instrumentation import instrument
+
+
+REBALANCE_RULES = ("monthly", "quarterly", "threshold", "never")
+
+
+@dataclass
+class BacktestResult:
+    """
+    Daily equity and drawdowns, one row per strategy.
+
+    equity includes contributions and costs; drawdown is measured on the
+    time-weighted index, so contributions do not hide losses. turnover is
+    the traded value divided by portfolio value, summed over rebalances.
+    drawdown is negative; max_drawdown is its worst value as a positive
+    fraction, like risk_metrics.max_drawdown.
+    """
+    dates: np.ndarray
+    equity: np.ndarray
+    index: np.ndarray
+    drawdown: np.ndarray
+    turnover: np.ndarray
+    costs: np.ndarray
+    rebalances: np.ndarray
+    contributions: float
+
+    @property
+    def max_drawdown(self):
+        return -self.drawdown.min(axis=1)
+
+    @property
+    def total_return(self):
+        return self.index[:, -1] - 1
+
+
+def target_weights(panel, ticker_lists, stocks):
+    """
+    (strategies, tickers) target matrix for profiles in the form of evaluate_profile:
+    each profile's stocks share its stock allocation equally and BND holds the bonds.
+    stocks is the stock allocation of each profile in percent (see
+    batch.allocation_split); profiles with no stock allocation (NaN) or none of
+    their tickers in the panel hold only BND.
+    """
+    weights = np.zeros((len(ticker_lists), len(panel.tickers)))
+    if not len(ticker_lists):
+        return weights
+    bond = panel.index("BND")
+    stocks = np.nan_to_num(np.asarray(stocks, dtype="float64")) / 100
+    width = len(panel.tickers)
+
+    # (profile, ticker) membership pairs, deduplicated, without BND and tickers outside the panel
+    lengths = np.fromiter((len(tickers) for tickers in ticker_lists), dtype=np.intp, count=len(ticker_lists))
+    rows = np.repeat(np.arange(len(ticker_lists)), lengths)
+    cols = panel.positions([ticker for tickers in ticker_lists for ticker in tickers])
+    keep = (cols >= 0) & (cols != bond)
+    pairs = np.unique(rows[keep] * width + cols[keep])
+    rows, cols = pairs // width, pairs % width
+
+    counts = np.bincount(rows, minlength=len(ticker_lists))
+    weights[rows, cols] = stocks[rows] / counts[rows]
+    weights[:, bond] = np.where(counts > 0, 1 - stocks, 1.0)
+    return weights
+
+
+@instrument("backtest.run")
+def run_backtest(panel, targets, rebalance="monthly", threshold=0.05, cost=0.001,
+                 initial_value=100000, monthly_contribution=0):
+    """
+    Replay the daily returns of panel for each row of targets and return a BacktestResult.
+
+    targets rows should sum to 1; a single row may be given as a 1-d array.
+    cost is the fraction of each traded dollar lost to costs (0.001 = 10 bp).
+    """
+    if rebalance not in REBALANCE_RULES:
+        raise ValueError(f"Unknown rebalancing rule {rebalance!r}; expected one of {', '.join(REBALANCE_RULES)}.")
+    targets = np.atleast_2d(np.asarray(targets, dtype="float64"))
+    if targets.shape[1] != len(panel.tickers):
+        raise ValueError("targets must have one column per ticker of the panel.")
+    strategies, days = len(targets), len(panel)
+
+    gross = np.where(panel.mask, panel.values, 0).astype("float64", copy=False)
+    gross += 1
+
+    # Row where each month starts
+    months = panel.dates.astype("datetime64[M]")
+    starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]]) if days else np.zeros(0, dtype=np.intp)
+    ends = np.r_[starts[1:], days]
+    quarter_start = (months[starts].astype("int64") % 3) == 0
+
+    equity = np.empty((strategies, days))
+    index = np.empty((strategies, days))
+    turnover = np.zeros(strategies)
+    costs = np.zeros(strategies)
+    rebalances = np.zeros(strategies, dtype=np.int64)
+    holdings = targets * initial_value
+    level = np.ones(strategies)  # Time-weighted index at the start of the month
+
+    for month, (start, end) in enumerate(zip(starts, ends)):
+        if month:
+            holdings += targets * monthly_contribution
+            value = holdings.sum(axis=1)
+            if rebalance == "monthly":
+                due = np.ones(strategies, dtype=bool)
+            elif rebalance == "quarterly":
+                due = np.full(strategies, quarter_start[month])
+            elif rebalance == "threshold":
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    drift = np.abs(holdings / value[:, None] - targets).max(axis=1)
+                due = drift > threshold
+            else:
+                due = np.zeros(strategies, dtype=bool)
+
+            if due.any():
+                traded = np.abs(targets[due] * value[due, None] - holdings[due]).sum(axis=1)
+                paid = traded * cost
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    turnover[due] += np.where(value[due] > 0, traded / value[due], 0)
+                    level[due] *= np.where(value[due] > 0, 1 - paid / value[due], 1)
+                costs[due] += paid
+                rebalances[due] += 1
+                holdings[due] = targets[due] * (value[due] - paid)[:, None]
+
+        # Holdings drift with the cumulative growth of each ticker through the month
+        growth = np.cumprod(gross[start:end], axis=0)
+        month_equity = holdings @ growth.T
+        value = holdings.sum(axis=1)
+        equity[:, start:end] = month_equity
+        with np.errstate(invalid="ignore", divide="ignore"):
+            index[:, start:end] = level[:, None] * np.where(value[:, None] > 0, month_equity / value[:, None], 1)
+        holdings = holdings * growth[-1]
+        level = index[:, end - 1].copy()
+
+    # Peaks start at the invested value, as in risk_metrics.max_drawdown
+    drawdown = index / np.maximum(np.maximum.accumulate(index, axis=1), 1) - 1 if days else index
+    contributions = monthly_contribution * max(len(starts) - 1, 0)
+    return BacktestResult(panel.dates, equity, index, drawdown, turnover, costs, rebalances, contributions)
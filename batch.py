@@ -0,0 +1,178 @@
+"""
+Evaluate many client profiles at once.
+
+All profiles share one ReturnsPanel. Per-ticker statistics are computed once
+and each profile's figures are gathered from them with NumPy array operations,
+so the cost does not grow with a Python loop over profiles.
+
+Run nightly over a CSV of profiles:
+
+    python batch.py profiles.csv results.csv [--offline] [--backtest RULE] [--workers N]
+
+The CSV needs the columns risk_tolerance, goal_value, time_horizon and tickers
+(tickers separated by spaces or commas). --backtest adds the total return,
+maximum drawdown and turnover of holding each profile's mix over the history
+with the given rebalancing rule. --workers spreads chunks of profiles over
+processes that share one copy of the returns panel (see shared_panel).
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+import backtest
+import engine
+import shared_panel
+from instrumentation import instrument
+from returns_panel import ReturnsPanel
+
+
+RISK_LEVELS = ["Low", "Medium", "High"]
+CHUNK_PROFILES = 5000  # Profiles per task; bounds the memory of the backtest equity curves
+RESULT_COLUMNS = ["stocks", "bonds", "performance", "current_value", "monthly_contribution", "valid_tickers"]
+
+
+def parse_tickers(tickers):
+    """
+    Series of ticker lists from a column of lists or space/comma separated strings.
+    """
+    if tickers.map(lambda value: isinstance(value, str)).all():
+        return tickers.str.upper().str.replace(",", " ").str.split()
+    return tickers
+
+
+def allocation_split(risk_tolerance):
+    """
+    Stock and bond allocations in percent for a sequence of risk tolerances.
+    recommend_allocation is called once per level and the levels are looked up
+    by position; unknown levels get NaN.
+    """
+    allocations = [engine.recommend_allocation(level) for level in RISK_LEVELS]
+    table = np.array([[allocation["Stocks"], allocation["Bonds"]] for allocation in allocations]
+                     + [[np.nan, np.nan]], dtype="float64")
+    split = table[pd.Index(RISK_LEVELS).get_indexer(np.asarray(risk_tolerance, dtype=object))]
+    return split[:, 0], split[:, 1]
+
+
+@instrument("batch.evaluate_profiles")
+def evaluate_profiles(profiles, panel):
+    """
+    Evaluate every row of profiles against a shared ReturnsPanel.
+
+    panel has one column per ticker plus "BND", and factors.
+    Each profile holds its stocks in equal weight within the fixed stock/bond
+    split of recommend_allocation; evaluate_profile optimizes the weights of
+    a single profile instead. Returns a frame indexed like profiles with
+    the columns in RESULT_COLUMNS; profiles without any ticker that has data
+    get NaN results and valid_tickers == 0.
+    """
+    tickers = parse_tickers(profiles["tickers"])
+    mean_returns = panel.mean()
+    bond = panel.index("BND")
+    bond_mean = mean_returns[bond]
+    avg_rf = panel.rf_mean()
+    width = len(panel.tickers)
+
+    # (profile, ticker) membership pairs, deduplicated, without BND and tickers lacking data
+    exploded = tickers.explode()
+    rows = np.repeat(np.arange(len(profiles)), tickers.str.len().fillna(0).astype(int).to_numpy())
+    cols = panel.positions(exploded.dropna().to_numpy())
+    keep = (cols >= 0) & (cols != bond)
+    keep[keep] = ~np.isnan(mean_returns[cols[keep]])
+    pairs = np.unique(rows[keep] * width + cols[keep])
+    rows, cols = pairs // width, pairs % width
+
+    # Equal-weighted mean daily return of each profile's stocks
+    counts = np.bincount(rows, minlength=len(profiles))
+    sums = np.bincount(rows, weights=mean_returns[cols], minlength=len(profiles))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        stock_mean = sums / counts
+
+    stocks, bonds = allocation_split(profiles["risk_tolerance"])
+
+    time_horizon = profiles["time_horizon"].to_numpy(dtype="float64")
+    goal_value = profiles["goal_value"].to_numpy(dtype="float64")
+
+    # Same formulas as calculate_performance, project_value and calculate_monthly_contribution
+    performance = stocks * stock_mean + bonds * bond_mean - avg_rf
+    current_value = (1 + performance) ** time_horizon * engine.STARTING_VALUE
+    monthly_contribution = engine.calculate_monthly_contribution(goal_value, current_value, time_horizon, performance)
+    monthly_contribution[np.isnan(current_value)] = np.nan
+
+    return pd.DataFrame({
+        "stocks": stocks,
+        "bonds": bonds,
+        "performance": performance,
+        "current_value": current_value,
+        "monthly_contribution": monthly_contribution,
+        "valid_tickers": counts,
+    }, index=profiles.index)
+
+
+def evaluate_chunk(panel, task):
+    """
+    evaluate_profiles for a (profiles, rebalancing rule) task, adding the total
+    return, maximum drawdown and turnover of a backtest when the rule is set.
+    """
+    profiles, rule = task
+    results = evaluate_profiles(profiles, panel)
+    if rule:
+        stocks, _ = allocation_split(profiles["risk_tolerance"])
+        history = backtest.run_backtest(panel, backtest.target_weights(panel, profiles["tickers"], stocks),
+                                        rebalance=rule)
+        results["total_return"] = history.total_return
+        results["max_drawdown"] = history.max_drawdown
+        results["turnover"] = history.turnover
+    return results
+
+
+def evaluate_book(profiles, panel, rule=None, workers=1):
+    """
+    Results for every profile, in chunks of at most CHUNK_PROFILES; with
+    workers > 1 the chunks run in a process pool over a shared panel.
+    """
+    size = max(1, min(CHUNK_PROFILES, -(-len(profiles) // max(workers, 1))))
+    tasks = [(profiles.iloc[start:start + size], rule) for start in range(0, len(profiles), size)]
+    if workers > 1 and len(tasks) > 1:
+        with shared_panel.publish(panel) as handle:
+            parts = shared_panel.parallel_map(handle, evaluate_chunk, tasks, workers)
+    else:
+        parts = [evaluate_chunk(panel, task) for task in tasks]
+    return pd.concat(parts) if parts else evaluate_profiles(profiles, panel)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate a CSV of client profiles")
+    parser.add_argument("profiles", help="CSV with risk_tolerance, goal_value, time_horizon and tickers columns")
+    parser.add_argument("output", help="CSV file to write the results to")
+    parser.add_argument("--offline", action="store_true", help="use synthetic prices and factors")
+    parser.add_argument("--backtest", choices=backtest.REBALANCE_RULES, help="also backtest each profile with this rebalancing rule")
+    parser.add_argument("--workers", type=int, default=1, help="processes to spread the profiles over")
+    args = parser.parse_args(argv)
+
+    import data_sources
+    if args.offline:
+        data_sources.use_offline_data()
+
+    profiles = pd.read_csv(args.profiles)
+    profiles["tickers"] = parse_tickers(profiles["tickers"].fillna(""))
+    universe = sorted(set(profiles["tickers"].explode().dropna()))
+    prices, failed = data_sources.fetch_many(universe + ["BND"])
+    for ticker in failed:
+        print(f"Warning: No data found for {ticker}. Skipping.")
+    if "BND" not in prices.columns:
+        print("Error: No bond data found for BND.")
+        return 1
+
+    panel = ReturnsPanel.from_prices(prices, data_sources.fetch_fama_french())
+    results = evaluate_book(profiles, panel, args.backtest, args.workers)
+    profiles.drop(columns="tickers").join(results).to_csv(args.output)
+    data_sources.close_connections()
+    print(f"Evaluated {len(profiles)} profiles; results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""
+Offline benchmarks for the SmartInvest calculation pipeline.
+
+Yahoo Finance and WRDS are replaced by the seeded stand-ins in synthetic.py
+and all stores live in a temporary folder, so runs are repeatable and need no
+network or credentials. Results are written as JSON; pass an earlier result
+file with --compare to flag regressions.
+
+    python benchmarks.py --tickers 50 --years 10 --output bench.json
+    python benchmarks.py --tickers 50 --years 10 --compare bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import backtest
+import batch
+import engine
+import factor_model
+import instrumentation
+import montecarlo
+import optimizer
+import risk_metrics
+import shared_panel
+from connections import ConnectionPool
+from data_sources import DEFAULT_END
+from factor_store import FactorStore
+from price_cache import PriceCache
+from returns_panel import ReturnsPanel
+from synthetic import SyntheticPriceSource, SyntheticWRDS, synthetic_profiles, synthetic_tickers
+
+
+class Pipeline:
+    """
+    Price cache and factor store over synthetic sources in a scratch folder.
+    """
+
+    def __init__(self, root, tickers, years, seed):
+        self.root = root
+        self.tickers = tickers
+        self.seed = seed
+        self.end = pd.Timestamp(DEFAULT_END)
+        self.start = self.end - pd.DateOffset(years=years)
+        self.pool = ConnectionPool(lambda: SyntheticWRDS(seed), max_size=1)
+        self.reset()
+
+    def reset(self):
+        """
+        Empty both stores and the frontier cache.
+        """
+        for name in ("prices", "factors"):
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+        self.prices = PriceCache(os.path.join(self.root, "prices"), downloader=SyntheticPriceSource(self.seed))
+        self.factors = FactorStore(self.pool, os.path.join(self.root, "factors"))
+        optimizer.frontier_cache.clear()
+
+    def fetch_many(self, tickers):
+        return self.prices.get_many(tickers, self.start, self.end)
+
+    def fetch_fama_french(self):
+        return self.factors.get(self.start, self.end)
+
+    def calculate(self, paths):
+        profile = engine.Profile(risk_tolerance="Medium", goal_value=1000000, time_horizon=20, tickers=self.tickers)
+        return engine.evaluate_profile(profile, self.fetch_many, self.fetch_fama_french, simulated_paths=paths, seed=self.seed)
+
+
+def time_runs(func, repeats, setup=None):
+    """
+    Wall time of repeats calls of func; setup runs untimed before each call.
+    """
+    runs = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - start)
+    return {
+        "runs": runs,
+        "min_s": min(runs),
+        "median_s": statistics.median(runs),
+        "mean_s": statistics.fmean(runs),
+    }
+
+
+def render_charts(pipeline):
+    """
+    Draw the allocation, goal progress and risk/return charts off-screen.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    import charts
+
+    prices, _ = pipeline.fetch_many(pipeline.tickers)
+    weights = {ticker: 100 / len(pipeline.tickers) for ticker in pipeline.tickers}
+    for draw, size in (
+        (lambda ax: charts.draw_allocation(ax, charts.allocation_slices({}, weights)), (4, 4)),
+        (lambda ax: charts.draw_goal_progress(ax, 1000000, 650000), (6, 5)),
+        (lambda ax: charts.draw_risk_return(ax, charts.risk_return_rows(charts.return_stats(prices))), (6, 4)),
+    ):
+        fig = Figure(figsize=size)
+        FigureCanvasAgg(fig)
+        draw(fig.add_subplot())
+        fig.canvas.draw()
+
+
+def run_benchmarks(args, scratch):
+    tickers = synthetic_tickers(args.tickers)
+    pipeline = Pipeline(scratch, tickers, args.years, args.seed)
+    universe = tickers + ["BND"]
+    results = {}
+
+    results["price_cache.miss"] = time_runs(lambda: pipeline.fetch_many(universe), args.repeats, setup=pipeline.reset)
+    results["price_cache.hit"] = time_runs(lambda: pipeline.fetch_many(universe), args.repeats)
+    results["factor_store.miss"] = time_runs(pipeline.fetch_fama_french, args.repeats, setup=pipeline.reset)
+    results["factor_store.hit"] = time_runs(pipeline.fetch_fama_french, args.repeats)
+
+    results["calculate.cold"] = time_runs(lambda: pipeline.calculate(engine.SIMULATED_PATHS), args.repeats, setup=pipeline.reset)
+    pipeline.calculate(0)
+    results["calculate.warm_stores"] = time_runs(lambda: pipeline.calculate(engine.SIMULATED_PATHS), args.repeats,
+                                                 setup=optimizer.frontier_cache.clear)
+    results["calculate.warm"] = time_runs(lambda: pipeline.calculate(engine.SIMULATED_PATHS), args.repeats)
+
+    prices, _ = pipeline.fetch_many(universe)
+    ff_data = pipeline.fetch_fama_french()
+    results["returns_panel.from_prices"] = time_runs(lambda: ReturnsPanel.from_prices(prices, ff_data), args.repeats)
+    panel = ReturnsPanel.from_prices(prices, ff_data)
+    profiles = synthetic_profiles(args.profiles, tickers, seed=args.seed)
+    results["batch.evaluate_profiles"] = time_runs(lambda: batch.evaluate_profiles(profiles, panel), args.repeats)
+
+    results["risk_metrics.compute"] = time_runs(lambda: risk_metrics.compute_risk(panel, np.full(len(universe), 1 / len(universe))), args.repeats)
+    results["risk_metrics.rolling_volatility"] = time_runs(lambda: risk_metrics.rolling_volatility(panel.values), args.repeats)
+    results["shared_panel.publish"] = time_runs(lambda: shared_panel.publish(panel).close(), args.repeats)
+    results["factor_model.fit"] = time_runs(lambda: factor_model.fit_factors(panel), args.repeats)
+    results["factor_model.rolling"] = time_runs(lambda: list(factor_model.rolling_factor_fits(panel, 252)), args.repeats)
+
+    strategies = profiles.head(args.strategies)
+    targets = backtest.target_weights(panel, strategies["tickers"], batch.allocation_split(strategies["risk_tolerance"])[0])
+    for rule in ("monthly", "threshold"):
+        results[f"backtest.{rule}"] = time_runs(
+            lambda: backtest.run_backtest(panel, targets, rebalance=rule, monthly_contribution=1000), args.repeats)
+
+    mean, cov = panel.mean(), panel.cov()
+    results["optimizer.efficient_frontier"] = time_runs(lambda: optimizer.efficient_frontier(universe, mean, cov), args.repeats)
+
+    weights = np.full(len(universe), 1 / len(universe))
+    results["montecarlo.simulate_goal"] = time_runs(
+        lambda: montecarlo.simulate_goal(mean * montecarlo.TRADING_DAYS_PER_MONTH, cov * montecarlo.TRADING_DAYS_PER_MONTH,
+                                         weights, 1000000, 30, paths=args.paths, seed=args.seed),
+        args.repeats,
+    )
+
+    # A what-if grid far larger than the dashboard's: 100 goals x 40 horizons x 101 stock shares
+    returns = np.linspace(-0.02, 0.12, 101)
+    results["engine.contribution_grid"] = time_runs(
+        lambda: engine.contribution_grid(np.linspace(10000, 2000000, 100), np.arange(1, 41), returns), args.repeats)
+
+    if not args.skip_charts:
+        results["charts.render"] = time_runs(lambda: render_charts(pipeline), args.repeats)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Print the median time of each benchmark against a baseline run; return the names that regressed.
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        ratio = result["median_s"] / previous["median_s"] if previous["median_s"] else float("inf")
+        flag = "REGRESSION" if ratio > threshold else ""
+        print(f"{name:32s} {previous['median_s'] * 1000:10.2f} ms -> {result['median_s'] * 1000:10.2f} ms  x{ratio:5.2f} {flag}")
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the SmartInvest pipeline")
+    parser.add_argument("--tickers", type=int, default=20, help="number of synthetic tickers")
+    parser.add_argument("--years", type=int, default=5, help="years of daily history")
+    parser.add_argument("--profiles", type=int, default=10000, help="profiles for the batch benchmark")
+    parser.add_argument("--strategies", type=int, default=100, help="strategies per backtest run")
+    parser.add_argument("--paths", type=int, default=montecarlo.DEFAULT_PATHS, help="Monte Carlo paths")
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-charts", action="store_true", help="don't benchmark chart rendering")
+    parser.add_argument("--stages", action="store_true", help="also record per-stage timings")
+    parser.add_argument("--output", help="write results to this JSON file instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE", help="earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="slowdown ratio of the median that counts as a regression (default 1.2)")
+    args = parser.parse_args(argv)
+
+    if args.stages:
+        instrumentation.enable()
+
+    scratch = tempfile.mkdtemp(prefix="smartinvest-bench-")
+    try:
+        results = run_benchmarks(args, scratch)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "parameters": {key: getattr(args, key) for key in ("tickers", "years", "profiles", "strategies", "paths", "repeats", "seed")},
+        },
+        "results": results,
+    }
+    if args.stages:
+        report["stages"] = instrumentation.summary()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    elif not args.compare:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("parameters") != report["meta"]["parameters"]:
+            print("Warning: baseline was run with different parameters")
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+Long-lived chart views for the Tk frames.
+
+Each view owns one matplotlib Figure and one FigureCanvasTkAgg for the life
+of its frame. Showing new data moves the existing artists (wedges, bars,
+labels) through the charts.update_* functions and only clears and redraws
+the Axes when the number of elements changed, so switching between views
+allocates no new figures or Tk widgets. Figures are built with
+matplotlib.figure.Figure rather than pyplot, so no global registry keeps
+them alive; they are released when their frame is destroyed.
+
+HeatmapTable does the same for tables of numbers: its cell labels are created
+once and a cell is only reconfigured when its text or color changed.
+"""
+
+import tkinter as tk
+
+
+class ChartView:
+    """
+    One figure and canvas packed into frame, plus a label for messages.
+    Widgets packed into frame afterwards stay below the chart.
+    """
+
+    def __init__(self, frame, draw, update, figsize, tight_layout=False):
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+
+        self.frame = frame
+        self.draw = draw
+        self.update = update
+        self.body = tk.Frame(frame)
+        self.body.pack()
+        self.figure = Figure(figsize=figsize, tight_layout=tight_layout)
+        self.ax = self.figure.add_subplot()
+        self.canvas = FigureCanvasTkAgg(self.figure, self.body)
+        self.widget = self.canvas.get_tk_widget()
+        self.widget.pack(pady=10)
+        self.message = tk.Label(self.body, font=("Arial", 12), fg="red")
+        self.artists = None
+        frame.bind("<Destroy>", self._on_destroy, add="+")
+
+    def show(self, *data):
+        """
+        Draw data, reusing the artists of the previous call where possible.
+        """
+        self.message.pack_forget()
+        if not self.widget.winfo_manager():
+            self.widget.pack(pady=10)
+
+        if self.artists is not None:
+            self.artists = self.update(self.ax, self.artists, *data)
+        if self.artists is None:
+            self.ax.clear()
+            self.artists = self.draw(self.ax, *data)
+        self.canvas.draw_idle()
+
+    def show_message(self, text):
+        """
+        Hide the chart and show text in its place.
+        """
+        self.widget.pack_forget()
+        self.message.config(text=text)
+        if not self.message.winfo_manager():
+            self.message.pack(pady=10)
+
+    def close(self):
+        self.artists = None
+        self.figure.clear()
+        self.canvas = None
+
+    def _on_destroy(self, event):
+        if event.widget is self.frame and self.canvas is not None:
+            self.close()
+
+
+# Green (low) through yellow to red (high)
+HEAT_COLORS = [(99, 190, 123), (255, 235, 132), (248, 105, 107)]
+
+
+def heat_color(fraction):
+    """
+    Hex color for a value at fraction (0 to 1) of the range shown.
+    """
+    fraction = min(max(fraction, 0.0), 1.0) * (len(HEAT_COLORS) - 1)
+    i = min(int(fraction), len(HEAT_COLORS) - 2)
+    t = fraction - i
+    low, high = HEAT_COLORS[i], HEAT_COLORS[i + 1]
+    return "#%02x%02x%02x" % tuple(round(a + (b - a) * t) for a, b in zip(low, high))
+
+
+class HeatmapTable:
+    """
+    A rows x columns grid of labels colored by value, with row and column headers.
+    """
+
+    def __init__(self, frame, rows, columns, cell_width=10):
+        self.body = tk.Frame(frame)
+        self.body.pack(pady=10)
+        self.corner = tk.Label(self.body, font=("Arial", 10, "bold"))
+        self.corner.grid(row=0, column=0, sticky="nsew")
+        self.row_headers = [tk.Label(self.body, font=("Arial", 10), anchor="e", padx=6) for _ in range(rows)]
+        self.column_headers = [tk.Label(self.body, font=("Arial", 10), width=cell_width) for _ in range(columns)]
+        self.cells = [[tk.Label(self.body, width=cell_width, relief="flat", borderwidth=1) for _ in range(columns)]
+                      for _ in range(rows)]
+        self._shown = {}  # (row, column) -> (text, color, highlighted) currently displayed
+        for i, header in enumerate(self.row_headers):
+            header.grid(row=i + 1, column=0, sticky="nsew")
+        for j, header in enumerate(self.column_headers):
+            header.grid(row=0, column=j + 1, sticky="nsew")
+        for i, row in enumerate(self.cells):
+            for j, cell in enumerate(row):
+                cell.grid(row=i + 1, column=j + 1, sticky="nsew", padx=1, pady=1)
+
+    def show(self, corner, row_labels, column_labels, values, format_value, highlight=None):
+        """
+        Fill the table from a (rows, columns) sequence of numbers; highlight is a
+        (row, column) cell to outline, or None. NaN cells are left blank.
+        """
+        self.corner.config(text=corner)
+        for header, text in zip(self.row_headers, row_labels):
+            header.config(text=text)
+        for header, text in zip(self.column_headers, column_labels):
+            header.config(text=text)
+
+        finite = [value for row in values for value in row if value == value]
+        low, high = (min(finite), max(finite)) if finite else (0.0, 0.0)
+        span = high - low
+        for i, row in enumerate(values):
+            for j, value in enumerate(row):
+                if value != value:
+                    text, color = "", "white"
+                else:
+                    text, color = format_value(value), heat_color((value - low) / span if span else 0.0)
+                shown = (text, color, (i, j) == highlight)
+                if self._shown.get((i, j)) != shown:
+                    self.cells[i][j].config(text=text, bg=color, relief="solid" if shown[2] else "flat")
+                    self._shown[(i, j)] = shown
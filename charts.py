@@ -0,0 +1,186 @@
+"""
+Chart drawing shared by the Tk views, benchmarks and reports.
+
+Each draw_* function draws onto a matplotlib Axes it is given, so the same
+chart can be shown in a Tk canvas or rendered off-screen with the Agg
+backend. It returns the artists it created; the matching update_* function
+moves those artists to new data in place and returns them again, or returns
+None when the chart has a different number of elements and must be redrawn.
+"""
+
+import math
+
+from matplotlib.ticker import FuncFormatter
+
+
+def allocation_slices(allocation, weights):
+    """
+    Per-ticker weights when the optimizer produced them, otherwise the stock/bond split.
+    Tiny positions are left out.
+    """
+    return {ticker: weight for ticker, weight in weights.items() if weight >= 0.5} or allocation
+
+
+def draw_allocation(ax, slices):
+    artists = ax.pie(list(slices.values()), labels=list(slices.keys()), autopct='%1.1f%%', startangle=90)
+    ax.set_title("Portfolio Allocation")
+    return artists
+
+
+def update_allocation(ax, artists, slices):
+    wedges, labels, percentages = artists
+    if len(wedges) != len(slices):
+        return None
+    total = sum(slices.values())
+    if total <= 0:
+        return None
+
+    # Same geometry as Axes.pie with startangle=90, counter-clockwise
+    theta1 = 90.0
+    for wedge, label, percentage, (name, value) in zip(wedges, labels, percentages, slices.items()):
+        fraction = value / total
+        theta2 = theta1 + 360 * fraction
+        wedge.set_theta1(theta1)
+        wedge.set_theta2(theta2)
+        middle = math.radians((theta1 + theta2) / 2)
+        x, y = math.cos(middle), math.sin(middle)
+        label.set_text(name)
+        label.set_position((1.1 * x, 1.1 * y))
+        label.set_horizontalalignment("left" if x > 0 else "right")
+        percentage.set_text(f"{fraction * 100:.1f}%")
+        percentage.set_position((0.6 * x, 0.6 * y))
+        theta1 = theta2
+    return artists
+
+
+def draw_goal_progress(ax, goal_value, current_value):
+    bars = ax.bar(["Goal", "Current Value"], [goal_value, current_value], color=["green", "blue"])
+    ax.set_title("Progress Toward Investment Goal", fontsize=14)
+    ax.set_ylabel("Value ($)", fontsize=12)
+
+    texts = []
+    for bar, value in zip(bars, [goal_value, current_value]):
+        texts.append(ax.text(
+            bar.get_x() + bar.get_width() / 2,
+            bar.get_height() / 2,
+            f"${int(value):,}",
+            ha="center",
+            va="center",
+            fontsize=12,
+            color="white" if value > goal_value * 0.7 else "black"
+        ))
+
+    ax.yaxis.set_major_formatter(FuncFormatter(lambda x, _: f"${int(x):,}"))
+    return bars, texts
+
+
+def update_goal_progress(ax, artists, goal_value, current_value):
+    bars, texts = artists
+    for bar, text, value in zip(bars, texts, [goal_value, current_value]):
+        bar.set_height(value)
+        text.set_y(value / 2)
+        text.set_text(f"${int(value):,}")
+        text.set_color("white" if value > goal_value * 0.7 else "black")
+    ax.relim()
+    ax.autoscale_view()
+    return artists
+
+
+def return_stats(prices):
+    """
+    Frame with the mean and std of daily returns per column of a price panel.
+    """
+    return prices.pct_change(fill_method=None).agg(["mean", "std"]).T
+
+
+def risk_return_rows(stats):
+    """
+    (ticker, mean daily return, daily volatility) per row of return_stats, best return first.
+    """
+    rows = list(zip(stats.index, stats["mean"], stats["std"]))
+    rows.sort(key=lambda x: x[1], reverse=True)
+    return rows
+
+
+def draw_risk_return(ax, rows):
+    tickers = [data[0] for data in rows]
+    returns = [data[1] for data in rows]
+    volatilities = [data[2] for data in rows]
+
+    # Create horizontal bar chart
+    bar_width = 0.4
+    x_positions = range(len(tickers))
+
+    return_bars = ax.barh(x_positions, returns, height=bar_width, label="Return", color="blue")
+    volatility_bars = ax.barh(x_positions, volatilities, height=bar_width, label="Volatility (Risk)", color="orange", alpha=0.7)
+
+    ax.set_yticks(x_positions)
+    ax.set_yticklabels(tickers)
+    ax.set_title("Risk vs Return for Selected Stocks", fontsize=14)
+    ax.set_xlabel("Value")
+
+    # Format X-axis to show percentages
+    ax.xaxis.set_major_formatter(FuncFormatter(lambda x, _: f"{x * 100:.1f}%"))
+    ax.legend()
+    return return_bars, volatility_bars
+
+
+def update_risk_return(ax, artists, rows):
+    return_bars, volatility_bars = artists
+    if len(return_bars) != len(rows):
+        return None
+    for return_bar, volatility_bar, (_, mean, std) in zip(return_bars, volatility_bars, rows):
+        return_bar.set_width(mean)
+        volatility_bar.set_width(std)
+    ax.set_yticklabels([data[0] for data in rows])
+    ax.relim()
+    ax.autoscale_view()
+    return artists
+
+
+def factor_exposure_rows(fit):
+    """
+    (ticker, market beta, annualized alpha) per ticker of a FactorFit, highest beta first.
+    """
+    rows = [(ticker, row["mktrf"], row["alpha"]) for ticker, row in ((ticker, fit.row(ticker)) for ticker in fit.tickers)
+            if row["mktrf"] == row["mktrf"]]
+    rows.sort(key=lambda x: x[1], reverse=True)
+    return rows
+
+
+def draw_factor_exposure(ax, rows):
+    tickers = [data[0] for data in rows]
+    positions = range(len(tickers))
+    beta_bars = ax.barh(positions, [data[1] for data in rows], height=0.4, label="Market Beta", color="purple")
+    alpha_bars = ax.barh([p + 0.4 for p in positions], [data[2] for data in rows], height=0.4,
+                         label="Alpha (annual)", color="teal")
+    ax.axvline(1.0, color="gray", linestyle="--", linewidth=1)
+    ax.set_yticks([p + 0.2 for p in positions])
+    ax.set_yticklabels(tickers)
+    ax.set_title("Fama-French Factor Exposure", fontsize=14)
+    ax.legend()
+    return beta_bars, alpha_bars
+
+
+def update_factor_exposure(ax, artists, rows):
+    beta_bars, alpha_bars = artists
+    if len(beta_bars) != len(rows):
+        return None
+    for beta_bar, alpha_bar, (_, beta, alpha) in zip(beta_bars, alpha_bars, rows):
+        beta_bar.set_width(beta)
+        alpha_bar.set_width(alpha)
+    ax.set_yticklabels([data[0] for data in rows])
+    ax.relim()
+    ax.autoscale_view()
+    return artists
+
+
+def draw_summary(ax, lines):
+    ax.axis("off")
+    ax.set_title("Summary", fontsize=14)
+    return ax.text(0, 1, "\n".join(lines), transform=ax.transAxes, va="top", ha="left", fontsize=10, linespacing=1.6)
+
+
+def update_summary(ax, artist, lines):
+    artist.set_text("\n".join(lines))
+    return artist
@@ -0,0 +1,92 @@
+"""
+Lazily opened, reusable WRDS connections.
+"""
+
+import threading
+from contextlib import contextmanager
+
+
+def connect_wrds():
+    """
+    Open a real WRDS connection. wrds is imported here so startup doesn't pay for it.
+    """
+    import wrds
+    return wrds.Connection()
+
+
+class ConnectionPool:
+    """
+    Pool of up to max_size connections created by factory.
+
+    Nothing is opened until the first connection() call. Connections are
+    returned to the pool after use and reused by later calls; a connection
+    whose block raised is closed and replaced on demand.
+    """
+
+    def __init__(self, factory=connect_wrds, max_size=2):
+        self.factory = factory
+        self.max_size = max_size
+        self._idle = []
+        self._opened = 0
+        self._generation = 0  # Increased by close(); connections from an older generation are not reused
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def connection(self):
+        generation = self._generation
+        conn = self._acquire()
+        try:
+            yield conn
+        except Exception:
+            self._discard(conn)
+            raise
+        self._release(conn, generation)
+
+    def close(self):
+        """
+        Close all idle connections. Connections in use are closed when released.
+        """
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._opened -= len(idle)
+            self._generation += 1
+            self._cond.notify_all()
+        for conn in idle:
+            _close_quietly(conn)
+
+    def _acquire(self):
+        with self._cond:
+            while not self._idle and self._opened >= self.max_size:
+                self._cond.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._opened += 1
+        try:
+            return self.factory()
+        except Exception:
+            with self._cond:
+                self._opened -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, conn, generation):
+        with self._cond:
+            if generation == self._generation:
+                self._idle.append(conn)
+                self._cond.notify()
+                return
+        # Taken before close(): close it now instead of returning it to the pool
+        self._discard(conn)
+
+    def _discard(self, conn):
+        _close_quietly(conn)
+        with self._cond:
+            self._opened -= 1
+            self._cond.notify()
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
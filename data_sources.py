@@ -0,0 +1,121 @@
+"""
+Shared access to SmartInvest's data: prices, Fama-French factors and WRDS connections.
+
+The stores and connections are created on first use, so importing this module
+is cheap. The GUI, the batch evaluator and other entry points all go through
+the fetch_* functions here.
+"""
+
+import os
+import threading
+
+from connections import ConnectionPool, connect_wrds
+
+
+DEFAULT_START = "2020-01-01"
+DEFAULT_END = "2024-11-01"
+
+# WRDS connections, opened on first factor query and reused afterwards
+wrds_pool = ConnectionPool(connect_wrds, max_size=2)
+
+# Local price and factor stores; only date ranges missing on disk are downloaded.
+# Both are created on first use by get_price_cache and get_factor_store.
+price_cache = None
+factor_store = None
+screening_index = None  # Created on first use by get_screening_index
+offline_seed = None  # Set by use_offline_data
+_stores_lock = threading.Lock()
+
+
+def use_offline_data(seed=0):
+    """
+    Serve prices and factors from seeded synthetic stand-ins instead of Yahoo Finance and WRDS.
+    Offline data is kept in its own folders so it never mixes with real cached data.
+    """
+    global wrds_pool, offline_seed
+
+    def connect_synthetic():
+        from synthetic import SyntheticWRDS
+        return SyntheticWRDS(seed)
+
+    offline_seed = seed
+    wrds_pool = ConnectionPool(connect_synthetic, max_size=1)
+
+
+def get_price_cache():
+    global price_cache
+    with _stores_lock:
+        if price_cache is None:
+            from price_cache import DEFAULT_CACHE_DIR
+            price_cache = open_price_cache(_offline_dir("prices") if offline_seed is not None else DEFAULT_CACHE_DIR)
+        return price_cache
+
+
+def open_price_cache(cache_dir, **limits):
+    """
+    A price store in cache_dir with its own size limits (see PriceCache),
+    downloading from the same source as the shared one.
+    """
+    from price_cache import PriceCache
+    if offline_seed is not None:
+        from synthetic import SyntheticPriceSource
+        return PriceCache(cache_dir=cache_dir, downloader=SyntheticPriceSource(offline_seed), **limits)
+    return PriceCache(cache_dir=cache_dir, **limits)
+
+
+def get_factor_store():
+    global factor_store
+    with _stores_lock:
+        if factor_store is None:
+            from factor_store import FactorStore
+            if offline_seed is not None:
+                factor_store = FactorStore(wrds_pool, store_dir=_offline_dir("factors"))
+            else:
+                factor_store = FactorStore(wrds_pool)
+        return factor_store
+
+
+def get_screening_index():
+    global screening_index
+    with _stores_lock:
+        if screening_index is None:
+            from screening import ScreeningIndex
+            if offline_seed is not None:
+                screening_index = ScreeningIndex(_offline_dir("screen"))
+            else:
+                screening_index = ScreeningIndex()
+        return screening_index
+
+
+def _offline_dir(name):
+    return os.path.join(os.path.expanduser("~"), ".smartinvest", "offline", name)
+
+
+# Data fetching
+def fetch_data(ticker, start=DEFAULT_START, end=DEFAULT_END):
+    return get_price_cache().get(ticker, start, end)
+
+
+def fetch_many(tickers, start=DEFAULT_START, end=DEFAULT_END):
+    """
+    Fetch several tickers in one batched request.
+    Returns a date-aligned price panel and the list of tickers with no data.
+    """
+    return get_price_cache().get_many(tickers, start, end)
+
+
+def fetch_fama_french(start=DEFAULT_START, end=DEFAULT_END):
+    return get_factor_store().get(start, end)
+
+
+def open_quote_feed(prices, seed=None):
+    """
+    Quote feed for the live mode, starting from a dict of ticker to last price.
+    Only the simulated feed exists so far; a streaming provider would plug in here.
+    """
+    from live_quotes import SimulatedQuoteFeed
+    return SimulatedQuoteFeed(prices, seed=offline_seed if seed is None else seed)
+
+
+def close_connections():
+    wrds_pool.close()
@@ -0,0 +1,285 @@
+"""
+Portfolio engine for SmartInvest.
+
+Everything here is free of Tk and of module-level state: functions take a
+profile and data providers and return results, so the same logic runs in the
+GUI, in worker processes and in batch jobs.
+"""
+
+from dataclasses import dataclass, field
+
+from instrumentation import instrument
+
+
+STARTING_VALUE = 100000  # Initial investment the projection starts from
+SIMULATED_PATHS = 20000  # Monte Carlo paths per interactive calculation
+
+DEFAULT_GOALS = {
+    "House": 300000,
+    "Retirement": 1000000,
+    "Business": 500000,
+    "Vacation": 20000,
+    "College": 100000,
+}
+
+# Stock recommendations by risk tolerance
+STOCK_POOL = {
+    "Low": ["KO", "JNJ", "WMT", "HD", "PG"],
+    "Medium": ["AAPL", "MSFT", "GOOGL", "AMZN", "NVDA"],
+    "High": ["TSLA", "PLTR", "GME", "AMC", "COIN"],
+}
+
+# Goal-specific stocks
+GOAL_SPECIFIC_STOCKS = {
+    "House": ["HD", "LOW", "TOL"],
+    "Retirement": ["VTI", "VOO", "SPY"],
+    "Business": ["CRM", "ADBE", "MSFT"],
+    "Vacation": ["DAL", "BKNG", "ABNB"],
+    "College": ["SCHD", "QQQ", "VOO"],
+}
+
+
+@dataclass
+class Profile:
+    """
+    One client's inputs.
+    """
+    risk_tolerance: str = "Medium"
+    goal_type: str = "Retirement"
+    goal_value: float = 100000
+    time_horizon: int = 10
+    tickers: list = field(default_factory=list)
+
+
+@dataclass
+class PortfolioResult:
+    """
+    Outcome of evaluating a profile.
+    """
+    allocation: dict
+    current_value: float
+    goal_value: float
+    monthly_contribution: float
+    weights: dict = field(default_factory=dict)  # Per-ticker allocation in percent
+    failed_tickers: list = field(default_factory=list)
+    simulation: object = None  # montecarlo.SimulationResult, when simulated
+    factor_fit: object = None  # factor_model.FactorFit of the stocks and BND
+    risk: object = None  # risk_metrics.RiskMetrics of the stocks, BND and "Portfolio"
+    panel: object = None  # ReturnsPanel the result was computed from
+
+    @property
+    def goal_probability(self):
+        return self.simulation.probability if self.simulation is not None else None
+
+
+def default_goal(goal_type):
+    return DEFAULT_GOALS.get(goal_type, 100000)
+
+
+@instrument("engine.calculate_performance")
+def calculate_performance(panel, weights):
+    """
+    Weighted mean daily return over the risk-free rate of the same window.
+    panel is a ReturnsPanel with factors; weights maps tickers of the panel
+    to their allocation in percent.
+    """
+    mean_returns = panel.mean()
+    weighted_returns = sum(weight * mean_returns[panel.index(ticker)] for ticker, weight in weights.items())
+    avg_rf = panel.rf_mean()
+    portfolio_return = weighted_returns - avg_rf
+    return portfolio_return
+
+
+def calculate_monthly_contribution(goal_value, current_value, time_horizon, annual_return=0.0):
+    """
+    Calculate the monthly contribution needed to reach the goal value within the given time horizon.
+
+    current_value is the value projected for the end of the horizon. Contributions
+    are paid at the end of each month and grow at annual_return, compounded monthly,
+    so the shortfall is divided by the future value of a 1-dollar annuity; with
+    annual_return 0 that is the number of months. Arguments may be NumPy arrays,
+    which are broadcast against each other.
+    """
+    import numpy as np
+
+    months = np.asarray(time_horizon, dtype="float64") * 12
+    monthly_rate = (1 + np.asarray(annual_return, dtype="float64")) ** (1 / 12) - 1
+    with np.errstate(invalid="ignore", divide="ignore"):
+        annuity = np.where(np.abs(monthly_rate) > 1e-12, ((1 + monthly_rate) ** months - 1) / monthly_rate, months)
+        contribution = np.where(months > 0, np.maximum(np.subtract(goal_value, current_value), 0) / annuity, 0.0)
+    return float(contribution) if contribution.ndim == 0 else contribution
+
+
+def project_value(performance, time_horizon):
+    return (1 + performance) ** time_horizon * STARTING_VALUE  # Compound growth
+
+
+def allocation_returns(panel, weights, stock_shares):
+    """
+    Expected return, as calculate_performance measures it, at each stock share
+    (percent, the rest in BND). The stocks keep their relative weights from
+    weights (percent), or equal weights when none of them is held.
+    """
+    import numpy as np
+
+    mean_returns = panel.mean()
+    stocks = [ticker for ticker in panel.tickers if ticker != "BND"]
+    stock_weights = np.array([weights.get(ticker, 0) for ticker in stocks], dtype="float64")
+    if stock_weights.sum() <= 0:
+        stock_weights = np.ones(len(stocks))
+    stock_mean = stock_weights @ mean_returns[panel.positions(stocks)] / stock_weights.sum()
+    shares = np.asarray(stock_shares, dtype="float64")
+    return shares * stock_mean + (100 - shares) * mean_returns[panel.index("BND")] - panel.rf_mean()
+
+
+@instrument("engine.contribution_grid")
+def contribution_grid(goal_values, time_horizons, annual_returns):
+    """
+    Monthly contributions for every combination of goal, horizon and expected
+    return, as a (goals, horizons, returns) array from one broadcast evaluation.
+    """
+    import numpy as np
+
+    goals = np.asarray(goal_values, dtype="float64")[:, None, None]
+    years = np.asarray(time_horizons, dtype="float64")[None, :, None]
+    returns = np.asarray(annual_returns, dtype="float64")[None, None, :]
+    return calculate_monthly_contribution(goals, project_value(returns, years), years, returns)
+
+
+def recommend_allocation(risk_tolerance):
+    """
+    Fixed stock/bond split for a risk tolerance; optimize_allocation refines it from data.
+    """
+    if risk_tolerance == "Low":
+        return {"Stocks": 30, "Bonds": 70}
+    elif risk_tolerance == "Medium":
+        return {"Stocks": 60, "Bonds": 40}
+    elif risk_tolerance == "High":
+        return {"Stocks": 80, "Bonds": 20}
+
+
+@instrument("engine.optimize_allocation")
+def optimize_allocation(panel, risk_tolerance):
+    """
+    Mean-variance allocation over the tickers of a ReturnsPanel (the stocks and BND).
+    Returns the stock/bond split and per-ticker weights, both in percent.
+    """
+    import optimizer
+
+    _, _, frontier = optimizer.frontier_cache.get(panel)
+    weights = {ticker: 100 * weight for ticker, weight in frontier.pick(risk_tolerance).items()}
+    stocks = round(100 - weights.get("BND", 0))
+    return {"Stocks": stocks, "Bonds": 100 - stocks}, weights
+
+
+def recommend_stocks(risk_tolerance, goal_type, factor_fit=None, index=None):
+    """
+    Suggest stocks based on the risk tolerance and goal type.
+    With a non-empty screening.ScreeningIndex the suggestions are queried from
+    it; otherwise they come from the fixed pools. With a factor_model.FactorFit,
+    suggestions it covers come first, ordered by market beta: lowest first for
+    Low risk tolerance, highest first for High.
+    """
+    if index is not None and len(index):
+        recommendations = index.recommend(risk_tolerance, goal_type)
+    else:
+        recommendations = STOCK_POOL.get(risk_tolerance, []) + GOAL_SPECIFIC_STOCKS.get(goal_type, [])
+    recommendations = list(dict.fromkeys(recommendations))
+    if factor_fit is None or risk_tolerance not in ("Low", "High"):
+        return recommendations
+
+    betas = {ticker: beta for ticker, beta in zip(factor_fit.tickers, factor_fit.betas[:, 0]) if beta == beta}
+    direction = 1 if risk_tolerance == "Low" else -1
+    return sorted(recommendations, key=lambda ticker: (ticker not in betas, direction * betas.get(ticker, 0)))
+
+
+@instrument("engine.evaluate_profile")
+def evaluate_profile(profile, fetch_many, fetch_fama_french, progress=None, simulated_paths=SIMULATED_PATHS, seed=None):
+    """
+    Fetch data for a profile and compute its allocation, projected value and contribution,
+    and simulate the probability of reaching the goal.
+
+    fetch_many(tickers) must return (price panel, failed tickers) and
+    fetch_fama_french() a factor frame with an 'rf' column. progress, if given,
+    is called as progress(stage, step, total) before each stage. Pass
+    simulated_paths=0 to skip the simulation.
+    """
+    from returns_panel import ReturnsPanel
+
+    progress = progress or (lambda stage, step, total: None)
+    stages = 4 if simulated_paths else 3
+
+    # Fetch stock and bond data in one batched request
+    progress("Downloading prices", 1, stages)
+    prices, failed = fetch_many(profile.tickers + ["BND"])
+
+    tickers = [ticker for ticker in profile.tickers if ticker in prices.columns and ticker != "BND"]
+    if not tickers:
+        raise ValueError("No valid stock data found.")
+    if "BND" not in prices.columns:
+        raise ValueError("No bond data found for BND.")
+
+    progress("Querying Fama-French factors", 2, stages)
+    ff_data = fetch_fama_french()
+
+    # Stocks, BND and factors joined once on the price calendar
+    panel = ReturnsPanel.from_prices(prices[sorted(tickers + ["BND"])], ff_data)
+    return evaluate_panel(profile, panel, failed, lambda stage, step, total: progress(stage, step + 2, stages),
+                          simulated_paths, seed)
+
+
+def evaluate_panel(profile, panel, failed=(), progress=None, simulated_paths=SIMULATED_PATHS, seed=None):
+    """
+    Allocation, projection, contribution, simulation, factor fit and risk of a
+    profile from a ReturnsPanel (with factors) of its stocks and BND.
+    """
+    import factor_model
+    import risk_metrics
+
+    progress = progress or (lambda stage, step, total: None)
+    stages = 2 if simulated_paths else 1
+
+    # Calculate performance
+    progress("Calculating performance", 1, stages)
+    allocation, weights = optimize_allocation(panel, profile.risk_tolerance)
+    performance = calculate_performance(panel, weights)
+    factor_fit = factor_model.fit_factors(panel)
+    risk = risk_metrics.compute_risk(panel, [weights.get(ticker, 0) / 100 for ticker in panel.tickers])
+    current_value = project_value(performance, profile.time_horizon)
+    monthly_contribution = calculate_monthly_contribution(profile.goal_value, current_value, profile.time_horizon,
+                                                          performance)
+
+    simulation = None
+    if simulated_paths:
+        progress("Simulating outcomes", 2, stages)
+        simulation = simulate_profile(panel, weights, profile.goal_value, profile.time_horizon, monthly_contribution,
+                                      simulated_paths, seed)
+
+    return PortfolioResult(
+        allocation=allocation,
+        current_value=current_value,
+        goal_value=profile.goal_value,
+        monthly_contribution=monthly_contribution,
+        weights=weights,
+        failed_tickers=list(failed),
+        simulation=simulation,
+        factor_fit=factor_fit,
+        risk=risk,
+        panel=panel,
+    )
+
+
+def simulate_profile(panel, weights, goal_value, time_horizon, monthly_contribution, paths=SIMULATED_PATHS, seed=None):
+    """
+    Monte Carlo projection of a portfolio with weights (percent) over the tickers of panel.
+    """
+    import montecarlo
+    import optimizer
+
+    mean, cov, frontier = optimizer.frontier_cache.get(panel)
+    return montecarlo.simulate_goal(
+        mean * montecarlo.TRADING_DAYS_PER_MONTH, cov * montecarlo.TRADING_DAYS_PER_MONTH,
+        [weights[ticker] / 100 for ticker in frontier.tickers], goal_value,
+        time_horizon, initial_value=STARTING_VALUE, monthly_contribution=monthly_contribution,
+        paths=paths, seed=seed,
+    )
@@ -0,0 +1,160 @@
+"""
+Fama-French three-factor regressions for every ticker of a ReturnsPanel at once.
+
+Each ticker's excess daily return is regressed on mktrf, smb and hml with an
+intercept. Tickers have data on different days, so instead of a loop of
+least-squares fits the masked normal equations X'X and X'y of all tickers are
+built with a few matrix products and solved as one stacked (tickers, 4, 4)
+system. Rolling windows keep the same sums and add the day entering the
+window and subtract the day leaving it, so each step costs O(tickers).
+
+Factors and rf are the panel's daily fractions, in the units of the returns,
+so betas are unitless and alpha is a daily fraction.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from instrumentation import instrument
+
+
+TERMS = ["alpha", "mktrf", "smb", "hml"]
+TRADING_DAYS_PER_YEAR = 252
+
+
+@dataclass
+class FactorFit:
+    """
+    Per-ticker regression results; coefficients and t_stats have one column per entry of TERMS.
+    """
+    tickers: list
+    coefficients: np.ndarray
+    t_stats: np.ndarray
+    r_squared: np.ndarray
+    observations: np.ndarray
+
+    @property
+    def alpha(self):
+        return self.coefficients[:, 0]
+
+    @property
+    def betas(self):
+        return self.coefficients[:, 1:]
+
+    def row(self, ticker):
+        """
+        Dict of the results of one ticker, with alpha annualized.
+        """
+        i = self.tickers.index(ticker)
+        row = dict(zip(TERMS, self.coefficients[i]))
+        row["alpha"] *= TRADING_DAYS_PER_YEAR
+        row["r_squared"] = self.r_squared[i]
+        row["t_alpha"] = self.t_stats[i, 0]
+        row["observations"] = int(self.observations[i])
+        return row
+
+
+@instrument("factor_model.fit")
+def fit_factors(panel):
+    """
+    FactorFit for every column of a panel that carries factors.
+    """
+    if panel.factors is None:
+        raise ValueError("Panel has no factor data.")
+    design, excess, mask = _regression_inputs(panel.values, panel.mask, panel.factors, panel.rf)
+    m = mask.astype("float64")
+    y = np.where(mask, excess, 0)
+    outer = (design[:, :, None] * design[:, None, :]).reshape(len(design), -1)
+    xtx = (m.T @ outer).reshape(-1, 4, 4)
+    xty = y.T @ design
+    return _solve(panel.tickers, xtx, xty, (y * y).sum(axis=0), y.sum(axis=0), m.sum(axis=0))
+
+
+class RollingFactorFit:
+    """
+    Normal-equation sums over a moving window of days, updated one day at a time.
+
+        rolling = RollingFactorFit(panel.tickers)
+        rolling.add(returns_row, factors_row, rf)
+        rolling.remove(old_returns_row, old_factors_row, old_rf)
+        fit = rolling.fit()
+    """
+
+    def __init__(self, tickers):
+        self.tickers = list(tickers)
+        n = len(self.tickers)
+        self.xtx = np.zeros((n, 16))
+        self.xty = np.zeros((n, 4))
+        self.yty = np.zeros(n)
+        self.y_sum = np.zeros(n)
+        self.count = np.zeros(n)
+
+    def add(self, returns, factors, rf, sign=1.0):
+        """
+        Add one day: returns has one entry per ticker, factors is (mktrf, smb, hml).
+        """
+        returns = np.asarray(returns, dtype="float64")
+        design, excess, mask = _regression_inputs(returns[None], ~np.isnan(returns[None]),
+                                                  np.asarray(factors, dtype="float64")[None], np.asarray([rf]))
+        x, y, m = design[0], np.where(mask[0], excess[0], 0), mask[0]
+        self.xtx[m] += sign * np.outer(x, x).ravel()
+        self.xty += sign * y[:, None] * x
+        self.yty += sign * y * y
+        self.y_sum += sign * y
+        self.count += sign * m
+
+    def remove(self, returns, factors, rf):
+        self.add(returns, factors, rf, sign=-1.0)
+
+    def fit(self):
+        return _solve(self.tickers, self.xtx.reshape(-1, 4, 4), self.xty, self.yty, self.y_sum, self.count)
+
+
+def rolling_factor_fits(panel, window, step=21):
+    """
+    Yield (date, FactorFit) for windows of window trading days, every step days.
+    """
+    if panel.factors is None:
+        raise ValueError("Panel has no factor data.")
+    rolling = RollingFactorFit(panel.tickers)
+    for day in range(len(panel)):
+        rolling.add(panel.values[day], panel.factors[day], panel.rf[day])
+        if day >= window:
+            old = day - window
+            rolling.remove(panel.values[old], panel.factors[old], panel.rf[old])
+        if day >= window - 1 and (day - window + 1) % step == 0:
+            yield panel.dates[day], rolling.fit()
+
+
+def _regression_inputs(values, mask, factors, rf):
+    """
+    Design matrix (days, 4) with an intercept, excess returns and the mask of usable entries.
+    Days with a missing factor are left out for every ticker.
+    """
+    factors = np.asarray(factors, dtype="float64")
+    rf = np.asarray(rf, dtype="float64")
+    complete = ~np.isnan(factors).any(axis=1) & ~np.isnan(rf)
+    design = np.column_stack([np.ones(len(factors)), np.where(complete[:, None], factors, 0)])
+    excess = values - np.where(complete, rf, 0)[:, None]
+    return design, excess, mask & complete[:, None]
+
+
+def _solve(tickers, xtx, xty, yty, y_sum, count):
+    inverse = np.linalg.pinv(xtx)
+    coefficients = np.einsum("nij,nj->ni", inverse, xty)
+    residual = yty - 2 * np.einsum("ni,ni->n", coefficients, xty) + np.einsum("ni,nij,nj->n", coefficients, xtx, coefficients)
+    residual = np.maximum(residual, 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        variance = residual / (count - 4)
+        standard_errors = np.sqrt(variance[:, None] * np.diagonal(inverse, axis1=1, axis2=2))
+        t_stats = coefficients / standard_errors
+        total = yty - y_sum * y_sum / count
+        r_squared = 1 - residual / total
+
+    # Too few days to estimate four terms
+    too_few = count <= 4
+    coefficients[too_few] = np.nan
+    t_stats[too_few] = np.nan
+    r_squared[too_few] = np.nan
+    return FactorFit(list(tickers), coefficients, t_stats, r_squared, count.astype(np.int64))
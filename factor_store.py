@@ -0,0 +1,143 @@
+"""
+Local store for the Fama-French daily factors.
+
+Only the factor columns and the date range that are not stored yet are queried
+from WRDS.  The factors are kept as two .npy files (dates and a float matrix)
+that are memory-mapped on read, so a run over a stored window does no remote
+query and reads only the rows it needs.
+"""
+
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+import instrumentation
+
+
+FACTOR_COLUMNS = ["mktrf", "smb", "hml", "rf"]
+DEFAULT_FACTOR_DIR = os.environ.get(
+    "SMARTINVEST_FACTOR_DIR",
+    os.path.join(os.path.expanduser("~"), ".smartinvest", "factors"),
+)
+# Fama-French publishes with a lag; dates older than this are treated as final
+PUBLICATION_LAG = pd.Timedelta(days=90)
+
+FACTOR_QUERY = (
+    "SELECT date, {columns} FROM ff.factors_daily "
+    "WHERE date >= %(start)s AND date < %(end)s ORDER BY date"
+)
+
+
+class FactorStore:
+    """
+    Date-bounded Fama-French factor store.
+
+    pool is a connections.ConnectionPool; a connection is only taken from it
+    when a query is needed. Connections must provide a wrds-style
+    raw_sql(sql, params=..., date_cols=...) method.
+    """
+
+    def __init__(self, pool, store_dir=DEFAULT_FACTOR_DIR):
+        self.pool = pool
+        self.store_dir = store_dir
+        os.makedirs(store_dir, exist_ok=True)
+        self._meta_path = os.path.join(store_dir, "meta.json")
+        self._dates_path = os.path.join(store_dir, "dates.npy")
+        self._values_path = os.path.join(store_dir, "values.npy")
+        self._meta = self._load_meta()
+        self._lock = threading.Lock()
+
+    def get(self, start, end):
+        """
+        Return the factors for [start, end) as a DataFrame indexed by date.
+        """
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        with self._lock, instrumentation.stage("factor_store.get"):
+            for gap_start, gap_end in self._missing_ranges(start, end):
+                self._fill(gap_start, gap_end)
+            dates, values = self._load_arrays()
+
+        lo = np.searchsorted(dates, np.datetime64(start, "D"), side="left")
+        hi = np.searchsorted(dates, np.datetime64(end, "D"), side="left")
+        return pd.DataFrame(values[lo:hi], index=pd.DatetimeIndex(dates[lo:hi], name="date"),
+                            columns=self._meta["columns"])
+
+    def _missing_ranges(self, start, end):
+        if self._meta is None:
+            return [(start, end)]
+        covered_start, covered_end = pd.Timestamp(self._meta["start"]), pd.Timestamp(self._meta["end"])
+        ranges = []
+        if start < covered_start:
+            ranges.append((start, covered_start))
+        if end > covered_end:
+            ranges.append((covered_end, end))
+        return ranges
+
+    def _fill(self, start, end):
+        """
+        Query [start, end) from WRDS and merge it into the stored arrays.
+        """
+        sql = FACTOR_QUERY.format(columns=", ".join(FACTOR_COLUMNS))
+        params = {"start": start.strftime("%Y-%m-%d"), "end": end.strftime("%Y-%m-%d")}
+        with instrumentation.stage("wrds.factors_query"), self.pool.connection() as db:
+            fresh = db.raw_sql(sql, params=params, date_cols=["date"])
+            instrumentation.add_bytes(fresh.memory_usage().sum())
+        fresh_dates = pd.to_datetime(fresh["date"]).to_numpy(dtype="datetime64[D]")
+        fresh_values = fresh[FACTOR_COLUMNS].to_numpy(dtype="float64")
+
+        if self._meta is None:
+            dates, values = fresh_dates, fresh_values
+            covered_start, covered_end = start, end
+        else:
+            stored_dates, stored_values = self._load_arrays()
+            dates = np.concatenate([stored_dates, fresh_dates])
+            values = np.concatenate([stored_values, fresh_values])
+            dates, unique = np.unique(dates, return_index=True)
+            values = values[unique]
+            covered_start = min(pd.Timestamp(self._meta["start"]), start)
+            covered_end = max(pd.Timestamp(self._meta["end"]), end)
+
+        # Recent days may not be published yet; only count them as covered once they have arrived
+        final_until = pd.Timestamp.today().normalize() - PUBLICATION_LAG
+        if covered_end > final_until:
+            last_received = pd.Timestamp(dates[-1]) + pd.Timedelta(days=1) if len(dates) else covered_start
+            covered_end = max(min(covered_end, final_until), last_received)
+
+        self._save_arrays(dates, values)
+        self._meta = {
+            "start": covered_start.strftime("%Y-%m-%d"),
+            "end": max(covered_end, covered_start).strftime("%Y-%m-%d"),
+            "columns": FACTOR_COLUMNS,
+        }
+        _atomic_write_json(self._meta_path, self._meta)
+
+    def _load_arrays(self):
+        dates = np.load(self._dates_path, mmap_mode="r")
+        values = np.load(self._values_path, mmap_mode="r")
+        return dates, values
+
+    def _save_arrays(self, dates, values):
+        for path, array in ((self._dates_path, dates), (self._values_path, values)):
+            tmp_path = path + ".tmp.npy"
+            np.save(tmp_path, np.ascontiguousarray(array))
+            os.replace(tmp_path, path)
+
+    def _load_meta(self):
+        try:
+            with open(self._meta_path) as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if meta.get("columns") != FACTOR_COLUMNS or not os.path.exists(self._values_path):
+            return None
+        return meta
+
+
+def _atomic_write_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,188 @@
+"""
+Live-quote mode: portfolio value, allocation drift and goal progress per tick.
+
+A quote feed calls on_tick(ticker, price) from its own thread. LivePortfolio
+keeps the value of each holding and running totals, so a tick changes one
+holding and adjusts the totals by the difference: O(1) work however many
+tickers are held. The Tk side never sees individual ticks; LiveUpdater reads
+the totals once per frame with root.after and redraws only when something
+changed, so hundreds of ticks per second cost the event loop one callback
+per frame.
+
+Feeds provide subscribe(on_tick) and close(). SimulatedQuoteFeed is a local
+random-walk feed for testing and offline use.
+"""
+
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+
+FRAME_MS = 100  # Redraw interval of the live view; 10 frames per second
+RESYNC_TICKS = 100000  # Ticks between exact recomputations of the running totals
+BOND = "BND"
+
+
+@dataclass
+class LiveState:
+    """
+    Totals at one moment; shares are fractions of the portfolio value.
+    """
+    value: float
+    stock_share: float
+    target_stock_share: float
+    goal_progress: float
+    ticks: int
+
+    @property
+    def drift(self):
+        return self.stock_share - self.target_stock_share
+
+
+class LivePortfolio:
+    """
+    Holdings (shares per ticker) valued at the latest quote of each ticker.
+    targets maps tickers to target weights as fractions.
+    """
+
+    def __init__(self, shares, prices, targets, goal_value):
+        self.shares = dict(shares)
+        self.prices = {ticker: float(prices[ticker]) for ticker in self.shares}
+        self.targets = dict(targets)
+        self.goal_value = goal_value
+        self.target_stock_share = sum(weight for ticker, weight in self.targets.items() if ticker != BOND)
+        self.ticks = 0
+        self._lock = threading.Lock()
+        self._resync()
+
+    @classmethod
+    def from_weights(cls, value, weights, prices, goal_value):
+        """
+        Holdings worth value split by weights (percent, as the engine returns them) at prices.
+        """
+        targets = {ticker: weight / 100 for ticker, weight in weights.items() if weight > 0 and prices.get(ticker)}
+        shares = {ticker: value * target / prices[ticker] for ticker, target in targets.items()}
+        return cls(shares, prices, targets, goal_value)
+
+    def apply(self, ticker, price):
+        """
+        Revalue one holding at a new quote; quotes for tickers not held are ignored.
+        """
+        shares = self.shares.get(ticker)
+        if shares is None:
+            return
+        with self._lock:
+            old = self.holdings[ticker]
+            new = shares * price
+            self.holdings[ticker] = new
+            self.prices[ticker] = price
+            self.value += new - old
+            if ticker != BOND:
+                self.stock_value += new - old
+            self.ticks += 1
+            if self.ticks % RESYNC_TICKS == 0:
+                self._resync()  # Bound the rounding error of the running sums
+
+    def state(self):
+        with self._lock:
+            value, stock_value, ticks = self.value, self.stock_value, self.ticks
+        return LiveState(
+            value=value,
+            stock_share=stock_value / value if value else 0.0,
+            target_stock_share=self.target_stock_share,
+            goal_progress=value / self.goal_value if self.goal_value else 0.0,
+            ticks=ticks,
+        )
+
+    def weights(self):
+        """
+        Current weight of each holding as a fraction; O(holdings), for redraws.
+        """
+        with self._lock:
+            holdings, value = dict(self.holdings), self.value
+        return {ticker: holding / value for ticker, holding in holdings.items()} if value else {}
+
+    def _resync(self):
+        self.holdings = {ticker: shares * self.prices[ticker] for ticker, shares in self.shares.items()}
+        self.value = sum(self.holdings.values())
+        self.stock_value = sum(holding for ticker, holding in self.holdings.items() if ticker != BOND)
+
+
+class SimulatedQuoteFeed:
+    """
+    Random-walk quotes for prices' tickers at about ticks_per_second in total.
+    volatility is the standard deviation of the log return of one tick.
+    """
+
+    def __init__(self, prices, ticks_per_second=500, volatility=0.0005, seed=None, batch_ms=10):
+        self.prices = {ticker: float(price) for ticker, price in prices.items()}
+        self.ticks_per_second = ticks_per_second
+        self.volatility = volatility
+        self.batch_ms = batch_ms
+        self._random = random.Random(seed)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, on_tick):
+        self._thread = threading.Thread(target=self._run, args=(on_tick,), daemon=True, name="quote-feed")
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, on_tick):
+        tickers = list(self.prices)
+        per_batch = self.ticks_per_second * self.batch_ms / 1000
+        owed = 0.0
+        next_batch = time.perf_counter()
+        while not self._stop.is_set() and tickers:
+            owed += per_batch
+            for _ in range(int(owed)):
+                ticker = self._random.choice(tickers)
+                price = self.prices[ticker] * math.exp(self._random.gauss(0, self.volatility))
+                self.prices[ticker] = price
+                on_tick(ticker, price)
+            owed -= int(owed)
+            next_batch += self.batch_ms / 1000
+            self._stop.wait(max(next_batch - time.perf_counter(), 0))
+
+
+class LiveUpdater:
+    """
+    Calls render(state) on the Tk main loop at most once per frame, and only
+    when ticks arrived since the last frame.
+    """
+
+    def __init__(self, root, portfolio, render, frame_ms=FRAME_MS):
+        self.root = root
+        self.portfolio = portfolio
+        self.render = render
+        self.frame_ms = frame_ms
+        self.frames = 0  # Frames rendered, for monitoring
+        self._rendered_ticks = None
+        self._after_id = None
+
+    @property
+    def running(self):
+        return self._after_id is not None
+
+    def start(self):
+        self._after_id = self.root.after(0, self._frame)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _frame(self):
+        state = self.portfolio.state()
+        if state.ticks != self._rendered_ticks:
+            self._rendered_ticks = state.ticks
+            self.frames += 1
+            self.render(state)
+        self._after_id = self.root.after(self.frame_ms, self._frame)
@@ -0,0 +1,103 @@
+"""
+Monte Carlo projection of a portfolio towards its goal.
+
+Monthly asset returns are drawn from a multivariate normal with the mean and
+covariance of the selected stocks and BND. The portfolio is rebalanced to its
+target weights every month, so its monthly return w·R is itself normal with
+mean w·mu and variance w'Σw; paths are drawn from that distribution directly,
+which gives the same result as drawing every asset and projecting, at a
+fraction of the memory. Every block of BLOCK_PATHS paths has its own
+generator spawned from one seed, and paths are simulated in memory-bounded
+chunks of whole blocks, so results do not depend on the chunk size or on how
+many processes are used.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from instrumentation import instrument
+
+
+TRADING_DAYS_PER_MONTH = 21
+PERCENTILES = (5, 25, 50, 75, 95)
+DEFAULT_PATHS = 100000
+DEFAULT_CHUNK_BYTES = 32 * 1024 * 1024  # Working memory per chunk
+BLOCK_PATHS = 1024  # Paths drawn from one generator; a chunk holds at least one block
+
+
+@dataclass
+class SimulationResult:
+    """
+    Goal probability and yearly percentile bands of portfolio value.
+    bands maps each percentile to an array with one value per year.
+    """
+    probability: float
+    years: np.ndarray
+    bands: dict
+    paths: int
+
+
+@instrument("montecarlo.simulate_goal")
+def simulate_goal(mean, cov, weights, goal_value, years, initial_value=100000, monthly_contribution=0,
+                  paths=DEFAULT_PATHS, seed=None, chunk_bytes=DEFAULT_CHUNK_BYTES, workers=1):
+    """
+    Simulate paths of monthly portfolio value and return a SimulationResult.
+
+    mean and cov are monthly asset moments, weights the portfolio weights in
+    the same order. monthly_contribution is added at the end of every month.
+    workers > 1 spreads the chunks over a process pool.
+    """
+    weights = np.asarray(weights, dtype="float64")
+    mu = float(weights @ np.asarray(mean))
+    sigma = float(np.sqrt(max(weights @ np.asarray(cov) @ weights, 0.0)))
+    months = int(years) * 12
+    if months <= 0:
+        return SimulationResult(float(initial_value >= goal_value), np.arange(0), {p: np.empty(0) for p in PERCENTILES}, 0)
+
+    # Three float64 arrays of (block, months) are alive while a block is simulated
+    blocks = [min(BLOCK_PATHS, paths - start) for start in range(0, paths, BLOCK_PATHS)]
+    seeds = np.random.SeedSequence(seed).spawn(len(blocks))
+    per_chunk = max(1, chunk_bytes // (3 * 8 * months * BLOCK_PATHS))
+    tasks = [(seeds[i:i + per_chunk], blocks[i:i + per_chunk], mu, sigma, months, initial_value, monthly_contribution)
+             for i in range(0, len(blocks), per_chunk)]
+
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            yearly = list(pool.map(_simulate_chunk, *zip(*tasks)))
+    else:
+        yearly = [_simulate_chunk(*task) for task in tasks]
+    yearly = np.concatenate(yearly)
+
+    bands = dict(zip(PERCENTILES, np.percentile(yearly, PERCENTILES, axis=0)))
+    probability = float(np.mean(yearly[:, -1] >= goal_value))
+    return SimulationResult(probability, np.arange(1, months // 12 + 1), bands, paths)
+
+
+def _simulate_chunk(seed_sequences, block_sizes, mu, sigma, months, initial_value, monthly_contribution):
+    """
+    Portfolio value at the end of every year for the paths of a chunk of blocks.
+    """
+    return np.concatenate([
+        _simulate_block(seed_sequence, n_paths, mu, sigma, months, initial_value, monthly_contribution)
+        for seed_sequence, n_paths in zip(seed_sequences, block_sizes)
+    ])
+
+
+def _simulate_block(seed_sequence, n_paths, mu, sigma, months, initial_value, monthly_contribution):
+    rng = np.random.default_rng(seed_sequence)
+    gross = 1 + rng.normal(mu, sigma, size=(n_paths, months))
+    np.maximum(gross, 0.0, out=gross)  # A month can lose at most everything
+
+    # With W_t = W_{t-1} * g_t + c and P_t = g_1 * ... * g_t:
+    # W_t = P_t * (W_0 + c * sum_{s<=t} 1 / P_s)
+    growth = np.cumprod(gross, out=gross, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        contributions = np.cumsum(1 / growth, axis=1)
+        contributions *= monthly_contribution
+        contributions += initial_value
+        values = np.nan_to_num(growth * contributions, nan=0.0, posinf=0.0)
+    # A path that was wiped out restarts from the contributions alone; that case is
+    # vanishingly rare for realistic moments and is counted as zero here.
+    return values[:, 11::12].copy()
@@ -0,0 +1,136 @@
+"""
+Mean-variance allocation for the selected stocks and BND.
+
+The efficient frontier is traced by maximising w·mu - aversion/2 · w'Σw over
+long-only, fully invested weights for a range of risk aversions. Each point
+is solved with accelerated projected gradient, warm-started from the previous
+point, so hundreds of assets stay interactive. The moments and the frontier
+are cached by ticker set and date window and only recomputed when either
+changes.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+from instrumentation import instrument
+
+
+FRONTIER_POINTS = 30
+# Position on the frontier for each risk tolerance, from minimum variance (0) to maximum return (1)
+RISK_TARGETS = {"Low": 0.15, "Medium": 0.45, "High": 0.8}
+
+
+@dataclass
+class Frontier:
+    """
+    Efficient frontier: one row of weights per point, ordered by volatility.
+    """
+    tickers: list
+    weights: np.ndarray
+    returns: np.ndarray
+    volatility: np.ndarray
+
+    def pick(self, risk_tolerance):
+        """
+        Weights of the frontier point matching a risk tolerance, as a dict of ticker -> weight.
+        """
+        position = RISK_TARGETS.get(risk_tolerance, RISK_TARGETS["Medium"])
+        target = self.volatility[0] + position * (self.volatility[-1] - self.volatility[0])
+        point = int(np.argmin(np.abs(self.volatility - target)))
+        return dict(zip(self.tickers, self.weights[point]))
+
+
+def project_simplex(v):
+    """
+    Euclidean projection of v onto {w : w >= 0, sum(w) = 1}.
+    """
+    u = np.sort(v)[::-1]
+    cumulative = np.cumsum(u) - 1
+    index = np.arange(1, len(v) + 1)
+    rho = index[u - cumulative / index > 0][-1]
+    return np.maximum(v - cumulative[rho - 1] / rho, 0)
+
+
+def solve_point(mean, cov, aversion, lipschitz, start, iterations=500, tol=1e-9):
+    """
+    Long-only weights maximising w·mean - aversion/2 · w'·cov·w.
+    """
+    step = 1 / (aversion * lipschitz)
+    w = y = start
+    t = 1.0
+    for _ in range(iterations):
+        w_next = project_simplex(y + step * (mean - aversion * (cov @ y)))
+        if np.max(np.abs(w_next - w)) < tol:
+            return w_next
+        t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        y = w_next + ((t - 1) / t_next) * (w_next - w)
+        w, t = w_next, t_next
+    return w
+
+
+@instrument("optimizer.efficient_frontier")
+def efficient_frontier(tickers, mean, cov, points=FRONTIER_POINTS):
+    """
+    Trace the long-only efficient frontier for the given daily moments.
+    """
+    mean = np.asarray(mean, dtype="float64")
+    cov = np.asarray(cov, dtype="float64")
+    lipschitz = max(np.linalg.eigvalsh(cov)[-1], 1e-12)
+    # Risk aversions around the level where return and variance of a typical asset balance
+    scale = max(np.abs(mean).max(), 1e-12) / max(np.diag(cov).mean(), 1e-12)
+    aversions = scale * np.geomspace(1e3, 1e-2, points)
+
+    w = np.full(len(mean), 1 / len(mean))
+    weights = []
+    for aversion in aversions:
+        w = solve_point(mean, cov, aversion, lipschitz, w)
+        weights.append(w)
+    weights = np.array(weights)
+
+    volatility = np.sqrt(np.maximum(np.einsum("ij,jk,ik->i", weights, cov, weights), 0))
+    order = np.argsort(volatility, kind="stable")
+    return Frontier(list(tickers), weights[order], weights[order] @ mean, volatility[order])
+
+
+class FrontierCache:
+    """
+    Moments and frontiers keyed by ticker set and date window, least recently used first out.
+    """
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, panel):
+        """
+        (mean, cov, frontier) for a ReturnsPanel, computed once per ticker set and window.
+        The arrays and frontier.tickers are in sorted ticker order.
+        """
+        order = sorted(range(len(panel.tickers)), key=panel.tickers.__getitem__)
+        tickers = [panel.tickers[i] for i in order]
+        key = (tuple(tickers), panel.dates[0], panel.dates[-1], len(panel))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        mean = panel.mean()[order]
+        cov = panel.cov(order)
+        entry = (mean, cov, efficient_frontier(tickers, mean, cov))
+
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+
+frontier_cache = FrontierCache()
@@ -0,0 +1,299 @@
+"""
+Local price store used by SmartInvest.
+
+Adjusted close prices are kept on disk, one columnar file per ticker, together
+with the date range that has already been downloaded for it.  A request only
+goes to the network for the part of the range that is not on disk yet, so
+repeated runs over the same window are served from local files.
+"""
+
+import json
+import os
+import pickle
+import threading
+import time
+
+import pandas as pd
+
+import instrumentation
+
+try:
+    import pyarrow  # noqa: F401
+    FILE_FORMAT = "parquet"
+except ImportError:
+    # Parquet needs pyarrow; fall back to pandas' own binary format without it
+    FILE_FORMAT = "pickle"
+
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "SMARTINVEST_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".smartinvest", "prices"),
+)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # Total size of all price files
+DEFAULT_MAX_TICKERS = 2000  # Number of tickers kept on disk
+BATCH_SIZE = 50  # Tickers per yfinance request; yfinance downloads each batch in parallel
+EMPTY_RETRY_SECONDS = 24 * 60 * 60  # Age at which a ticker that returned no data is asked for again
+
+
+def download_adj_close(tickers, start, end):
+    """
+    Download adjusted close prices for several tickers from Yahoo Finance.
+    Returns a dict of ticker -> price series; tickers that failed are left out.
+    """
+    import yfinance as yf  # Imported on first download; it is slow to import
+
+    prices = {}
+    for i in range(0, len(tickers), BATCH_SIZE):
+        batch = tickers[i:i + BATCH_SIZE]
+        with instrumentation.stage("yfinance.download"):
+            data = yf.download(batch, start=start, end=end, auto_adjust=False,
+                               group_by="column", threads=True, progress=False)
+            instrumentation.add_bytes(data.memory_usage().sum())
+        if data.empty:
+            continue
+        adj_close = data["Adj Close"]
+        if isinstance(adj_close, pd.Series):
+            adj_close = adj_close.to_frame(batch[0])
+        for ticker in batch:
+            if ticker in adj_close.columns:
+                series = _as_series(adj_close[ticker], ticker)
+                if not series.empty:
+                    prices[ticker] = series
+    return prices
+
+
+def _has_trading_days(start, end):
+    """
+    Whether [start, end) contains a weekday.
+    """
+    return bool(pd.bdate_range(start, end - pd.Timedelta(days=1)).size) if end > start else False
+
+
+def _as_series(data, ticker):
+    """
+    Normalise a downloaded price column to a float series with a naive date index.
+    """
+    if isinstance(data, pd.DataFrame):
+        data = data.iloc[:, 0] if data.shape[1] else pd.Series(dtype="float64")
+    data = data.dropna()
+    data.index = pd.DatetimeIndex(data.index).tz_localize(None)
+    data.name = ticker
+    return data.astype("float64")
+
+
+class PriceCache:
+    """
+    On-disk price store with incremental range fill and LRU eviction.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES,
+                 max_tickers=DEFAULT_MAX_TICKERS, downloader=download_adj_close):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_tickers = max_tickers
+        self.downloader = downloader
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index_path = os.path.join(cache_dir, "index.json")
+        self._index = self._load_index()
+        # Calculations run on a worker thread while charts may read from the main thread
+        self._lock = threading.RLock()
+
+    def get(self, ticker, start, end):
+        """
+        Return adjusted close prices for ticker in [start, end), fetching only missing dates.
+        """
+        panel, failed = self.get_many([ticker], start, end)
+        if failed:
+            return pd.Series(dtype="float64", name=ticker)
+        return panel[ticker].dropna()
+
+    def get_many(self, tickers, start, end):
+        """
+        Return a date-aligned panel of adjusted close prices for all tickers and
+        the list of tickers with no data.  Tickers missing the same date range
+        are downloaded together in one batched request.
+        """
+        with self._lock, instrumentation.stage("price_cache.get_many"):
+            return self._get_many(list(dict.fromkeys(tickers)), pd.Timestamp(start), pd.Timestamp(end))
+
+    def _get_many(self, tickers, start, end):
+
+        entries, prices = {}, {}
+        missing = {}  # (gap_start, gap_end) -> tickers missing that range
+        now = time.time()
+        for ticker in tickers:
+            entry = self._index.get(ticker)
+            cached = None
+            if entry and entry.get("empty") and now - entry.get("checked", 0) > EMPTY_RETRY_SECONDS:
+                entry = None  # No data the last time; it may have listed or been a passing failure
+            elif entry and not entry.get("empty"):
+                cached = self._read(ticker)
+                if cached is None:
+                    entry = None  # File missing or unreadable; fetch the whole range again
+            entries[ticker], prices[ticker] = entry, cached
+            for gap in self._missing_ranges(entry, start, end):
+                if entry is not None and not _has_trading_days(*gap):
+                    entries[ticker] = self._extend_coverage(entry, *gap)  # A weekend tail; nothing to ask for
+                else:
+                    missing.setdefault(gap, []).append(ticker)
+
+        fetched = set()
+        for (gap_start, gap_end), group in missing.items():
+            fresh = self.downloader(group, gap_start.strftime("%Y-%m-%d"), gap_end.strftime("%Y-%m-%d"))
+            answered = [ticker for ticker in group if fresh.get(ticker) is not None and not fresh[ticker].empty]
+            if not answered:
+                # Nothing for the whole batch looks like a failed or throttled download,
+                # not an answer; leave the gap open so the next call asks again
+                continue
+            for ticker in group:
+                if ticker in answered:
+                    cached = prices[ticker]
+                    prices[ticker] = fresh[ticker] if cached is None else _merge(cached, fresh[ticker])
+                    fetched.add(ticker)
+                # An empty answer next to tickers that got prices (a holiday tail, a delisted
+                # or unknown ticker) counts as checked, so the gap is not requested on every call
+                entries[ticker] = self._extend_coverage(entries[ticker], gap_start, gap_end)
+
+        columns, failed = [], []
+        for ticker in tickers:
+            entry = entries[ticker]
+            if entry is None:
+                failed.append(ticker)
+                continue
+            if ticker in fetched:
+                entry.pop("empty", None)
+                entry["bytes"] = self._write(ticker, prices[ticker])
+            elif prices[ticker] is None and not entry.get("empty"):
+                entry["empty"] = True  # Checked, but no data: remembered without a file
+                entry["checked"] = now
+            entry["last_access"] = now
+            self._index[ticker] = entry
+            window = prices[ticker]
+            if window is None:
+                failed.append(ticker)
+                continue
+            window = window.loc[(window.index >= start) & (window.index < end)]
+            if window.empty:
+                failed.append(ticker)
+            else:
+                columns.append(window)
+
+        if fetched:
+            self._evict(keep=set(tickers))
+        self._save_index()
+
+        panel = pd.concat(columns, axis=1).sort_index() if columns else pd.DataFrame()
+        return panel, failed
+
+    def clear(self):
+        """
+        Remove every cached ticker.
+        """
+        with self._lock:
+            for ticker in list(self._index):
+                self._remove(ticker)
+            self._save_index()
+
+    def total_bytes(self):
+        return sum(entry.get("bytes", 0) for entry in self._index.values())
+
+    # Range bookkeeping
+    def _missing_ranges(self, entry, start, end):
+        """
+        Ranges of [start, end) not covered yet.  Coverage is kept contiguous, so
+        a request past either edge also fills the gap up to that edge.
+        """
+        # Nothing after today exists yet; today itself may still be incomplete.
+        end = min(end, pd.Timestamp.today().normalize())
+        if start >= end:
+            return []
+        if entry is None:
+            return [(start, end)]
+        covered_start, covered_end = pd.Timestamp(entry["start"]), pd.Timestamp(entry["end"])
+        ranges = []
+        if start < covered_start:
+            ranges.append((start, covered_start))
+        if end > covered_end:
+            ranges.append((covered_end, end))
+        return ranges
+
+    @staticmethod
+    def _extend_coverage(entry, start, end):
+        if entry is None:
+            return {"start": start.strftime("%Y-%m-%d"), "end": end.strftime("%Y-%m-%d"), "bytes": 0}
+        entry["start"] = min(pd.Timestamp(entry["start"]), start).strftime("%Y-%m-%d")
+        entry["end"] = max(pd.Timestamp(entry["end"]), end).strftime("%Y-%m-%d")
+        return entry
+
+    # Eviction
+    def _evict(self, keep=()):
+        """
+        Drop least recently used tickers until the store is within its limits.
+        """
+        candidates = sorted(
+            (ticker for ticker in self._index if ticker not in keep),
+            key=lambda ticker: self._index[ticker].get("last_access", 0),
+        )
+        total = self.total_bytes()
+        while candidates and (total > self.max_bytes or len(self._index) > self.max_tickers):
+            ticker = candidates.pop(0)
+            total -= self._index[ticker].get("bytes", 0)
+            self._remove(ticker)
+
+    def _remove(self, ticker):
+        self._index.pop(ticker, None)
+        try:
+            os.remove(self._path(ticker))
+        except FileNotFoundError:
+            pass
+
+    # File I/O
+    def _path(self, ticker):
+        safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in ticker)
+        return os.path.join(self.cache_dir, f"{safe_name}.{FILE_FORMAT}")
+
+    @instrumentation.instrument("price_cache.read")
+    def _read(self, ticker):
+        path = self._path(ticker)
+        try:
+            if FILE_FORMAT == "parquet":
+                frame = pd.read_parquet(path)
+            else:
+                frame = pd.read_pickle(path)
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+            # Missing or unreadable file: forget the entry and refetch
+            self._index.pop(ticker, None)
+            return None
+        return frame["price"].rename(ticker)
+
+    def _write(self, ticker, prices):
+        path = self._path(ticker)
+        frame = prices.rename("price").to_frame()
+        tmp_path = path + ".tmp"
+        if FILE_FORMAT == "parquet":
+            frame.to_parquet(tmp_path)
+        else:
+            frame.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+        return os.path.getsize(path)
+
+    def _load_index(self):
+        try:
+            with open(self._index_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_index(self):
+        tmp_path = self._index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self._index_path)
+
+
+def _merge(cached, fresh):
+    if fresh.empty:
+        return cached
+    combined = pd.concat([cached, fresh])
+    combined = combined[~combined.index.duplicated(keep="last")]
+    return combined.sort_index()
@@ -0,0 +1,146 @@
+"""
+A small reactive computation graph for the dashboard.
+
+Inputs are set from the widgets; every other node is a function of the nodes
+it depends on. Setting an input marks only the nodes downstream of it stale,
+and a stale node is recomputed the next time it is read, so a value nobody
+looks at is never computed. Watchers are callbacks on nodes that views
+display; flush() calls the watchers whose nodes went stale since the last
+flush, which reads (and so recomputes) just those nodes.
+
+    graph = Graph()
+    graph.input("goal_value", 100000)
+    graph.input("current_value", 250000)
+    graph.node("gap", lambda goal, value: max(goal - value, 0), "goal_value", "current_value")
+    graph.watch(show_gap, "gap")
+    graph.set("goal_value", 400000)
+    graph.flush()  # show_gap(150000)
+
+Debouncer coalesces bursts of edits (one per keystroke) into one update.
+"""
+
+from collections import defaultdict
+
+
+class Graph:
+    """
+    Lazily evaluated nodes with dependency tracking.
+    """
+
+    def __init__(self):
+        self._funcs = {}
+        self._deps = {}
+        self._dependents = defaultdict(list)
+        self._values = {}
+        self._stale = set()
+        self._changed = set()  # Nodes invalidated since the last flush
+        self._watchers = []
+        self.computations = 0  # Node evaluations, for monitoring
+
+    def input(self, name, value=None):
+        self._deps[name] = ()
+        self._values[name] = value
+
+    def node(self, name, func, *deps):
+        """
+        Define name as func(*values of deps); deps must already be defined.
+        """
+        for dep in deps:
+            if dep not in self._deps:
+                raise KeyError(f"Unknown dependency {dep!r} of {name!r}")
+            self._dependents[dep].append(name)
+        self._funcs[name] = func
+        self._deps[name] = deps
+        self._stale.add(name)
+
+    def watch(self, callback, *names):
+        """
+        Call callback(*values of names) on flush() when any of names went stale.
+        """
+        self._watchers.append((callback, names))
+
+    def set(self, name, value):
+        """
+        Change an input. Nothing downstream is invalidated when the value is unchanged.
+        """
+        if name in self._funcs:
+            raise KeyError(f"{name!r} is computed, not an input")
+        if _same(self._values.get(name), value):
+            return
+        self._values[name] = value
+        self._changed.add(name)
+        self._invalidate(name)
+
+    def provide(self, name, value):
+        """
+        Store a value of a computed node that is already known (e.g. from a full
+        calculation); it stays valid until an upstream input changes.
+        """
+        self._values[name] = value
+        self._stale.discard(name)
+        self._changed.add(name)
+
+    def get(self, name):
+        if name in self._stale:
+            args = [self.get(dep) for dep in self._deps[name]]
+            self._values[name] = self._funcs[name](*args)
+            self._stale.discard(name)
+            self.computations += 1
+        return self._values[name]
+
+    def stale(self, name):
+        return name in self._stale
+
+    def flush(self):
+        """
+        Run the watchers of the nodes that changed since the last flush.
+        """
+        changed, self._changed = self._changed, set()
+        for callback, names in self._watchers:
+            if changed.intersection(names):
+                callback(*(self.get(name) for name in names))
+
+    def _invalidate(self, name):
+        pending = list(self._dependents[name])
+        while pending:
+            node = pending.pop()
+            if node in self._stale and node in self._changed:
+                continue
+            self._stale.add(node)
+            self._changed.add(node)
+            pending.extend(self._dependents[node])
+
+
+class Debouncer:
+    """
+    Calls func() on the Tk main loop once calls have paused for delay_ms.
+    """
+
+    def __init__(self, root, delay_ms, func):
+        self.root = root
+        self.delay_ms = delay_ms
+        self.func = func
+        self._after_id = None
+
+    def __call__(self, *args):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+        self._after_id = self.root.after(self.delay_ms, self._fire)
+
+    def cancel(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _fire(self):
+        self._after_id = None
+        self.func()
+
+
+def _same(a, b):
+    if a is b:
+        return True
+    try:
+        return bool(a == b)
+    except (TypeError, ValueError):  # e.g. arrays, whose == is elementwise
+        return False
@@ -0,0 +1,211 @@
+"""
+Client reports: the summary page and the allocation, goal progress and
+risk/return charts on one page per client, as PDF or PNG.
+
+    python reports.py profiles.csv reports/ [--format pdf] [--workers 8] [--offline]
+
+The profiles CSV has the columns of batch.py plus an optional goal_type and
+client_id. Pages are drawn off-screen with the Agg backend. Each worker
+process keeps one page figure and moves its artists to the next client's
+data, so no figure is created per client, and all workers read the price
+history from one shared ReturnsPanel (see shared_panel).
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import engine
+import shared_panel
+from batch import parse_tickers
+from returns_panel import ReturnsPanel
+
+
+PAGE_SIZE = (11, 8.5)  # Inches, landscape letter
+DPI = 100  # Resolution of PNG reports
+DEFAULT_PATHS = 2000  # Monte Carlo paths per client; enough for a printed percentage
+CHUNK_CLIENTS = 250  # Clients per task handed to a worker
+
+_page = None  # ReportPage of this process, created on first use
+
+
+class ReportPage:
+    """
+    One Agg figure with the summary and the three charts, redrawn in place for each client.
+    """
+
+    def __init__(self):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        import charts
+
+        self.figure = Figure(figsize=PAGE_SIZE, tight_layout=True)
+        FigureCanvasAgg(self.figure)
+        grid = self.figure.add_gridspec(2, 2)
+        self.charts = {
+            "summary": (charts.draw_summary, charts.update_summary),
+            "allocation": (charts.draw_allocation, charts.update_allocation),
+            "goal_progress": (charts.draw_goal_progress, charts.update_goal_progress),
+            "risk_return": (charts.draw_risk_return, charts.update_risk_return),
+        }
+        self.axes = {name: self.figure.add_subplot(grid[i // 2, i % 2]) for i, name in enumerate(self.charts)}
+        self.artists = {}
+
+    def show(self, name, *data):
+        """
+        Draw data on one chart, reusing its artists from the previous client where possible.
+        """
+        draw, update = self.charts[name]
+        ax = self.axes[name]
+        artists = self.artists.get(name)
+        if artists is not None:
+            artists = update(ax, artists, *data)
+        if artists is None:
+            ax.clear()
+            artists = draw(ax, *data)
+        self.artists[name] = artists
+
+    def save(self, path, file_format):
+        self.figure.savefig(path, format=file_format, dpi=DPI)
+
+
+def summary_lines(profile, result):
+    """
+    The lines of the summary page for a profile and its PortfolioResult.
+    """
+    lines = [
+        f"Goal Type: {profile.goal_type}",
+        f"Investment Goal: ${profile.goal_value:,.0f}",
+        f"Risk Tolerance: {profile.risk_tolerance}",
+        f"Time Horizon: {profile.time_horizon} years",
+        f"Selected Stocks: {', '.join(profile.tickers) if profile.tickers else 'None'}",
+        f"Current Portfolio Value: ${result.current_value:,.2f}",
+        f"Monthly Contribution Needed: ${result.monthly_contribution:,.2f}",
+    ]
+    if result.goal_probability is not None:
+        lines.append(f"Chance of Reaching Goal: {result.goal_probability:.1%}")
+    lines.append(f"Portfolio Allocation: {result.allocation['Stocks']}% Stocks, {result.allocation['Bonds']}% Bonds")
+    if result.risk is not None:
+        risk = result.risk.row("Portfolio")
+        lines.append(f"1-day {result.risk.confidence:.0%} VaR {risk['var_historical']:.2%}, "
+                     f"Max Drawdown {risk['max_drawdown']:.1%}")
+    if result.failed_tickers:
+        lines.append(f"No data for: {', '.join(result.failed_tickers)}")
+    if result.current_value < result.goal_value * 0.5:
+        lines.append("Suggestion: Consider increasing your time horizon or lowering your goal.")
+    return lines
+
+
+def client_panel(panel, profile):
+    """
+    (panel of the profile's stocks and BND, tickers without data) from the shared panel.
+    """
+    tickers = [ticker for ticker in dict.fromkeys(profile.tickers) if ticker != "BND"]
+    positions = panel.positions(tickers)
+    has_data = (positions >= 0) & ~np.isnan(panel.mean()[positions])
+    stocks = [ticker for ticker, ok in zip(tickers, has_data) if ok]
+    failed = [ticker for ticker, ok in zip(tickers, has_data) if not ok]
+    if not stocks:
+        raise ValueError("No valid stock data found.")
+    return panel.select(sorted(stocks + ["BND"])), failed
+
+
+def render_client(page, profile, result, panel):
+    import charts
+
+    stocks = [ticker for ticker in panel.tickers if ticker != "BND"]
+    positions = panel.positions(stocks)
+    stats = pd.DataFrame({"mean": panel.mean()[positions], "std": panel.std()[positions]}, index=stocks)
+    page.show("summary", summary_lines(profile, result))
+    page.show("allocation", charts.allocation_slices(result.allocation, result.weights))
+    page.show("goal_progress", result.goal_value, result.current_value)
+    page.show("risk_return", charts.risk_return_rows(stats))
+
+
+def render_chunk(panel, task):
+    """
+    Render the reports of one chunk of profiles; returns the paths written.
+    """
+    global _page
+    profiles, out_dir, file_format, paths, seed = task
+    if _page is None:
+        _page = ReportPage()
+
+    written = []
+    for client_id, row in profiles.iterrows():
+        profile = engine.Profile(
+            risk_tolerance=row["risk_tolerance"],
+            goal_type=row.get("goal_type", "Retirement"),
+            goal_value=float(row["goal_value"]),
+            time_horizon=int(row["time_horizon"]),
+            tickers=list(row["tickers"]),
+        )
+        try:
+            profile_panel, failed = client_panel(panel, profile)
+            result = engine.evaluate_panel(profile, profile_panel, failed, simulated_paths=paths, seed=seed)
+        except ValueError as e:
+            print(f"Warning: No report for client {client_id}: {e}")
+            continue
+        render_client(_page, profile, result, profile_panel)
+        path = os.path.join(out_dir, f"client_{client_id}.{file_format}")
+        _page.save(path, file_format)
+        written.append(path)
+    return written
+
+
+def render_reports(profiles, panel, out_dir, file_format="pdf", workers=1, paths=DEFAULT_PATHS, seed=0):
+    """
+    Write one report per row of profiles into out_dir; returns the paths written.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    tasks = [(profiles.iloc[start:start + CHUNK_CLIENTS], out_dir, file_format, paths, seed)
+             for start in range(0, len(profiles), CHUNK_CLIENTS)]
+    if workers > 1 and len(tasks) > 1:
+        with shared_panel.publish(panel) as handle:
+            parts = shared_panel.parallel_map(handle, render_chunk, tasks, workers)
+    else:
+        parts = [render_chunk(panel, task) for task in tasks]
+    return [path for part in parts for path in part]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render client reports as PDF or PNG")
+    parser.add_argument("profiles", help="CSV with risk_tolerance, goal_value, time_horizon, tickers "
+                                         "and optionally goal_type and client_id columns")
+    parser.add_argument("output", help="folder to write the reports to")
+    parser.add_argument("--format", choices=["pdf", "png"], default="pdf")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes to render with")
+    parser.add_argument("--paths", type=int, default=DEFAULT_PATHS, help="Monte Carlo paths per client")
+    parser.add_argument("--offline", action="store_true", help="use synthetic prices and factors")
+    args = parser.parse_args(argv)
+
+    import data_sources
+    if args.offline:
+        data_sources.use_offline_data()
+
+    profiles = pd.read_csv(args.profiles)
+    if "client_id" in profiles.columns:
+        profiles = profiles.set_index("client_id")
+    profiles["tickers"] = parse_tickers(profiles["tickers"].fillna(""))
+    universe = sorted(set(profiles["tickers"].explode().dropna()))
+    prices, failed = data_sources.fetch_many(universe + ["BND"])
+    for ticker in failed:
+        print(f"Warning: No data found for {ticker}. Skipping.")
+    if "BND" not in prices.columns:
+        print("Error: No bond data found for BND.")
+        return 1
+    panel = ReturnsPanel.from_prices(prices, data_sources.fetch_fama_french())
+    data_sources.close_connections()
+
+    start = time.perf_counter()
+    written = render_reports(profiles, panel, args.output, args.format, args.workers, args.paths)
+    print(f"Wrote {len(written)} reports to {args.output} in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
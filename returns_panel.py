@@ -0,0 +1,192 @@
+"""
+Aligned daily returns of stocks, bonds and factors in one NumPy matrix.
+
+Prices are turned into returns once, on a shared trading calendar (the dates
+of the price panel), into a C-contiguous (days, tickers) matrix with a mask
+of the entries that have data. Fama-French factors are joined to the same
+calendar by integer date position, so rf covers exactly the window of the
+returns. ff.factors_daily serves mktrf, smb, hml and rf in percent;
+from_prices divides all four by FACTOR_SCALE once, so factors and rf are
+daily fractions in the units of the returns everywhere. Per-ticker
+statistics are computed once per panel and downstream code reads columns and
+rows of the matrix as views instead of re-joining pandas indexes.
+
+    panel = ReturnsPanel.from_prices(prices, ff_data)
+    panel.mean()[panel.index("BND")]
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+FACTOR_COLUMNS = ["mktrf", "smb", "hml"]
+FACTOR_SCALE = 100  # ff.factors_daily percent to fractions
+
+
+class ReturnsPanel:
+    """
+    Daily returns on a trading calendar.
+
+    dates      datetime64[ns] array of the calendar, one entry per row
+    tickers    column names, in matrix order
+    values     (days, tickers) returns, NaN where either price is missing
+    mask       (days, tickers) True where values has data
+    factors    (days, 3) mktrf, smb and hml on the same calendar as daily fractions, or None
+    rf         (days,) risk-free rate on the same calendar as a daily fraction, or None
+    """
+
+    def __init__(self, dates, tickers, values, factors=None, rf=None, mask=None):
+        self.dates = dates
+        self.tickers = list(tickers)
+        self.values = np.ascontiguousarray(values)
+        self.mask = ~np.isnan(self.values) if mask is None else mask
+        self.factors = factors
+        self.rf = rf
+        self._positions = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self._lock = threading.Lock()
+        self._mean = None
+        self._std = None
+
+    @classmethod
+    def from_prices(cls, prices, ff_data=None, dtype="float64"):
+        """
+        Panel of the daily returns of a price frame, with factors joined when ff_data is given.
+        dtype="float32" halves the memory of the matrix; statistics still accumulate in float64.
+        """
+        price_values = prices.to_numpy(dtype="float64")
+        with np.errstate(invalid="ignore", divide="ignore"):
+            values = (price_values[1:] / price_values[:-1] - 1).astype(dtype, copy=False)
+        dates = prices.index[1:].to_numpy(dtype="datetime64[ns]")
+
+        factors = rf = None
+        if ff_data is not None:
+            rows = align_dates(dates, ff_data.index.to_numpy(dtype="datetime64[ns]"))
+            factors = take_rows((ff_data.reindex(columns=FACTOR_COLUMNS).to_numpy(dtype="float64")
+                                 / FACTOR_SCALE).astype(dtype, copy=False), rows)
+            rf = take_rows(ff_data["rf"].to_numpy(dtype="float64") / FACTOR_SCALE, rows)
+        return cls(dates, prices.columns, values, factors, rf)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def index(self, ticker):
+        return self._positions[ticker]
+
+    def positions(self, tickers):
+        """
+        Column positions of tickers; -1 for tickers not in the panel.
+        """
+        return np.array([self._positions.get(ticker, -1) for ticker in tickers], dtype=np.intp)
+
+    def column(self, ticker):
+        """
+        Returns of one ticker as a view of the matrix.
+        """
+        return self.values[:, self._positions[ticker]]
+
+    def select(self, tickers):
+        """
+        Panel of the given columns on the same calendar. The columns are copied;
+        dates, factors and rf are shared.
+        """
+        positions = self.positions(tickers)
+        missing = [ticker for ticker, position in zip(tickers, positions) if position < 0]
+        if missing:
+            raise KeyError(f"Not in panel: {', '.join(missing)}")
+        return ReturnsPanel(self.dates, tickers, self.values[:, positions], self.factors, self.rf,
+                            self.mask[:, positions])
+
+    def window(self, start, end):
+        """
+        Panel of the dates in [start, end), sharing memory with this one.
+        """
+        lo = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start)), side="left")
+        hi = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end)), side="left")
+        return ReturnsPanel(
+            self.dates[lo:hi], self.tickers, self.values[lo:hi],
+            None if self.factors is None else self.factors[lo:hi],
+            None if self.rf is None else self.rf[lo:hi],
+            self.mask[lo:hi],
+        )
+
+    def mean(self):
+        """
+        Mean daily return per column, skipping missing days; computed once.
+        """
+        with self._lock:
+            if self._mean is None:
+                self._mean, self._std = _column_moments(self.values, self.mask)
+            return self._mean
+
+    def std(self):
+        """
+        Sample standard deviation of daily returns per column; computed once.
+        """
+        self.mean()
+        return self._std
+
+    def cov(self, positions=None):
+        """
+        Covariance matrix of the columns at positions (all columns by default),
+        each pair over the days both have data, like DataFrame.cov.
+        """
+        if positions is None:
+            values, mask = self.values, self.mask
+        else:
+            values, mask = self.values[:, positions], self.mask[:, positions]
+        x = np.where(mask, values, 0).astype("float64", copy=False)
+        m = mask.astype("float64")
+        counts = m.T @ m
+        sums = x.T @ m  # sums[i, j]: sum of column i over the days column j has data
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = (x.T @ x - sums * sums.T / counts) / (counts - 1)
+        cov[counts < 2] = np.nan
+        return cov
+
+    def rf_mean(self):
+        """
+        Mean risk-free rate over the calendar as a daily fraction.
+        """
+        if self.rf is None:
+            raise ValueError("Panel has no factor data.")
+        return np.nanmean(self.rf)
+
+    def to_frame(self):
+        return pd.DataFrame(self.values, index=pd.DatetimeIndex(self.dates), columns=self.tickers)
+
+
+def align_dates(calendar, dates):
+    """
+    Row of dates matching each calendar date, -1 where dates has no such day.
+    Both arrays must be sorted.
+    """
+    if not len(dates):
+        return np.full(len(calendar), -1, dtype=np.intp)
+    rows = np.minimum(np.searchsorted(dates, calendar), len(dates) - 1)
+    rows[dates[rows] != calendar] = -1
+    return rows
+
+
+def take_rows(values, rows):
+    """
+    values[rows] with NaN rows where rows is -1.
+    """
+    if not len(values):
+        return np.full((len(rows),) + values.shape[1:], np.nan, dtype=values.dtype)
+    taken = values[np.maximum(rows, 0)]
+    taken[rows < 0] = np.nan
+    return taken
+
+
+def _column_moments(values, mask):
+    counts = mask.sum(axis=0)
+    x = np.where(mask, values, 0).astype("float64", copy=False)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = x.sum(axis=0) / counts
+        deviations = np.where(mask, x - mean, 0)
+        std = np.sqrt((deviations ** 2).sum(axis=0) / (counts - 1))
+    mean[counts == 0] = np.nan
+    std[counts < 2] = np.nan
+    return mean, std
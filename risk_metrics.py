@@ -0,0 +1,230 @@
+"""
+Value at risk, expected shortfall, drawdowns, Sortino and rolling volatility.
+
+Every function works on all columns of a (days, tickers) return matrix at
+once, skipping missing days, so one call covers the whole universe; the
+portfolio is one more column built from the weights. Losses are reported as
+positive fractions of value (a 1-day 95% VaR of 0.02 is a 2% loss).
+
+Rolling volatility is computed from cumulative sums and rolling historical
+VaR from strided window views, so neither copies the history per window.
+RiskState keeps running sums, the running peak and a ring buffer of the
+last window days, so appending new days costs O(new days × tickers).
+"""
+
+import warnings
+from dataclasses import dataclass
+from statistics import NormalDist
+
+import numpy as np
+
+from instrumentation import instrument
+
+
+CONFIDENCE = 0.95
+TRADING_DAYS_PER_YEAR = 252
+VOLATILITY_WINDOW = 21
+
+
+@dataclass
+class RiskMetrics:
+    """
+    One entry per ticker; VaR and CVaR are 1-day losses, sortino and volatility annualized.
+    """
+    tickers: list
+    confidence: float
+    var_historical: np.ndarray
+    cvar_historical: np.ndarray
+    var_parametric: np.ndarray
+    cvar_parametric: np.ndarray
+    max_drawdown: np.ndarray
+    sortino: np.ndarray
+    volatility: np.ndarray
+
+    def row(self, ticker):
+        i = self.tickers.index(ticker)
+        return {
+            "var_historical": self.var_historical[i],
+            "cvar_historical": self.cvar_historical[i],
+            "var_parametric": self.var_parametric[i],
+            "cvar_parametric": self.cvar_parametric[i],
+            "max_drawdown": self.max_drawdown[i],
+            "sortino": self.sortino[i],
+            "volatility": self.volatility[i],
+        }
+
+
+def portfolio_returns(panel, weights):
+    """
+    Daily returns of a portfolio rebalanced daily to weights (fractions in panel column order).
+    Missing returns count as 0%.
+    """
+    values = np.where(panel.mask, panel.values, 0).astype("float64", copy=False)
+    return values @ np.asarray(weights, dtype="float64")
+
+
+@instrument("risk_metrics.compute")
+def compute_risk(panel, weights=None, confidence=CONFIDENCE, window=None):
+    """
+    RiskMetrics for every ticker of a panel, plus a "Portfolio" entry when weights are given.
+    Historical VaR and CVaR use the last window days, or the whole history when window is None.
+    """
+    values = panel.values.astype("float64", copy=False)
+    tickers = list(panel.tickers)
+    if weights is not None:
+        values = np.column_stack([values, portfolio_returns(panel, weights)])
+        tickers.append("Portfolio")
+    return risk_from_returns(tickers, values, confidence, window)
+
+
+def risk_from_returns(tickers, values, confidence=CONFIDENCE, window=None):
+    """
+    RiskMetrics for the columns of a (days, tickers) matrix of daily returns with NaN gaps.
+    """
+    mask = ~np.isnan(values)
+    count = mask.sum(axis=0)
+    x = np.where(mask, values, 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = x.sum(axis=0) / count
+        std = np.sqrt((np.where(mask, x - mean, 0) ** 2).sum(axis=0) / (count - 1))
+        downside = np.sqrt((np.minimum(x, 0) ** 2).sum(axis=0) / count)
+        sortino = mean / downside * np.sqrt(TRADING_DAYS_PER_YEAR)
+
+    recent = values if window is None else values[-window:]
+    var_historical, cvar_historical = historical_var(recent, confidence)
+    var_parametric, cvar_parametric = parametric_var(mean, std, confidence)
+    return RiskMetrics(
+        tickers, confidence, var_historical, cvar_historical, var_parametric, cvar_parametric,
+        max_drawdown(values), sortino, std * np.sqrt(TRADING_DAYS_PER_YEAR),
+    )
+
+
+def historical_var(values, confidence=CONFIDENCE, axis=0):
+    """
+    Historical VaR and CVaR along axis: the loss at the (1 - confidence) quantile
+    and the mean loss beyond it.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # All-NaN columns give NaN
+        cutoff = np.nanquantile(values, 1 - confidence, axis=axis, keepdims=True)
+        tail = np.where(values <= cutoff, values, np.nan)
+        cvar = -np.nanmean(tail, axis=axis)
+    return -np.squeeze(cutoff, axis=axis), cvar
+
+
+def parametric_var(mean, std, confidence=CONFIDENCE):
+    """
+    Normal VaR and CVaR from the daily mean and standard deviation.
+    """
+    z = NormalDist().inv_cdf(confidence)
+    var = z * std - mean
+    cvar = std * NormalDist().pdf(z) / (1 - confidence) - mean
+    return var, cvar
+
+
+def max_drawdown(values):
+    """
+    Largest peak-to-trough fall of compounded value per column, as a positive fraction.
+    Value starts at 1 before the first day.
+    """
+    wealth = np.cumprod(1 + np.nan_to_num(values), axis=0)
+    if not len(wealth):
+        return np.full(values.shape[1:], np.nan)
+    peak = np.maximum(np.maximum.accumulate(wealth, axis=0), 1)
+    return 1 - (wealth / peak).min(axis=0)
+
+
+def rolling_volatility(values, window=VOLATILITY_WINDOW):
+    """
+    Annualized volatility over each trailing window of days; rows before the
+    first full window are NaN. Computed from cumulative sums of the masked returns.
+    """
+    mask = ~np.isnan(values)
+    x = np.where(mask, values, 0).astype("float64", copy=False)
+    zeros = np.zeros((1, x.shape[1]))
+    sums = np.concatenate([zeros, np.cumsum(x, axis=0)])
+    squares = np.concatenate([zeros, np.cumsum(x * x, axis=0)])
+    counts = np.concatenate([zeros, np.cumsum(mask, axis=0)])
+
+    n = counts[window:] - counts[:-window]
+    s = sums[window:] - sums[:-window]
+    q = squares[window:] - squares[:-window]
+    result = np.full(x.shape, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result[window - 1:] = np.sqrt(np.maximum(q - s * s / n, 0) / (n - 1) * TRADING_DAYS_PER_YEAR)
+    result[window - 1:][n < 2] = np.nan
+    return result
+
+
+def rolling_var(values, window, confidence=CONFIDENCE, step=1, chunk_windows=256):
+    """
+    Historical VaR over each trailing window, every step days; one row per window end.
+    Windows are strided views of values and are reduced a chunk at a time.
+    """
+    if len(values) < window:
+        return np.empty((0, values.shape[1]))
+    windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=0)[::step]
+    return np.concatenate([
+        historical_var(windows[i:i + chunk_windows], confidence, axis=-1)[0]
+        for i in range(0, len(windows), chunk_windows)
+    ])
+
+
+class RiskState:
+    """
+    Risk metrics of a universe kept up to date as days are appended.
+
+    Mean, downside deviation, volatility and drawdown cover the full history
+    through running sums; historical VaR covers the last window days.
+    """
+
+    def __init__(self, tickers, window=TRADING_DAYS_PER_YEAR, confidence=CONFIDENCE):
+        self.tickers = list(tickers)
+        self.window = window
+        self.confidence = confidence
+        n = len(self.tickers)
+        self.count = np.zeros(n)
+        self.sum = np.zeros(n)
+        self.sum_squares = np.zeros(n)
+        self.downside_squares = np.zeros(n)
+        self.wealth = np.ones(n)
+        self.peak = np.ones(n)
+        self.drawdown = np.zeros(n)
+        self.buffer = np.full((window, n), np.nan)
+        self.position = 0  # Next row of buffer to overwrite
+
+    def append(self, values):
+        """
+        Add a (days, tickers) block of new daily returns in date order.
+        """
+        values = np.atleast_2d(np.asarray(values, dtype="float64"))
+        if not len(values):
+            return
+        mask = ~np.isnan(values)
+        x = np.where(mask, values, 0)
+        self.count += mask.sum(axis=0)
+        self.sum += x.sum(axis=0)
+        self.sum_squares += (x * x).sum(axis=0)
+        self.downside_squares += (np.minimum(x, 0) ** 2).sum(axis=0)
+
+        wealth = self.wealth * np.cumprod(1 + x, axis=0)
+        peak = np.maximum(self.peak, np.maximum.accumulate(wealth, axis=0))
+        self.drawdown = np.maximum(self.drawdown, (1 - wealth / peak).max(axis=0))
+        self.wealth, self.peak = wealth[-1], peak[-1]
+
+        rows = (self.position + np.arange(len(values))) % self.window
+        self.buffer[rows[-self.window:]] = values[-self.window:]
+        self.position = (self.position + len(values)) % self.window
+
+    def metrics(self):
+        count = self.count
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = self.sum / count
+            std = np.sqrt(np.maximum(self.sum_squares - self.sum * mean, 0) / (count - 1))
+            sortino = mean / np.sqrt(self.downside_squares / count) * np.sqrt(TRADING_DAYS_PER_YEAR)
+        var_historical, cvar_historical = historical_var(self.buffer, self.confidence)
+        var_parametric, cvar_parametric = parametric_var(mean, std, self.confidence)
+        return RiskMetrics(
+            self.tickers, self.confidence, var_historical, cvar_historical, var_parametric, cvar_parametric,
+            self.drawdown.copy(), sortino, std * np.sqrt(TRADING_DAYS_PER_YEAR),
+        )
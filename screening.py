@@ -0,0 +1,279 @@
+"""
+Screening index of annualized volatility, market beta, return and sector per ticker.
+
+The index is a set of column arrays sorted by ticker, saved as .npy files,
+with one argsort order per numeric column kept in memory. A range query is
+two binary searches on a sorted column, and ordering the matches reuses the
+stored order, so queries over thousands of tickers take milliseconds and
+recommendations come from data instead of fixed lists.
+
+Refresh it nightly; only tickers whose statistics are more than
+STALE_TRADING_DAYS trading days older than the run are recomputed, and the
+refresh keeps its prices in a store of its own so a large universe does not
+evict the tickers the app has cached:
+
+    python screening.py [--universe universe.csv] [--offline] [--force]
+
+universe.csv has the columns ticker and sector. Without it the tickers in
+SECTORS are screened.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+import instrumentation
+
+
+COLUMNS = ["volatility", "beta", "annual_return"]
+DEFAULT_SCREEN_DIR = os.environ.get(
+    "SMARTINVEST_SCREEN_DIR",
+    os.path.join(os.path.expanduser("~"), ".smartinvest", "screen"),
+)
+LOOKBACK_YEARS = 3  # History each refresh computes the statistics from
+REFRESH_BATCH = 200  # Tickers downloaded per request during a refresh
+REFRESH_BYTES_PER_TICKER = 64 * 1024  # Price store budget of a refresh; LOOKBACK_YEARS of prices take about 20 KB
+STALE_TRADING_DAYS = 5  # Age of the last price a row was computed from before it is recomputed
+TRADING_DAYS_PER_YEAR = 252
+
+# Annualized volatility range of each risk tolerance
+RISK_BANDS = {"Low": (0.0, 0.25), "Medium": (0.25, 0.45), "High": (0.45, np.inf)}
+
+# Sectors that suit each goal
+GOAL_SECTORS = {
+    "House": ["Consumer Cyclical", "Real Estate"],
+    "Retirement": ["Fund"],
+    "Business": ["Technology"],
+    "Vacation": ["Consumer Cyclical", "Industrials"],
+    "College": ["Fund"],
+}
+
+# Starting universe, used until a larger one is given
+SECTORS = {
+    "TSLA": "Consumer Cyclical", "GME": "Consumer Cyclical", "AMC": "Communication Services",
+    "PLTR": "Technology", "COIN": "Financial Services", "SPCE": "Industrials", "NIO": "Consumer Cyclical",
+    "AAPL": "Technology", "MSFT": "Technology", "GOOGL": "Communication Services",
+    "AMZN": "Consumer Cyclical", "NVDA": "Technology", "CRM": "Technology", "ADBE": "Technology",
+    "JNJ": "Healthcare", "PG": "Consumer Defensive", "KO": "Consumer Defensive",
+    "WMT": "Consumer Defensive", "HD": "Consumer Cyclical", "LOW": "Consumer Cyclical",
+    "TOL": "Consumer Cyclical", "DAL": "Industrials", "BKNG": "Consumer Cyclical",
+    "ABNB": "Consumer Cyclical", "VTI": "Fund", "VOO": "Fund", "SPY": "Fund", "SCHD": "Fund", "QQQ": "Fund",
+}
+
+
+class ScreeningIndex:
+    """
+    Per-ticker screening statistics stored in store_dir.
+    """
+
+    def __init__(self, store_dir=DEFAULT_SCREEN_DIR):
+        self.store_dir = store_dir
+        os.makedirs(store_dir, exist_ok=True)
+        self._meta_path = os.path.join(store_dir, "meta.json")
+        self._lock = threading.RLock()
+        self._load()
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def range(self, column, low=-np.inf, high=np.inf):
+        """
+        Positions of the tickers with low <= column < high, in ascending order of column.
+        """
+        order, values = self._order[column], self._sorted[column]
+        lo = np.searchsorted(values, low, side="left")
+        hi = np.searchsorted(values, high, side="left")
+        return order[lo:hi]
+
+    def query(self, sectors=None, order_by="annual_return", descending=True, limit=None, **ranges):
+        """
+        Tickers matching every (low, high) range given by column name and, if given,
+        one of sectors, ordered by order_by.
+
+            index.query(volatility=(0, 0.25), beta=(0, 1), limit=5)
+        """
+        with self._lock:
+            matches = np.ones(len(self.tickers), dtype=bool)
+            for column, (low, high) in ranges.items():
+                in_range = np.zeros(len(self.tickers), dtype=bool)
+                in_range[self.range(column, low, high)] = True
+                matches &= in_range
+            if sectors is not None:
+                matches &= np.isin(self.sectors, list(sectors))
+
+            order = self._order[order_by]
+            order = order[matches[order] & ~np.isnan(self.values[order, COLUMNS.index(order_by)])]
+            if descending:
+                order = order[::-1]
+            return self.tickers[order[:limit]].tolist()
+
+    def recommend(self, risk_tolerance, goal_type, per_risk=5, per_goal=3):
+        """
+        The best returning tickers in the volatility band of the risk tolerance,
+        followed by the best returning ones in the sectors that suit the goal.
+        """
+        band = RISK_BANDS.get(risk_tolerance)
+        picks = self.query(volatility=band, limit=per_risk) if band else []
+        sectors = GOAL_SECTORS.get(goal_type)
+        if sectors:
+            picks += self.query(sectors=sectors, limit=per_goal + per_risk)
+        return list(dict.fromkeys(picks))[:per_risk + per_goal]
+
+    def row(self, ticker):
+        i = np.searchsorted(self.tickers, ticker)
+        if i == len(self.tickers) or self.tickers[i] != ticker:
+            raise KeyError(ticker)
+        row = dict(zip(COLUMNS, self.values[i]))
+        row["sector"] = self.sectors[i]
+        return row
+
+    def stale(self, tickers, today=None, max_age=STALE_TRADING_DAYS):
+        """
+        The tickers that are missing from the index or whose last price is more
+        than max_age trading days before today.
+        """
+        today = np.datetime64(pd.Timestamp(pd.Timestamp.today() if today is None else today).normalize(), "D")
+        with self._lock:
+            if not len(self.tickers):
+                return list(tickers)
+            positions = np.minimum(np.searchsorted(self.tickers, tickers), len(self.tickers) - 1)
+            fresh = ((self.tickers[positions] == np.asarray(tickers, dtype=str))
+                     & (np.busday_count(self.updated[positions], today) <= max_age))
+        return [ticker for ticker, is_fresh in zip(tickers, fresh) if not is_fresh]
+
+    def update(self, tickers, sectors, values, updated, save=True):
+        """
+        Insert or replace rows; values is a (tickers, len(COLUMNS)) array and
+        updated the date of the last price of each row (or one date for all).
+        With save=False the rows are kept in memory until save().
+        """
+        with self._lock:
+            keep = ~np.isin(self.tickers, tickers)
+            all_tickers = np.concatenate([self.tickers[keep], np.asarray(tickers, dtype=str)])
+            all_sectors = np.concatenate([self.sectors[keep], np.asarray(sectors, dtype=str)])
+            all_values = np.concatenate([self.values[keep], np.asarray(values, dtype="float64").reshape(-1, len(COLUMNS))])
+            updated = np.broadcast_to(np.asarray(updated, dtype="datetime64[D]"), (len(tickers),))
+            all_updated = np.concatenate([self.updated[keep], updated])
+            order = np.argsort(all_tickers)
+            self._set(all_tickers[order], all_sectors[order], all_values[order], all_updated[order])
+            if save:
+                self.save()
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    @instrumentation.instrument("screening.refresh")
+    def refresh(self, universe, fetch_many, fetch_fama_french, today=None, force=False, batch_size=REFRESH_BATCH,
+                progress=None):
+        """
+        Recompute the statistics of the stale tickers of universe (a dict of ticker to sector)
+        from LOOKBACK_YEARS of prices. The index is saved once at the end, or when
+        a batch fails, with the batches done so far. Returns the number of tickers updated.
+        """
+        import factor_model
+        from returns_panel import ReturnsPanel
+
+        today = pd.Timestamp(pd.Timestamp.today() if today is None else today).normalize()
+        start = today - pd.DateOffset(years=LOOKBACK_YEARS)
+        tickers = sorted(universe) if force else self.stale(sorted(universe), today)
+        ff_data = fetch_fama_french(start, today) if tickers else None
+
+        refreshed = 0
+        try:
+            for first in range(0, len(tickers), batch_size):
+                batch = tickers[first:first + batch_size]
+                if progress:
+                    progress(first, len(tickers))
+                prices, _ = fetch_many(batch, start, today)
+                if prices.empty:
+                    continue
+                panel = ReturnsPanel.from_prices(prices, ff_data)
+                values = np.column_stack([
+                    panel.std() * np.sqrt(TRADING_DAYS_PER_YEAR),
+                    factor_model.fit_factors(panel).betas[:, 0],
+                    panel.mean() * TRADING_DAYS_PER_YEAR,
+                ])
+                # Date of each ticker's last price, so a ticker without new prices is not stale sooner
+                last = len(panel) - 1 - np.argmax(panel.mask[::-1], axis=0)
+                self.update(panel.tickers, [universe[ticker] for ticker in panel.tickers], values,
+                            panel.dates[last], save=False)
+                refreshed += len(panel.tickers)
+        finally:
+            if refreshed:
+                self.save()
+        return refreshed
+
+    def _set(self, tickers, sectors, values, updated):
+        self.tickers, self.sectors, self.values, self.updated = tickers, sectors, values, updated
+        self._order, self._sorted = {}, {}
+        for i, column in enumerate(COLUMNS):
+            # NaN sorts last, so range queries never match it
+            order = np.argsort(values[:, i], kind="stable")
+            self._order[column] = order
+            self._sorted[column] = values[order, i]
+
+    def _path(self, name):
+        return os.path.join(self.store_dir, name + ".npy")
+
+    def _load(self):
+        try:
+            with open(self._meta_path) as f:
+                meta = json.load(f)
+            if meta.get("columns") != COLUMNS:
+                raise ValueError("stored columns differ")
+            arrays = [np.load(self._path(name)) for name in ("tickers", "sectors", "values", "updated")]
+        except (FileNotFoundError, ValueError):
+            arrays = [np.empty(0, dtype=str), np.empty(0, dtype=str), np.empty((0, len(COLUMNS))),
+                      np.empty(0, dtype="datetime64[D]")]
+        self._set(*arrays)
+
+    def _save(self):
+        for name in ("tickers", "sectors", "values", "updated"):
+            tmp_path = self._path(name) + ".tmp.npy"
+            np.save(tmp_path, getattr(self, name))
+            os.replace(tmp_path, self._path(name))
+        tmp_path = self._meta_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"columns": COLUMNS}, f)
+        os.replace(tmp_path, self._meta_path)
+
+
+def load_universe(path):
+    """
+    Dict of ticker to sector from a CSV with ticker and sector columns.
+    """
+    frame = pd.read_csv(path, dtype=str)
+    return dict(zip(frame["ticker"].str.upper().str.strip(), frame["sector"].fillna("Unknown")))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh the SmartInvest screening index")
+    parser.add_argument("--universe", help="CSV with ticker and sector columns (default: built-in list)")
+    parser.add_argument("--offline", action="store_true", help="use synthetic prices and factors")
+    parser.add_argument("--force", action="store_true", help="recompute every ticker, not only stale ones")
+    args = parser.parse_args(argv)
+
+    import data_sources
+    if args.offline:
+        data_sources.use_offline_data()
+
+    universe = load_universe(args.universe) if args.universe else SECTORS
+    index = data_sources.get_screening_index()
+    # A store of its own, sized for the universe, so the refresh does not evict the app's tickers
+    prices = data_sources.open_price_cache(os.path.join(index.store_dir, "prices"), max_tickers=len(universe),
+                                           max_bytes=len(universe) * REFRESH_BYTES_PER_TICKER)
+    refreshed = index.refresh(universe, prices.get_many, data_sources.fetch_fama_french, force=args.force,
+                              progress=lambda done, total: print(f"Screening {done}/{total} tickers..."))
+    data_sources.close_connections()
+    print(f"Updated {refreshed} tickers; the index holds {len(index)}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,352 @@
+"""
+HTTP service mode: the robo-advisor for many users from one process.
+
+    python server.py [--port 8080] [--offline]
+
+    POST /evaluate   {"risk_tolerance": "Medium", "goal_type": "Retirement",
+                      "goal_value": 1000000, "time_horizon": 20, "tickers": ["AAPL", "MSFT"]}
+    GET  /recommend?risk_tolerance=Low&goal_type=House
+    GET  /health
+
+The server runs on asyncio streams from the standard library. Data fetches
+are single-flight: while a ticker or factor window is being fetched, other
+requests for it wait for that fetch instead of starting their own, and the
+tickers one request still needs are fetched in one batch. Calculations run
+in a thread pool behind a semaphore; when more than max_pending requests are
+waiting the server answers 503 with Retry-After instead of queueing without
+bound.
+
+The data providers are passed in, so the service runs against stubs or the
+synthetic sources as well as Yahoo Finance and WRDS.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import engine
+from data_sources import DEFAULT_START, DEFAULT_END
+
+
+MAX_BODY_BYTES = 64 * 1024
+READ_TIMEOUT = 10.0  # Seconds to receive a request before the connection is dropped
+RETRY_AFTER = 1  # Seconds clients are asked to wait when the server is saturated
+MAX_HORIZON_YEARS = 100
+MAX_TICKERS = 50  # Per /evaluate request
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class SingleFlight:
+    """
+    At most one running call per key; concurrent callers share its result.
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    def in_flight(self, key):
+        return self._calls.get(key)
+
+    def start(self, key):
+        """
+        Register a call for key and return the future its callers will wait on.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        return future
+
+    def finish(self, key, result=None, error=None):
+        future = self._calls.pop(key)
+        if error is not None:
+            future.set_exception(error)
+            future.exception()  # Waiters still get the error; with none, asyncio would log it as never retrieved
+        else:
+            future.set_result(result)
+
+    async def do(self, key, func):
+        """
+        Await func() for key, or the call for key that is already running.
+        """
+        future = self.in_flight(key)
+        if future is not None:
+            return await asyncio.shield(future)
+        future = self.start(key)
+        try:
+            result = await func()
+        except Exception as e:
+            self.finish(key, error=e)
+            raise
+        self.finish(key, result)
+        return result
+
+
+class AdvisorService:
+    """
+    Request handlers over fetch_many(tickers, start, end) and fetch_fama_french(start, end).
+    """
+
+    def __init__(self, fetch_many, fetch_fama_french, index=None, workers=4, max_concurrency=4, max_pending=64,
+                 simulated_paths=engine.SIMULATED_PATHS, start=DEFAULT_START, end=DEFAULT_END):
+        self.fetch_many = fetch_many
+        self.fetch_fama_french = fetch_fama_french
+        self.index = index
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="advisor")
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self.simulated_paths = simulated_paths
+        self.start, self.end = start, end
+        self.flights = SingleFlight()
+        self.pending = 0
+        self.upstream_calls = 0  # Fetches that reached the providers, for monitoring
+        self._semaphore = None
+        self._tasks = set()  # Running batch fetches; the loop only keeps weak references
+
+    async def prices(self, tickers):
+        """
+        (price panel, failed tickers) for tickers, sharing fetches already in flight.
+        """
+        import pandas as pd
+
+        waiting, missing = {}, []
+        for ticker in dict.fromkeys(tickers):
+            key = ("prices", ticker, self.start, self.end)
+            future = self.flights.in_flight(key)
+            if future is None:
+                future = self.flights.start(key)
+                missing.append(ticker)
+            waiting[ticker] = future
+
+        if missing:
+            task = asyncio.ensure_future(self._fetch_batch(missing))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        results = await asyncio.gather(*(asyncio.shield(future) for future in waiting.values()))
+        series = {ticker: result for ticker, result in zip(waiting, results) if result is not None}
+        failed = [ticker for ticker in waiting if ticker not in series]
+        panel = pd.concat(series, axis=1) if series else pd.DataFrame()
+        return panel, failed
+
+    async def _fetch_batch(self, tickers):
+        loop = asyncio.get_running_loop()
+        self.upstream_calls += 1
+        try:
+            panel, _ = await loop.run_in_executor(self.executor, self.fetch_many, tickers, self.start, self.end)
+        except Exception as e:
+            for ticker in tickers:
+                self.flights.finish(("prices", ticker, self.start, self.end), error=e)
+            return
+        for ticker in tickers:
+            column = panel[ticker].dropna() if ticker in panel.columns else None
+            self.flights.finish(("prices", ticker, self.start, self.end), column if column is not None and len(column) else None)
+
+    async def factors(self):
+        async def fetch():
+            self.upstream_calls += 1
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, self.fetch_fama_french, self.start, self.end)
+        return await self.flights.do(("factors", self.start, self.end), fetch)
+
+    async def evaluate(self, payload):
+        if not isinstance(payload, dict):
+            raise ValueError("The request body must be a JSON object.")
+        if not isinstance(payload.get("tickers", []), list):
+            raise ValueError("tickers must be a list of symbols.")
+        goal_value = payload.get("goal_value")
+        if goal_value is None:
+            goal_value = engine.default_goal(payload.get("goal_type"))
+        goal_value = number(goal_value, "goal_value")
+        time_horizon = number(payload.get("time_horizon", 10), "time_horizon")
+        profile = engine.Profile(
+            risk_tolerance=str(payload.get("risk_tolerance", "Medium")),
+            goal_type=str(payload.get("goal_type", "Retirement")),
+            goal_value=float(goal_value),
+            time_horizon=int(time_horizon),
+            tickers=[str(ticker).upper() for ticker in payload.get("tickers", [])],
+        )
+        if not profile.tickers:
+            raise ValueError("tickers must name at least one stock.")
+        if len(profile.tickers) > MAX_TICKERS:
+            raise ValueError(f"tickers may name at most {MAX_TICKERS} stocks.")
+        if profile.goal_value <= 0:
+            raise ValueError("goal_value must be positive.")
+        if time_horizon != profile.time_horizon or not 1 <= profile.time_horizon <= MAX_HORIZON_YEARS:
+            raise ValueError(f"time_horizon must be a whole number of years from 1 to {MAX_HORIZON_YEARS}.")
+        if profile.risk_tolerance not in ("Low", "Medium", "High"):
+            raise ValueError("risk_tolerance must be Low, Medium or High.")
+
+        (prices, failed), ff_data = await asyncio.gather(self.prices(profile.tickers + ["BND"]), self.factors())
+        loop = asyncio.get_running_loop()
+        async with self._limit():
+            result = await loop.run_in_executor(
+                self.executor,
+                lambda: engine.evaluate_profile(profile, lambda tickers: (prices, failed), lambda: ff_data,
+                                                simulated_paths=self.simulated_paths),
+            )
+        return result_to_json(result)
+
+    def recommend(self, risk_tolerance, goal_type):
+        return {"tickers": engine.recommend_stocks(risk_tolerance, goal_type, index=self.index)}
+
+    async def dispatch(self, method, target, body):
+        """
+        (status, JSON-serializable payload) for one request.
+        """
+        url = urlsplit(target)
+        if url.path == "/health":
+            return 200, {"status": "ok", "pending": self.pending, "upstream_calls": self.upstream_calls}
+        if url.path == "/recommend":
+            if method != "GET":
+                return 405, {"error": "Use GET."}
+            query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            return 200, self.recommend(query.get("risk_tolerance", "Medium"), query.get("goal_type", "Retirement"))
+        if url.path == "/evaluate":
+            if method != "POST":
+                return 405, {"error": "Use POST."}
+            if self.pending >= self.max_pending:
+                return 503, {"error": "Server busy, retry shortly."}
+            self.pending += 1
+            try:
+                return 200, await self.evaluate(json.loads(body or b"{}"))
+            except (ValueError, TypeError) as e:
+                return 400, {"error": str(e)}
+            finally:
+                self.pending -= 1
+        return 404, {"error": f"No such endpoint: {url.path}"}
+
+    async def handle(self, reader, writer):
+        """
+        Serve one HTTP/1.1 request on a connection, then close it.
+        """
+        try:
+            try:
+                method, target, headers, body = await asyncio.wait_for(read_request(reader), READ_TIMEOUT)
+            except RequestTooLarge:
+                status, payload = 413, {"error": "Request body too large."}
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                return
+            else:
+                try:
+                    status, payload = await self.dispatch(method, target, body)
+                except Exception as e:
+                    print(f"Error serving {method} {target}: {e}")
+                    status, payload = 500, {"error": "Internal error."}
+
+            data = json.dumps(payload).encode()
+            head = [f"HTTP/1.1 {status} {REASONS[status]}", "Content-Type: application/json",
+                    f"Content-Length: {len(data)}", "Connection: close"]
+            if status == 503:
+                head.append(f"Retry-After: {RETRY_AFTER}")
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + data)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+    def _limit(self):
+        # Created lazily so it binds to the loop the server runs on
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+
+class RequestTooLarge(Exception):
+    pass
+
+
+async def read_request(reader):
+    """
+    (method, target, headers, body) of one request; headers are lower-cased.
+    """
+    request_line = await reader.readline()
+    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    if length > MAX_BODY_BYTES:
+        raise RequestTooLarge()
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, headers, body
+
+
+def number(value, name):
+    """
+    A finite float from a JSON number or numeric string; booleans and NaN are rejected.
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"{name} must be a number.")
+    try:
+        value = float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number.") from None
+    if not math.isfinite(value):
+        raise ValueError(f"{name} must be a finite number.")
+    return value
+
+
+def result_to_json(result):
+    """
+    Plain JSON form of an engine.PortfolioResult.
+    """
+    payload = {
+        "allocation": result.allocation,
+        "weights": {ticker: float(weight) for ticker, weight in result.weights.items()},
+        "current_value": float(result.current_value),
+        "goal_value": float(result.goal_value),
+        "monthly_contribution": float(result.monthly_contribution),
+        "goal_probability": result.goal_probability,
+        "failed_tickers": result.failed_tickers,
+    }
+    if result.risk is not None:
+        payload["portfolio_risk"] = {name: float(value) for name, value in result.risk.row("Portfolio").items()}
+    return payload
+
+
+async def serve(service, host, port):
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"SmartInvest service listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the SmartInvest robo-advisor over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--offline", action="store_true", help="use synthetic prices and factors")
+    parser.add_argument("--workers", type=int, default=4, help="threads for fetches and calculations")
+    parser.add_argument("--max-concurrency", type=int, default=4, help="calculations run at the same time")
+    parser.add_argument("--max-pending", type=int, default=64, help="requests accepted before answering 503")
+    args = parser.parse_args(argv)
+
+    import data_sources
+    if args.offline:
+        data_sources.use_offline_data()
+
+    service = AdvisorService(data_sources.fetch_many, data_sources.fetch_fama_french,
+                             index=data_sources.get_screening_index(), workers=args.workers,
+                             max_concurrency=args.max_concurrency, max_pending=args.max_pending)
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+        data_sources.close_connections()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
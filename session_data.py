@@ -0,0 +1,147 @@
+"""
+Data shared by every view of one session.
+
+The calculation, the charts and the summary all read prices, the returns
+panel and statistics from one SessionData. It is keyed by the selected ticker set and
+the date window: asking for the same tickers (or a subset) again costs no
+I/O, and the data is only reloaded when the selection grows or the window
+changes. BND is always loaded alongside the selection.
+"""
+
+import threading
+
+from data_sources import DEFAULT_START, DEFAULT_END
+
+
+class SessionData:
+    """
+    Aligned prices, returns, return statistics and factors for the current selection.
+
+    fetch_many(tickers, start, end) and fetch_fama_french(start, end) are the
+    underlying providers, normally the ones in data_sources.
+    """
+
+    def __init__(self, fetch_many, fetch_fama_french, start=DEFAULT_START, end=DEFAULT_END):
+        self._fetch_many = fetch_many
+        self._fetch_fama_french = fetch_fama_french
+        self.start = start
+        self.end = end
+        # Guards the loaded data only; downloads run outside it, so views reading
+        # what is loaded never wait for a calculation that is fetching
+        self._lock = threading.RLock()
+        self._generation = 0  # Raised when loaded data is dropped; older downloads are not kept
+        self._factors = None
+        self._clear_selection()
+
+    def invalidate(self):
+        """
+        Forget everything; the next request loads from the providers again.
+        """
+        with self._lock:
+            self._generation += 1
+            self._factors = None
+            self._clear_selection()
+
+    def set_window(self, start, end):
+        with self._lock:
+            if (start, end) != (self.start, self.end):
+                self.start, self.end = start, end
+                self.invalidate()
+
+    def fetch_many(self, tickers):
+        """
+        Price panel and failed tickers, in the same form as data_sources.fetch_many.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        prices = self._selection(tickers)
+        columns = [ticker for ticker in tickers if ticker in prices.columns]
+        failed = [ticker for ticker in tickers if ticker not in prices.columns]
+        return prices[columns], failed
+
+    def fetch_fama_french(self):
+        with self._lock:
+            if self._factors is not None:
+                return self._factors
+            generation, window = self._generation, (self.start, self.end)
+        factors = self._fetch_fama_french(*window)
+        with self._lock:
+            if generation == self._generation and self._factors is None:
+                self._factors = factors
+        return factors
+
+    def panel(self, tickers):
+        """
+        ReturnsPanel of everything loaded for a selection including tickers; built once per selection.
+        """
+        from returns_panel import ReturnsPanel
+
+        prices = self._selection(tickers)
+        with self._lock:
+            if self._prices is prices and self._panel is not None:
+                return self._panel
+        panel = ReturnsPanel.from_prices(prices)
+        with self._lock:
+            if self._prices is prices:
+                if self._panel is None:
+                    self._panel = panel
+                return self._panel
+        return panel
+
+    def stats(self, tickers):
+        """
+        Frame with the mean and std of daily returns per ticker that has data.
+        """
+        import pandas as pd
+
+        prices, _ = self.fetch_many(tickers)
+        panel = self.panel(tickers)
+        positions = panel.positions(prices.columns)
+        return pd.DataFrame({"mean": panel.mean()[positions], "std": panel.std()[positions]}, index=prices.columns)
+
+    def loaded(self):
+        """
+        (tickers, prices, factors, panel) held now, for saving a session; entries may be None.
+        """
+        with self._lock:
+            tickers, prices, factors = self._tickers, self._prices, self._factors
+        panel = self.panel(tickers) if tickers else None
+        return tickers, prices, factors, panel
+
+    def restore(self, tickers, prices, factors=None, panel=None):
+        """
+        Take over data loaded earlier (e.g. from a saved session) instead of fetching it.
+        """
+        with self._lock:
+            self._generation += 1
+            self._clear_selection()
+            self._factors = factors
+            if prices is not None:
+                self._tickers = set(tickers)
+                self._prices = prices
+                self._panel = panel
+
+    def _selection(self, tickers):
+        """
+        Prices loaded for a selection covering tickers, downloading them first if needed.
+        The download runs without the lock; its result replaces what is loaded unless
+        the data was dropped meanwhile or a larger selection was loaded.
+        """
+        with self._lock:
+            if self._tickers is not None and set(tickers) <= self._tickers:
+                return self._prices
+            generation, window = self._generation, (self.start, self.end)
+        wanted = set(tickers) | {"BND"}
+        prices, _ = self._fetch_many(sorted(wanted), *window)
+        with self._lock:
+            if generation != self._generation:
+                return prices
+            if self._tickers is None or not wanted <= self._tickers:
+                self._clear_selection()
+                self._tickers = wanted
+                self._prices = prices
+            return self._prices
+
+    def _clear_selection(self):
+        self._tickers = None
+        self._prices = None
+        self._panel = None
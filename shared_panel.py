@@ -0,0 +1,174 @@
+"""
+ReturnsPanel arrays published once for process-pool workers.
+
+publish() copies the arrays of a panel into multiprocessing.shared_memory
+blocks (or into .npy files that are memory-mapped, when a folder is given)
+and returns a small picklable PanelHandle. Workers attach the handle once
+per process and get a ReturnsPanel of read-only NumPy views on the same
+memory, so tasks carry only the handle and their own arguments instead of
+pickled frames.
+
+    with publish(panel) as handle:
+        results = parallel_map(handle, evaluate_chunk, chunks, workers=8)
+"""
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from returns_panel import ReturnsPanel
+
+
+ARRAYS = ("dates", "values", "mask", "factors", "rf")
+
+_attached = {}  # Panels attached by this process, by handle id
+_tracker_lock = threading.Lock()
+_separate_tracker_fd = None  # Resource tracker this process started by attaching, before Python 3.13
+
+
+@dataclass
+class PanelHandle:
+    """
+    Where the arrays of a published panel live; cheap to pickle.
+    arrays maps each array name to (block name or file path, shape, dtype).
+    """
+    id: str
+    tickers: list
+    arrays: dict
+    memory_mapped: bool = False
+    _blocks: list = field(default_factory=list, repr=False, compare=False)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_blocks"] = []  # Only the publishing process owns the blocks
+        return state
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        """
+        Release the published memory; call in the publishing process once workers are done.
+        """
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+        panel = _attached.pop(self.id, None)
+        if panel is not None:
+            # Attached in this process (parallel_map with one worker): drop the
+            # views first, then unmap the blocks that backed them.
+            blocks, panel._blocks = panel._blocks, []
+            del panel
+            for block in blocks:
+                try:
+                    block.close()
+                except BufferError:
+                    pass  # A caller still holds a view; the mapping goes with it
+
+
+def publish(panel, folder=None):
+    """
+    Publish the arrays of panel and return its PanelHandle. With folder, the
+    arrays are written there as .npy files instead of shared memory.
+    """
+    arrays, blocks = {}, []
+    for name in ARRAYS:
+        array = getattr(panel, name)
+        if array is None:
+            continue
+        array = np.ascontiguousarray(array)
+        if folder is not None:
+            path = os.path.join(folder, f"{name}.npy")
+            np.save(path, array)
+            arrays[name] = (path, array.shape, array.dtype.str)
+            continue
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        blocks.append(block)
+        arrays[name] = (block.name, array.shape, array.dtype.str)
+
+    handle_id = folder or blocks[0].name
+    return PanelHandle(handle_id, list(panel.tickers), arrays, memory_mapped=folder is not None, _blocks=blocks)
+
+
+def attach(handle):
+    """
+    ReturnsPanel of read-only views on a published panel, attached once per process.
+    """
+    panel = _attached.get(handle.id)
+    if panel is not None:
+        return panel
+
+    views, blocks = {}, []
+    for name, (location, shape, dtype) in handle.arrays.items():
+        if handle.memory_mapped:
+            view = np.load(location, mmap_mode="r")
+        else:
+            block = _open_block(location)
+            blocks.append(block)
+            view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+            view.flags.writeable = False
+        views[name] = view
+
+    panel = ReturnsPanel(views["dates"], handle.tickers, views["values"], views.get("factors"), views.get("rf"),
+                         mask=views["mask"])
+    panel._blocks = blocks  # Keep the blocks open for as long as the panel is used
+    _attached[handle.id] = panel
+    return panel
+
+
+def parallel_map(handle, func, items, workers=None):
+    """
+    [func(panel, item) for item in items] over a process pool, each worker
+    attaching the published panel once. func must be a module-level function.
+    """
+    items = list(items)
+    if workers == 1 or len(items) <= 1:
+        panel = attach(handle)
+        return [func(panel, item) for item in items]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_call, [handle] * len(items), [func] * len(items), items))
+
+
+def _call(handle, func, item):
+    return func(attach(handle), item)
+
+
+def _open_block(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    if os.name == "nt":
+        return shared_memory.SharedMemory(name=name)  # Windows frees a block with its last handle
+
+    # Before Python 3.13 attaching registers the block with the resource
+    # tracker, which unlinks what is still registered when it shuts down.
+    # Workers share the publisher's tracker (fork inherits it and spawn passes
+    # it on), where the registration repeats the publisher's and is left alone:
+    # unregistering would drop the publisher's own. A process that had no
+    # tracker before its first attach starts a separate one here, and it and
+    # its forked children unregister every block they attach. Processes
+    # spawned from such a process share its tracker without knowing it, so
+    # attach from the pool of the publishing process instead.
+    from multiprocessing import resource_tracker
+
+    global _separate_tracker_fd
+    with _tracker_lock:
+        tracker = resource_tracker._resource_tracker
+        if tracker._fd is None:
+            tracker.ensure_running()
+            _separate_tracker_fd = tracker._fd
+        block = shared_memory.SharedMemory(name=name)
+        if tracker._fd == _separate_tracker_fd:
+            resource_tracker.unregister(block._name, "shared_memory")
+        return block
@@ -0,0 +1,214 @@
+"""
+Session snapshots: inputs, results and loaded market data in one binary file.
+
+A snapshot is a small JSON header followed by raw NumPy arrays:
+
+    magic (8 bytes) | version (uint32) | header length (uint32) | JSON header | arrays
+
+The header holds the plain values (inputs, allocation, contribution, ...)
+and, for each array, its offset, shape and dtype. Arrays start on 64-byte
+boundaries and are opened as read-only memory maps, so loading a snapshot
+reads only the header; prices, returns and results are paged in when a
+view first touches them. Restoring a session therefore needs no network
+access and no recomputation.
+
+    save_snapshot(path, state, prices=prices, factors=ff_data, panel=panel,
+                  results={"factor_fit": fit, "risk": risk})
+    snapshot = load_snapshot(path)
+    snapshot.state["goal_type"], snapshot.panel(), snapshot.result("risk")
+"""
+
+import dataclasses
+import json
+import os
+import struct
+
+import numpy as np
+
+
+MAGIC = b"SMARTSNP"
+SNAPSHOT_VERSION = 2  # Raise when the layout changes; older files are still read
+ALIGNMENT = 64
+PREAMBLE = struct.Struct("<8sII")
+
+# Result dataclasses a snapshot can hold, by the name stored in the header
+RESULT_TYPES = {
+    "FactorFit": ("factor_model", "FactorFit"),
+    "RiskMetrics": ("risk_metrics", "RiskMetrics"),
+    "SimulationResult": ("montecarlo", "SimulationResult"),
+}
+
+
+class Snapshot:
+    """
+    An opened snapshot file. state is the dict of plain values that was saved.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, version, header_length = PREAMBLE.unpack(f.read(PREAMBLE.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a SmartInvest session.")
+            if version > SNAPSHOT_VERSION:
+                raise ValueError(f"{path} was saved by a newer version of SmartInvest (format {version}).")
+            header = json.loads(f.read(header_length).decode("utf-8"))
+        self.version = version
+        self.state = header["state"]
+        self._arrays = header["arrays"]
+        self._frames = header["frames"]
+        self._panel = header["panel"]
+        self._results = header["results"]
+
+    def has(self, name):
+        return name in self._arrays
+
+    def array(self, name):
+        """
+        Read-only memory map of one stored array.
+        """
+        offset, shape, dtype = self._arrays[name]
+        if not np.prod(shape):
+            return np.empty(shape, dtype=np.dtype(dtype))
+        return np.memmap(self.path, dtype=np.dtype(dtype), mode="r", offset=offset, shape=tuple(shape))
+
+    def prices(self):
+        return self._frame("prices")
+
+    def factors(self):
+        return self._frame("factors")
+
+    def panel(self):
+        """
+        The stored ReturnsPanel, or None.
+        """
+        from returns_panel import FACTOR_SCALE, ReturnsPanel
+
+        if self._panel is None:
+            return None
+        arrays = {name: self.array(f"panel.{name}") if self.has(f"panel.{name}") else None
+                  for name in ("dates", "values", "mask", "factors", "rf")}
+        if self.version < 2:  # Format 1 stored factors and rf in ff.factors_daily percent
+            for name in ("factors", "rf"):
+                if arrays[name] is not None:
+                    arrays[name] = arrays[name] / FACTOR_SCALE
+        return ReturnsPanel(arrays["dates"], self._panel["tickers"], arrays["values"], arrays["factors"],
+                            arrays["rf"], mask=arrays["mask"])
+
+    def result(self, name):
+        """
+        A stored result dataclass (factor fit, risk metrics, simulation), or None.
+        """
+        import importlib
+
+        entry = self._results.get(name)
+        if entry is None:
+            return None
+        module, cls = RESULT_TYPES[entry["type"]]
+        cls = getattr(importlib.import_module(module), cls)
+        values = dict(entry["values"])
+        for field in entry["arrays"]:
+            values[field] = self.array(f"{name}.{field}")
+        for field, keys in entry["array_dicts"].items():
+            values[field] = {key: self.array(f"{name}.{field}.{key}") for key in keys}
+        return cls(**values)
+
+    def _frame(self, name):
+        import pandas as pd
+
+        frame = self._frames.get(name)
+        if frame is None:
+            return None
+        index = pd.DatetimeIndex(self.array(f"{name}.index"), name=frame["index_name"])
+        return pd.DataFrame(self.array(f"{name}.values"), index=index, columns=frame["columns"])
+
+
+def load_snapshot(path):
+    return Snapshot(path)
+
+
+def save_snapshot(path, state, prices=None, factors=None, panel=None, results=None):
+    """
+    Write a snapshot. state must be JSON-serializable; prices and factors are
+    date-indexed frames, panel a ReturnsPanel and results a dict of result
+    dataclasses (see RESULT_TYPES) or None values.
+    """
+    arrays = {}
+    header = {"state": state, "frames": {}, "panel": None, "results": {}}
+
+    for name, frame in (("prices", prices), ("factors", factors)):
+        if frame is None:
+            continue
+        header["frames"][name] = {"columns": [str(column) for column in frame.columns],
+                                  "index_name": frame.index.name}
+        arrays[f"{name}.index"] = frame.index.to_numpy(dtype="datetime64[ns]")
+        arrays[f"{name}.values"] = frame.to_numpy(dtype="float64")
+
+    if panel is not None:
+        header["panel"] = {"tickers": list(panel.tickers)}
+        for name in ("dates", "values", "mask", "factors", "rf"):
+            if getattr(panel, name) is not None:
+                arrays[f"panel.{name}"] = np.asarray(getattr(panel, name))
+
+    for name, result in (results or {}).items():
+        if result is None:
+            continue
+        entry = {"type": type(result).__name__, "values": {}, "arrays": [], "array_dicts": {}}
+        if entry["type"] not in RESULT_TYPES:
+            raise TypeError(f"Cannot store a {entry['type']} in a snapshot.")
+        for field in dataclasses.fields(result):
+            value = getattr(result, field.name)
+            if isinstance(value, np.ndarray):
+                entry["arrays"].append(field.name)
+                arrays[f"{name}.{field.name}"] = value
+            elif isinstance(value, dict) and value and all(isinstance(v, np.ndarray) for v in value.values()):
+                entry["array_dicts"][field.name] = [_plain(key) for key in value]
+                for key, array in value.items():
+                    arrays[f"{name}.{field.name}.{key}"] = array
+            else:
+                entry["values"][field.name] = _plain(value)
+        header["results"][name] = entry
+
+    _write(path, header, arrays)
+
+
+def _write(path, header, arrays):
+    """
+    Lay out the arrays after the header and write the file atomically.
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+
+    # The header records the array offsets, which depend on the header length;
+    # reserve room for the offsets first, then pad the header to that size.
+    header["arrays"] = {name: [0, list(array.shape), array.dtype.str] for name, array in arrays.items()}
+    reserved = len(json.dumps(header).encode("utf-8")) + 24 * len(arrays) + ALIGNMENT
+    offset = _align(PREAMBLE.size + reserved)
+    for name, array in arrays.items():
+        header["arrays"][name][0] = offset
+        offset = _align(offset + array.nbytes)
+    encoded = json.dumps(header).encode("utf-8")
+    encoded += b" " * (reserved - len(encoded))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, SNAPSHOT_VERSION, len(encoded)))
+        f.write(encoded)
+        for name, array in arrays.items():
+            f.seek(header["arrays"][name][0])
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _plain(value):
+    """
+    JSON-friendly form of a scalar or list result field.
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    return value
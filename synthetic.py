@@ -0,0 +1,99 @@
+"""
+Local stand-ins for Yahoo Finance and WRDS that generate seeded synthetic data.
+
+Values depend only on the seed, the ticker and the date, never on the range
+requested, so incremental fills into the local stores stay consistent.
+"""
+
+import zlib
+
+import numpy as np
+import pandas as pd
+
+
+EPOCH = pd.Timestamp("1990-01-01")  # First date of every synthetic series
+
+
+def _business_days(end):
+    return pd.bdate_range(EPOCH, pd.Timestamp(end) - pd.Timedelta(days=1))
+
+
+def synthetic_prices(ticker, end, seed=0):
+    """
+    Geometric random walk of daily prices for ticker from EPOCH up to end.
+    """
+    dates = _business_days(end)
+    rng = np.random.default_rng([seed, zlib.crc32(ticker.encode())])
+    drift = rng.uniform(-0.0002, 0.0008)
+    volatility = rng.uniform(0.005, 0.035)
+    returns = rng.normal(drift, volatility, len(dates))
+    prices = rng.uniform(10, 500) * np.exp(np.cumsum(returns))
+    return pd.Series(prices, index=dates, name=ticker)
+
+
+def synthetic_factors(end, seed=0):
+    """
+    Daily mktrf, smb, hml and rf factors from EPOCH up to end.
+    """
+    dates = _business_days(end)
+    rng = np.random.default_rng([seed, zlib.crc32(b"ff.factors_daily")])
+    factors = pd.DataFrame({
+        "mktrf": rng.normal(0.04, 1.1, len(dates)),  # Percent, as ff.factors_daily serves them
+        "smb": rng.normal(0.0, 0.5, len(dates)),
+        "hml": rng.normal(0.0, 0.6, len(dates)),
+        "rf": np.full(len(dates), 0.01),
+    }, index=dates)
+    factors.index.name = "date"
+    return factors
+
+
+def synthetic_tickers(count):
+    return [f"SYN{i:04d}" for i in range(count)]
+
+
+def synthetic_profiles(count, tickers, tickers_per_profile=5, seed=0):
+    """
+    Random client profiles in the layout batch.evaluate_profiles expects.
+    """
+    rng = np.random.default_rng([seed, zlib.crc32(b"profiles")])
+    picks = rng.integers(0, len(tickers), size=(count, tickers_per_profile))
+    names = np.asarray(tickers, dtype=object)
+    return pd.DataFrame({
+        "risk_tolerance": rng.choice(["Low", "Medium", "High"], count),
+        "goal_value": rng.choice([20000, 100000, 300000, 500000, 1000000], count),
+        "time_horizon": rng.integers(1, 31, count),
+        "tickers": names[picks].tolist(),
+    })
+
+
+class SyntheticPriceSource:
+    """
+    Drop-in for price_cache.download_adj_close.
+    """
+
+    def __init__(self, seed=0):
+        self.seed = seed
+
+    def __call__(self, tickers, start, end):
+        prices = {}
+        for ticker in tickers:
+            series = synthetic_prices(ticker, end, self.seed)
+            prices[ticker] = series.loc[pd.Timestamp(start):]
+        return prices
+
+
+class SyntheticWRDS:
+    """
+    Drop-in for wrds.Connection serving the Fama-French daily factors table.
+    """
+
+    def __init__(self, seed=0):
+        self.seed = seed
+
+    def raw_sql(self, sql, params=None, date_cols=None):
+        factors = synthetic_factors(params["end"], self.seed)
+        factors = factors.loc[pd.Timestamp(params["start"]):]
+        return factors.reset_index()
+
+    def close(self):
+        pass
@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+
+from background import BackgroundTask, Cancelled
+
+
+class FakeRoot:
+    """
+    Stands in for Tk: after() queues callbacks that run_until_idle() calls on this thread.
+    """
+
+    def __init__(self):
+        self.callbacks = []
+        self.thread = threading.current_thread()
+
+    def after(self, delay_ms, func):
+        self.callbacks.append(func)
+
+    def run_until_idle(self, timeout=5):
+        deadline = time.monotonic() + timeout
+        while self.callbacks:
+            assert time.monotonic() < deadline, "task did not finish"
+            callbacks, self.callbacks = self.callbacks, []
+            for func in callbacks:
+                func()
+            time.sleep(0.005)
+
+
+@pytest.fixture
+def root():
+    return FakeRoot()
+
+
+def record(root, events, kind):
+    def callback(*args):
+        assert threading.current_thread() is root.thread  # Callbacks run on the main loop only
+        events.append((kind,) + args)
+    return callback
+
+
+def callbacks(root, events):
+    return {name: record(root, events, name[3:]) for name in ("on_progress", "on_done", "on_error", "on_cancel")}
+
+
+def test_progress_and_result_are_delivered_on_the_main_loop(root):
+    events = []
+
+    def work(task):
+        for step in range(3):
+            task.progress("Working", step + 1, 3)
+        return 42
+
+    task = BackgroundTask(root, work, **callbacks(root, events))
+    task.start()
+    assert task.running
+    root.run_until_idle()
+
+    assert events == [("progress", "Working", 1, 3), ("progress", "Working", 2, 3), ("progress", "Working", 3, 3),
+                      ("done", 42)]
+    assert not task.running
+
+
+def test_errors_are_delivered_to_on_error(root):
+    events = []
+    error = ValueError("no data")
+
+    def work(task):
+        raise error
+
+    task = BackgroundTask(root, work, **callbacks(root, events))
+    task.start()
+    root.run_until_idle()
+
+    assert events == [("error", error)]
+
+
+def test_cancel_stops_at_the_next_checkpoint(root):
+    events = []
+    started, release = threading.Event(), threading.Event()
+
+    def work(task):
+        started.set()
+        release.wait(5)
+        task.progress("Downloading", 1, 2)
+        return "discarded"
+
+    task = BackgroundTask(root, work, **callbacks(root, events))
+    task.start()
+    started.wait(5)
+    task.cancel()
+    assert task.running  # Until the worker has stopped
+    release.set()
+    root.run_until_idle()
+
+    assert events == [("cancel",)]
+    assert task.cancelled and not task.running
+
+
+def test_result_of_a_cancelled_task_is_discarded(root):
+    events = []
+    task = BackgroundTask(root, lambda task: "late", **callbacks(root, events))
+    task.cancel()
+    task.start()
+    root.run_until_idle()
+
+    assert events == [("cancel",)]
+    with pytest.raises(Cancelled):
+        task.check_cancelled()
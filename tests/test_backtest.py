@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtest
+import batch
+import risk_metrics
+from returns_panel import ReturnsPanel
+
+
+TICKERS = ["AAPL", "KO", "BND"]
+
+
+@pytest.fixture
+def panel():
+    dates = pd.bdate_range("2021-11-15", "2022-08-31")
+    values = np.random.default_rng(3).normal(0.0004, 0.015, (len(dates), len(TICKERS)))
+    values[:20, 1] = np.nan  # KO listed late
+    values[100, 0] = np.nan
+    return ReturnsPanel(dates.to_numpy(dtype="datetime64[ns]"), TICKERS, values)
+
+
+def naive_backtest(panel, target, rule, threshold, cost, initial_value, contribution):
+    """
+    Day-by-day replay of one strategy, rebalancing on the first day of each month.
+    """
+    holdings = target * initial_value
+    level, peak = 1.0, 1.0
+    equity, drawdown, turnover, rebalances = [], [], 0.0, 0
+    previous = None
+    for day, date in enumerate(pd.DatetimeIndex(panel.dates)):
+        if previous is not None and date.month != previous.month:
+            holdings = holdings + target * contribution
+            value = holdings.sum()
+            due = {
+                "monthly": True,
+                "quarterly": date.month in (1, 4, 7, 10),
+                "threshold": np.abs(holdings / value - target).max() > threshold,
+                "never": False,
+            }[rule]
+            if due:
+                traded = np.abs(target * value - holdings).sum()
+                turnover += traded / value
+                level *= 1 - traded * cost / value
+                holdings = target * (value - traded * cost)
+                rebalances += 1
+        previous = date
+        before = holdings.sum()
+        holdings = holdings * (1 + np.nan_to_num(panel.values[day]))
+        level *= holdings.sum() / before
+        peak = max(peak, level)
+        equity.append(holdings.sum())
+        drawdown.append(level / peak - 1)
+    return np.array(equity), np.array(drawdown), turnover, rebalances
+
+
+@pytest.mark.parametrize("rule", backtest.REBALANCE_RULES)
+def test_rules_match_a_daily_loop(panel, rule):
+    targets = np.array([[0.5, 0.3, 0.2], [0.0, 0.6, 0.4], [0.0, 0.0, 1.0]])
+    result = backtest.run_backtest(panel, targets, rebalance=rule, threshold=0.02, cost=0.002,
+                                   initial_value=10000, monthly_contribution=500)
+
+    for row, target in enumerate(targets):
+        equity, drawdown, turnover, rebalances = naive_backtest(panel, target, rule, 0.02, 0.002, 10000, 500)
+        assert np.allclose(result.equity[row], equity)
+        assert np.allclose(result.drawdown[row], drawdown)
+        assert result.turnover[row] == pytest.approx(turnover)
+        assert result.rebalances[row] == rebalances
+    assert result.contributions == 500 * 9  # Ten month starts, the first is the initial investment
+
+
+def test_quarterly_rebalances_at_quarter_starts_only(panel):
+    result = backtest.run_backtest(panel, [0.5, 0.3, 0.2], rebalance="quarterly")
+
+    assert result.rebalances.tolist() == [3]  # 2022-01, 2022-04 and 2022-07
+
+
+def test_never_keeps_costs_at_zero(panel):
+    result = backtest.run_backtest(panel, [0.5, 0.3, 0.2], rebalance="never", monthly_contribution=100)
+
+    assert result.rebalances.tolist() == [0]
+    assert result.costs.tolist() == [0]
+
+
+def test_max_drawdown_is_positive_like_risk_metrics(panel):
+    result = backtest.run_backtest(panel, np.eye(3), rebalance="never")
+
+    assert (result.max_drawdown > 0).all()
+    assert np.allclose(result.max_drawdown, risk_metrics.max_drawdown(panel.values))
+    assert np.allclose(result.max_drawdown, -result.drawdown.min(axis=1))
+
+
+def test_unknown_rule_is_rejected(panel):
+    with pytest.raises(ValueError):
+        backtest.run_backtest(panel, [0.5, 0.3, 0.2], rebalance="weekly")
+
+
+def test_target_weights_split_stocks_equally_and_fall_back_to_bonds(panel):
+    ticker_lists = [["AAPL", "KO", "AAPL"], ["KO", "XYZ"], ["XYZ"], ["AAPL"]]
+    stocks, _ = batch.allocation_split(["Medium", "High", "Low", "Unknown"])
+    weights = backtest.target_weights(panel, ticker_lists, stocks)
+
+    assert np.allclose(weights, [
+        [0.3, 0.3, 0.4],
+        [0.0, 0.8, 0.2],
+        [0.0, 0.0, 1.0],
+        [0.0, 0.0, 1.0],
+    ])
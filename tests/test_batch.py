@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import batch
+import engine
+from returns_panel import ReturnsPanel
+from synthetic import SyntheticPriceSource, synthetic_factors
+
+
+TICKERS = ["AAPL", "KO", "MSFT", "BND"]
+
+
+@pytest.fixture(scope="module")
+def panel():
+    prices = pd.DataFrame(SyntheticPriceSource(0)(TICKERS, "2021-01-01", "2023-01-01"))
+    return ReturnsPanel.from_prices(prices, synthetic_factors("2023-01-01"))
+
+
+@pytest.fixture
+def profiles():
+    return pd.DataFrame({
+        "risk_tolerance": ["Medium", "High", "Low", "Medium", "Extreme", "Low"],
+        "goal_value": [500000, 1000000, 200000, 300000, 400000, 250000],
+        "time_horizon": [10, 25, 5, 8, 12, 30],
+        "tickers": ["AAPL MSFT", "aapl,ko", "", "XYZ QQQQ", "KO", "KO KO BND XYZ"],
+    }, index=[101, 102, 103, 104, 105, 106])
+
+
+def test_each_row_follows_the_engine_formulas(panel, profiles):
+    results = batch.evaluate_profiles(profiles, panel)
+    mean = dict(zip(panel.tickers, panel.mean()))
+
+    assert list(results.columns) == batch.RESULT_COLUMNS
+    assert list(results.index) == list(profiles.index)
+    row = results.loc[101]
+    stock_mean = (mean["AAPL"] + mean["MSFT"]) / 2
+    performance = 60 * stock_mean + 40 * mean["BND"] - panel.rf_mean()
+    assert (row["stocks"], row["bonds"]) == (60, 40)
+    assert row["performance"] == pytest.approx(performance)
+    assert row["current_value"] == pytest.approx(engine.project_value(performance, 10))
+    assert row["monthly_contribution"] == pytest.approx(
+        engine.calculate_monthly_contribution(500000, row["current_value"], 10, performance))
+    assert results.loc[102, "valid_tickers"] == 2  # Tickers are upper-cased
+
+
+def test_profiles_without_usable_data_get_nan_rows(panel, profiles):
+    results = batch.evaluate_profiles(profiles, panel)
+
+    for client in (103, 104):  # No tickers; only tickers without data
+        assert results.loc[client, "valid_tickers"] == 0
+        assert results.loc[client, ["performance", "current_value", "monthly_contribution"]].isna().all()
+    unknown_risk = results.loc[105]
+    assert unknown_risk["valid_tickers"] == 1
+    assert unknown_risk[["stocks", "bonds", "performance", "monthly_contribution"]].isna().all()
+    assert results.loc[106, "valid_tickers"] == 1  # Duplicates, BND and unknown tickers are not counted
+
+
+def test_results_do_not_depend_on_chunks_or_workers(panel, profiles, monkeypatch):
+    many = pd.concat([profiles] * 4, ignore_index=True)
+    many["tickers"] = batch.parse_tickers(many["tickers"])
+    single = batch.evaluate_book(many, panel, rule="quarterly")
+    monkeypatch.setattr(batch, "CHUNK_PROFILES", 5)
+    parallel = batch.evaluate_book(many, panel, rule="quarterly", workers=2)
+
+    assert list(single.columns) == batch.RESULT_COLUMNS + ["total_return", "max_drawdown", "turnover"]
+    pd.testing.assert_frame_equal(single, parallel)
+
+
+def test_allocation_split_looks_up_each_level():
+    stocks, bonds = batch.allocation_split(["Low", "High", "Unknown", "Low"])
+
+    np.testing.assert_array_equal(stocks, [30, 80, np.nan, 30])
+    np.testing.assert_array_equal(bonds, [70, 20, np.nan, 70])
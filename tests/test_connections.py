@@ -0,0 +1,52 @@
+import threading
+
+from connections import ConnectionPool
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_connections_are_reused():
+    opened = []
+    pool = ConnectionPool(lambda: opened.append(FakeConnection()) or opened[-1], max_size=2)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second
+    assert len(opened) == 1
+
+
+def test_connection_in_use_is_closed_when_released_after_close():
+    pool = ConnectionPool(FakeConnection, max_size=2)
+    with pool.connection() as busy:
+        with pool.connection() as idle:
+            pass
+        pool.close()
+        assert idle.closed and not busy.closed
+    assert busy.closed
+    with pool.connection() as fresh:
+        pass
+    assert fresh is not busy and not fresh.closed
+
+
+def test_failed_block_discards_its_connection():
+    pool = ConnectionPool(FakeConnection, max_size=1)
+    try:
+        with pool.connection() as broken:
+            raise RuntimeError("query failed")
+    except RuntimeError:
+        pass
+    assert broken.closed
+
+    # The slot was freed, so a second thread does not block
+    result = []
+    thread = threading.Thread(target=lambda: result.append(pool.connection().__enter__()))
+    thread.start()
+    thread.join(timeout=1)
+    assert result and result[0] is not broken
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import engine
+from returns_panel import ReturnsPanel
+
+
+@pytest.fixture
+def panel():
+    rng = np.random.default_rng(12)
+    dates = pd.bdate_range("2022-01-03", periods=120)
+    values = rng.normal([0.0008, 0.0003, 0.0005, 0.0001], 0.01, (len(dates), 4))
+    values[:10, 2] = np.nan
+    return ReturnsPanel(dates.to_numpy(dtype="datetime64[ns]"), ["AAPL", "KO", "MSFT", "BND"], values,
+                        rng.normal(0, 0.01, (len(dates), 3)), np.full(len(dates), 0.0001))
+
+
+def test_contribution_is_the_annuity_payment_of_the_shortfall():
+    contribution = engine.calculate_monthly_contribution(500000, 200000, 10, 0.06)
+
+    rate = 1.06 ** (1 / 12) - 1
+    assert contribution == pytest.approx(300000 * rate / (1.06 ** 10 - 1))
+    balance = 0.0
+    for _ in range(120):  # Paid at the end of each month, growing at the monthly rate
+        balance = balance * (1 + rate) + contribution
+    assert balance == pytest.approx(300000)
+
+
+@pytest.mark.parametrize("annual_return", [0.0, 1e-15])
+def test_zero_return_splits_the_shortfall_over_the_months(annual_return):
+    assert engine.calculate_monthly_contribution(500000, 200000, 10, annual_return) == pytest.approx(2500)
+    assert engine.calculate_monthly_contribution(500000, 200000, 10) == pytest.approx(2500)
+
+
+def test_negative_returns_need_more_than_the_even_split():
+    assert engine.calculate_monthly_contribution(500000, 200000, 10, -0.02) > 2500
+
+
+@pytest.mark.parametrize("goal, value, years", [(500000, 500000, 10), (500000, 800000, 10), (500000, 0, 0)])
+def test_goal_already_met_or_no_time_needs_no_contribution(goal, value, years):
+    contribution = engine.calculate_monthly_contribution(goal, value, years, 0.05)
+
+    assert contribution == 0.0
+    assert isinstance(contribution, float)
+
+
+def test_arrays_are_broadcast_against_each_other():
+    goals = np.array([[300000], [600000]])
+    returns = np.array([0.0, 0.03, 0.08])
+    contributions = engine.calculate_monthly_contribution(goals, 250000, 15, returns)
+
+    assert contributions.shape == (2, 3)
+    for (row, column), contribution in np.ndenumerate(contributions):
+        assert contribution == pytest.approx(
+            engine.calculate_monthly_contribution(float(goals[row, 0]), 250000, 15, float(returns[column])))
+    assert (np.diff(contributions, axis=1) < 0).all()  # Higher returns need less
+
+
+def test_allocation_returns_match_calculate_performance(panel):
+    weights = {"AAPL": 30, "KO": 10, "MSFT": 20, "BND": 40}
+    shares = np.array([0, 60, 100])
+    returns = engine.allocation_returns(panel, weights, shares)
+
+    assert returns.shape == (3,)
+    for share, expected in zip(shares, returns):
+        scaled = {ticker: weight * share / 60 for ticker, weight in weights.items() if ticker != "BND"}
+        scaled["BND"] = 100 - share
+        assert expected == pytest.approx(engine.calculate_performance(panel, scaled))
+
+
+def test_allocation_returns_weigh_stocks_equally_when_none_are_held(panel):
+    returns = engine.allocation_returns(panel, {"BND": 100}, [90])
+    equal = {"AAPL": 30, "KO": 30, "MSFT": 30, "BND": 10}
+
+    assert returns[0] == pytest.approx(engine.calculate_performance(panel, equal))
+
+
+def test_contribution_grid_covers_every_combination():
+    goals, years, returns = [250000, 1000000], [5, 10, 30], [-0.01, 0.0, 0.04, 0.1]
+    grid = engine.contribution_grid(goals, years, returns)
+
+    assert grid.shape == (2, 3, 4)
+    for (i, j, k), contribution in np.ndenumerate(grid):
+        value = engine.project_value(returns[k], years[j])
+        assert contribution == pytest.approx(
+            engine.calculate_monthly_contribution(goals[i], value, years[j], returns[k]))
+    assert grid[0, 2, 3] == 0.0  # 30 years at 10% grows past the smaller goal on its own
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import factor_model
+from returns_panel import ReturnsPanel
+
+
+@pytest.fixture
+def panel():
+    rng = np.random.default_rng(4)
+    dates = pd.bdate_range("2022-01-03", periods=120)
+    factors = rng.normal(0, 0.01, (len(dates), 3))
+    rf = np.full(len(dates), 0.0001)
+    betas = np.array([[1.2, 0.3, -0.2], [0.8, -0.1, 0.5], [0.1, 0.0, 0.0]])
+    values = 0.0002 + rf[:, None] + factors @ betas.T + rng.normal(0, 0.002, (len(dates), 3))
+    values[:30, 0] = np.nan  # Listed late
+    values[50:55, 1] = np.nan
+    factors[70] = np.nan  # A day without factors is left out for every ticker
+    return ReturnsPanel(dates.to_numpy(dtype="datetime64[ns]"), ["AAPL", "KO", "BND"], values, factors, rf)
+
+
+def lstsq_fit(panel, rows):
+    """
+    Per-ticker least squares of excess returns on an intercept and the factors.
+    """
+    coefficients, r_squared, observations = [], [], []
+    for column in range(len(panel.tickers)):
+        y = panel.values[rows, column] - panel.rf[rows]
+        x = np.column_stack([np.ones(len(rows)), panel.factors[rows]])
+        keep = ~np.isnan(y) & ~np.isnan(x).any(axis=1)
+        beta, *_ = np.linalg.lstsq(x[keep], y[keep], rcond=None)
+        residual = y[keep] - x[keep] @ beta
+        coefficients.append(beta)
+        r_squared.append(1 - residual @ residual / ((y[keep] - y[keep].mean()) ** 2).sum())
+        observations.append(keep.sum())
+    return np.array(coefficients), np.array(r_squared), np.array(observations)
+
+
+def test_fit_matches_least_squares(panel):
+    fit = factor_model.fit_factors(panel)
+    coefficients, r_squared, observations = lstsq_fit(panel, np.arange(len(panel)))
+
+    np.testing.assert_allclose(fit.coefficients, coefficients, atol=1e-10)
+    np.testing.assert_allclose(fit.r_squared, r_squared, atol=1e-8)
+    np.testing.assert_array_equal(fit.observations, observations)
+    assert fit.alpha[:2] == pytest.approx([0.0002, 0.0002], abs=0.0005)
+
+
+def test_rolling_windows_match_a_fit_of_each_window(panel):
+    window, step = 40, 20
+    fits = list(factor_model.rolling_factor_fits(panel, window, step=step))
+
+    assert len(fits) == (len(panel) - window) // step + 1
+    for number, (date, fit) in enumerate(fits):
+        last = window - 1 + number * step
+        assert date == panel.dates[last]
+        coefficients, r_squared, observations = lstsq_fit(panel, np.arange(last - window + 1, last + 1))
+        np.testing.assert_array_equal(fit.observations, observations)
+        np.testing.assert_allclose(fit.coefficients, coefficients, atol=1e-8)
+        np.testing.assert_allclose(fit.r_squared, r_squared, atol=1e-6)
+
+
+def test_rolling_fit_add_and_remove_cancel(panel):
+    rolling = factor_model.RollingFactorFit(panel.tickers)
+    for day in range(10):
+        rolling.add(panel.values[day], panel.factors[day], panel.rf[day])
+    for day in range(10):
+        rolling.remove(panel.values[day], panel.factors[day], panel.rf[day])
+
+    assert not rolling.count.any()
+    np.testing.assert_allclose(rolling.xtx, 0, atol=1e-15)
+    assert np.isnan(rolling.fit().coefficients).all()  # Too few days
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from connections import ConnectionPool
+from factor_store import FactorStore
+from synthetic import SyntheticWRDS, synthetic_factors
+
+
+class CountingWRDS(SyntheticWRDS):
+    queries = []
+
+    def raw_sql(self, sql, params=None, date_cols=None):
+        CountingWRDS.queries.append((params["start"], params["end"]))
+        return super().raw_sql(sql, params, date_cols)
+
+
+def make_store(path):
+    CountingWRDS.queries = []
+    return FactorStore(ConnectionPool(CountingWRDS, max_size=1), store_dir=str(path))
+
+
+def test_stored_factors_round_trip(tmp_path):
+    store = make_store(tmp_path)
+    first = store.get("2020-01-01", "2020-07-01")
+
+    reopened = FactorStore(ConnectionPool(CountingWRDS, max_size=1), store_dir=str(tmp_path))
+    second = reopened.get("2020-01-01", "2020-07-01")
+
+    expected = synthetic_factors("2020-07-01").loc["2020-01-01":]
+    pd.testing.assert_frame_equal(second, first)
+    np.testing.assert_allclose(second.to_numpy(), expected.to_numpy())
+    assert list(second.columns) == ["mktrf", "smb", "hml", "rf"]
+    assert len(CountingWRDS.queries) == 1
+
+
+def test_only_missing_dates_are_queried(tmp_path):
+    store = make_store(tmp_path)
+    store.get("2020-03-01", "2020-06-01")
+    store.get("2020-03-15", "2020-05-01")
+    wide = store.get("2020-01-01", "2020-09-01")
+
+    assert CountingWRDS.queries == [("2020-03-01", "2020-06-01"), ("2020-01-01", "2020-03-01"),
+                                    ("2020-06-01", "2020-09-01")]
+    assert wide.index.is_unique and wide.index.is_monotonic_increasing
+    assert wide.index[0] == pd.Timestamp("2020-01-01")
+    assert wide.index[-1] == pd.Timestamp("2020-08-31")
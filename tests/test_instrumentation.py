@@ -0,0 +1,97 @@
+import json
+import threading
+
+import pytest
+
+import instrumentation
+
+
+@pytest.fixture
+def recording():
+    instrumentation.reset()
+    instrumentation.enable()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+@instrumentation.instrument("test.square")
+def square(x):
+    return x * x
+
+
+def stats():
+    return {row["name"]: row for row in instrumentation.summary()}
+
+
+def test_disabled_instrumentation_records_nothing():
+    instrumentation.reset()
+    assert square(3) == 9
+    with instrumentation.stage("test.stage"):
+        instrumentation.add_bytes(100)
+    assert instrumentation.summary() == []
+
+
+def test_instrument_counts_calls(recording):
+    for x in range(5):
+        assert square(x) == x * x
+
+    row = stats()["test.square"]
+    assert row["calls"] == 5
+    assert row["total_s"] >= row["max_s"] >= 0
+    assert row["mean_s"] == pytest.approx(row["total_s"] / 5)
+
+
+def test_bytes_go_to_the_innermost_stage_of_the_thread(recording):
+    def download():
+        with instrumentation.stage("test.download"):
+            instrumentation.add_bytes(10)
+
+    with instrumentation.stage("test.outer"):
+        instrumentation.add_bytes(1)
+        with instrumentation.stage("test.inner"):
+            instrumentation.add_bytes(5)
+        thread = threading.Thread(target=download)
+        thread.start()
+        thread.join()
+
+    rows = stats()
+    assert {name: rows[name]["bytes"] for name in rows} == {"test.outer": 1, "test.inner": 5, "test.download": 10}
+    assert all(rows[name]["calls"] == 1 for name in rows)
+
+
+def test_exceptions_are_recorded_and_propagated(recording):
+    @instrumentation.instrument("test.fails")
+    def fails():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        fails()
+    assert stats()["test.fails"]["calls"] == 1
+
+
+def test_exports(recording, tmp_path):
+    square(2)
+    with instrumentation.stage("test.stage"):
+        pass
+    instrumentation.export_json(str(tmp_path / "stages.json"))
+    instrumentation.export_chrome_trace(str(tmp_path / "trace.json"))
+
+    stages = json.loads((tmp_path / "stages.json").read_text())["stages"]
+    trace = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    assert sorted(row["name"] for row in stages) == ["test.square", "test.stage"]
+    assert [event["name"] for event in trace] == ["test.square", "test.stage"]
+    assert all(event["ph"] == "X" and event["dur"] >= 0 for event in trace)
+
+
+def test_memory_peaks_are_recorded_when_traced(tmp_path):
+    instrumentation.reset()
+    instrumentation.enable(trace_memory=True)
+    try:
+        with instrumentation.stage("test.allocate"):
+            data = bytearray(5 * 1024 * 1024)
+            del data
+    finally:
+        instrumentation.disable()
+    assert stats()["test.allocate"]["peak_memory"] >= 5 * 1024 * 1024
+    instrumentation.reset()
@@ -0,0 +1,127 @@
+import random
+import time
+
+import pytest
+
+import live_quotes
+from live_quotes import LivePortfolio, LiveUpdater, SimulatedQuoteFeed
+
+
+PRICES = {"AAPL": 150.0, "KO": 60.0, "MSFT": 300.0, "BND": 75.0}
+WEIGHTS = {"AAPL": 30, "KO": 20, "MSFT": 10, "BND": 40, "XYZ": 5, "TSLA": 0}
+
+
+class FakeRoot:
+    """
+    Stands in for Tk: after() schedules callbacks that tick() runs one frame at a time.
+    """
+
+    def __init__(self):
+        self.scheduled = {}
+        self._ids = 0
+
+    def after(self, delay_ms, func):
+        self._ids += 1
+        self.scheduled[self._ids] = func
+        return self._ids
+
+    def after_cancel(self, after_id):
+        del self.scheduled[after_id]
+
+    def tick(self):
+        scheduled, self.scheduled = self.scheduled, {}
+        for func in scheduled.values():
+            func()
+
+
+def recomputed(portfolio):
+    """
+    Value, stock share and weights from the shares and latest prices, summed from scratch.
+    """
+    holdings = {ticker: shares * portfolio.prices[ticker] for ticker, shares in portfolio.shares.items()}
+    value = sum(holdings.values())
+    stocks = sum(holding for ticker, holding in holdings.items() if ticker != "BND")
+    return value, stocks / value, {ticker: holding / value for ticker, holding in holdings.items()}
+
+
+@pytest.fixture
+def portfolio():
+    return LivePortfolio.from_weights(100000, WEIGHTS, PRICES, 250000)
+
+
+def test_from_weights_buys_the_target_mix(portfolio):
+    assert set(portfolio.shares) == {"AAPL", "KO", "MSFT", "BND"}  # No price for XYZ, no weight for TSLA
+    assert portfolio.shares["AAPL"] == pytest.approx(30000 / 150)
+    state = portfolio.state()
+    assert state.value == pytest.approx(100000)
+    assert state.target_stock_share == pytest.approx(0.6)
+    assert state.goal_progress == pytest.approx(0.4)
+    assert state.ticks == 0
+
+
+def test_ticks_match_a_full_recomputation(portfolio):
+    rng = random.Random(4)
+    for _ in range(2000):
+        ticker = rng.choice(["AAPL", "KO", "MSFT", "BND", "XYZ"])
+        portfolio.apply(ticker, PRICES.get(ticker, 10.0) * rng.uniform(0.8, 1.2))
+
+    value, stock_share, weights = recomputed(portfolio)
+    state = portfolio.state()
+    assert state.value == pytest.approx(value)
+    assert state.stock_share == pytest.approx(stock_share)
+    assert state.drift == pytest.approx(stock_share - 0.6)
+    assert state.goal_progress == pytest.approx(value / 250000)
+    assert portfolio.weights() == pytest.approx(weights)
+    assert "XYZ" not in portfolio.prices
+    assert state.ticks < 2000  # Quotes for XYZ are not counted
+
+
+def test_a_tick_updates_one_holding_without_revaluing_the_book(monkeypatch):
+    prices = {f"T{i}": 10.0 + i for i in range(1000)}
+    portfolio = LivePortfolio.from_weights(1e6, {ticker: 0.1 for ticker in prices}, prices, 1e6)
+    resyncs = []
+    monkeypatch.setattr(portfolio, "_resync", lambda: resyncs.append(portfolio.ticks))
+    monkeypatch.setattr(live_quotes, "RESYNC_TICKS", 500)
+
+    for i in range(1200):
+        portfolio.apply(f"T{i % 7}", 20.0)
+
+    assert resyncs == [500, 1000]  # Only the periodic resync visits every holding
+    assert portfolio.state().ticks == 1200
+
+
+def test_updater_renders_once_per_frame_and_only_after_ticks(portfolio):
+    root, rendered = FakeRoot(), []
+    updater = LiveUpdater(root, portfolio, rendered.append)
+    updater.start()
+
+    root.tick()  # First frame shows the starting state
+    root.tick()  # No ticks since: nothing to redraw
+    for price in (151, 152, 153):
+        portfolio.apply("AAPL", price)
+    root.tick()
+
+    assert [state.ticks for state in rendered] == [0, 3]
+    assert updater.frames == 2
+    assert updater.running
+
+    updater.stop()
+    assert not updater.running and root.scheduled == {}
+
+
+def test_seeded_feed_replays_the_same_quotes():
+    def run(seed):
+        ticks = []
+        feed = SimulatedQuoteFeed(PRICES, ticks_per_second=20000, seed=seed, batch_ms=1)
+        feed.subscribe(lambda ticker, price: ticks.append((ticker, price)))
+        deadline = time.monotonic() + 10
+        while len(ticks) < 200 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        feed.close()
+        return ticks[:200]
+
+    first = run(9)
+    assert len(first) == 200
+    assert run(9) == first
+    assert {ticker for ticker, _ in first} <= set(PRICES)
+    assert all(price > 0 for _, price in first)
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+import montecarlo
+
+
+MEAN = np.array([0.010, 0.004])
+COV = np.array([[0.0020, 0.0002], [0.0002, 0.0004]])
+WEIGHTS = [0.6, 0.4]
+
+
+def simulate(**options):
+    arguments = dict(goal_value=200000, years=10, initial_value=100000, monthly_contribution=300, paths=3000, seed=7)
+    arguments.update(options)
+    return montecarlo.simulate_goal(MEAN, COV, WEIGHTS, **arguments)
+
+
+def assert_same(a, b):
+    assert a.probability == b.probability
+    np.testing.assert_array_equal(a.years, b.years)
+    for percentile in montecarlo.PERCENTILES:
+        np.testing.assert_array_equal(a.bands[percentile], b.bands[percentile])
+
+
+def test_same_seed_gives_the_same_result():
+    assert_same(simulate(), simulate())
+    assert simulate(seed=8).bands[50][-1] != simulate().bands[50][-1]
+
+
+@pytest.mark.parametrize("chunk_bytes", [1, 200000, 10 ** 9])
+def test_results_do_not_depend_on_chunk_size(chunk_bytes):
+    assert_same(simulate(chunk_bytes=chunk_bytes), simulate())
+
+
+def test_results_do_not_depend_on_workers():
+    assert_same(simulate(chunk_bytes=1, workers=2), simulate())
+
+
+def test_zero_volatility_matches_the_future_value():
+    result = montecarlo.simulate_goal(MEAN, np.zeros((2, 2)), WEIGHTS, goal_value=0, years=5,
+                                      initial_value=100000, monthly_contribution=500, paths=100, seed=0)
+    rate = float(np.dot(WEIGHTS, MEAN))
+    months = 12 * np.arange(1, 6)
+    growth = (1 + rate) ** months
+    expected = 100000 * growth + 500 * (growth - 1) / rate
+
+    np.testing.assert_array_equal(result.years, np.arange(1, 6))
+    for percentile in montecarlo.PERCENTILES:
+        np.testing.assert_allclose(result.bands[percentile], expected, rtol=1e-10)
+    assert result.probability == 1.0
+    above = montecarlo.simulate_goal(MEAN, np.zeros((2, 2)), WEIGHTS, goal_value=expected[-1] * 1.001, years=5,
+                                     initial_value=100000, monthly_contribution=500, paths=100)
+    assert above.probability == 0.0
+
+
+def test_bands_are_ordered_and_counted():
+    result = simulate()
+
+    assert result.paths == 3000
+    stacked = np.array([result.bands[percentile] for percentile in montecarlo.PERCENTILES])
+    assert (np.diff(stacked, axis=0) >= 0).all()
+    assert 0 < result.probability < 1
+
+
+def test_no_time_left_only_compares_the_current_value():
+    result = simulate(years=0)
+    assert result.probability == 0.0
+    assert result.years.size == 0
+    assert simulate(years=0, goal_value=50000).probability == 1.0
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+import optimizer
+from returns_panel import ReturnsPanel
+
+
+MEAN = np.array([0.0002, 0.0006, 0.0010])
+COV = np.array([
+    [0.00004, 0.00001, 0.00000],
+    [0.00001, 0.00016, 0.00004],
+    [0.00000, 0.00004, 0.00064],
+])
+
+
+def brute_force(mean, cov, aversion, steps=200):
+    """
+    Best long-only weights on a grid over the simplex of three assets.
+    """
+    best, best_value = None, -np.inf
+    for i in range(steps + 1):
+        for j in range(steps + 1 - i):
+            w = np.array([i, j, steps - i - j]) / steps
+            value = w @ mean - aversion / 2 * w @ cov @ w
+            if value > best_value:
+                best, best_value = w, value
+    return best
+
+
+def test_frontier_points_are_long_only_and_sorted_by_volatility():
+    frontier = optimizer.efficient_frontier(["A", "B", "C"], MEAN, COV)
+
+    assert np.allclose(frontier.weights.sum(axis=1), 1)
+    assert (frontier.weights >= 0).all()
+    assert (np.diff(frontier.volatility) >= 0).all()
+    assert (np.diff(frontier.returns) >= -1e-12).all()
+
+
+def test_frontier_ends_at_minimum_variance_and_maximum_return():
+    frontier = optimizer.efficient_frontier(["A", "B", "C"], MEAN, COV)
+
+    inverse = np.linalg.inv(COV)
+    minimum_variance = inverse.sum(axis=1) / inverse.sum()  # Long-only holds here: all weights positive
+    assert (minimum_variance > 0).all()
+    np.testing.assert_allclose(frontier.weights[0], minimum_variance, atol=0.02)
+    assert frontier.weights[-1].argmax() == 2
+
+
+def test_solve_point_matches_brute_force():
+    lipschitz = np.linalg.eigvalsh(COV)[-1]
+    for aversion in (2.0, 10.0, 40.0):
+        w = optimizer.solve_point(MEAN, COV, aversion, lipschitz, np.full(3, 1 / 3), iterations=5000)
+        expected = brute_force(MEAN, COV, aversion)
+        value = lambda x: x @ MEAN - aversion / 2 * x @ COV @ x
+        assert value(w) >= value(expected) - 1e-9
+
+
+def test_pick_orders_risk_tolerances():
+    frontier = optimizer.efficient_frontier(["A", "B", "C"], MEAN, COV)
+    volatility = {}
+    for risk in ("Low", "Medium", "High"):
+        w = np.array(list(frontier.pick(risk).values()))
+        volatility[risk] = np.sqrt(w @ COV @ w)
+    assert volatility["Low"] < volatility["Medium"] < volatility["High"]
+
+
+def test_cache_reuses_frontier_for_same_tickers_and_window():
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2021-01-01", periods=300)
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0.0005, 0.01, (300, 3)), axis=0)),
+                          index=dates, columns=["MSFT", "AAPL", "BND"])
+    cache = optimizer.FrontierCache()
+
+    mean, cov, frontier = cache.get(ReturnsPanel.from_prices(prices))
+    again = cache.get(ReturnsPanel.from_prices(prices[["BND", "AAPL", "MSFT"]]))
+
+    assert frontier.tickers == ["AAPL", "BND", "MSFT"]
+    assert again[2] is frontier
+    np.testing.assert_allclose(mean, prices[["AAPL", "BND", "MSFT"]].pct_change().mean().to_numpy())
+    np.testing.assert_allclose(cov, prices[["AAPL", "BND", "MSFT"]].pct_change().cov().to_numpy())
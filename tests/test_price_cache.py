@@ -0,0 +1,150 @@
+import time
+
+import pandas as pd
+import pytest
+
+import price_cache
+from price_cache import PriceCache
+
+
+class FakeDownloader:
+    """
+    Business-day prices for known tickers; records every request.
+    """
+
+    def __init__(self, known=("AAPL", "MSFT", "KO")):
+        self.known = set(known)
+        self.calls = []
+
+    def __call__(self, tickers, start, end):
+        self.calls.append((tuple(tickers), start, end))
+        dates = pd.bdate_range(start, pd.Timestamp(end) - pd.Timedelta(days=1))
+        return {ticker: pd.Series(range(1, len(dates) + 1), index=dates, dtype="float64", name=ticker)
+                for ticker in tickers if ticker in self.known and len(dates)}
+
+
+@pytest.fixture
+def downloader():
+    return FakeDownloader()
+
+
+@pytest.fixture
+def cache(tmp_path, downloader):
+    return PriceCache(cache_dir=str(tmp_path), downloader=downloader)
+
+
+def test_repeat_request_is_served_from_disk(cache, downloader):
+    first, failed = cache.get_many(["AAPL", "MSFT"], "2021-01-04", "2021-02-01")
+    second, _ = cache.get_many(["AAPL", "MSFT"], "2021-01-04", "2021-02-01")
+
+    assert failed == []
+    assert len(downloader.calls) == 1
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_only_missing_edges_are_downloaded(cache, downloader):
+    cache.get_many(["AAPL"], "2021-02-01", "2021-03-01")
+    panel, _ = cache.get_many(["AAPL"], "2021-01-04", "2021-04-01")
+
+    assert downloader.calls[1:] == [(("AAPL",), "2021-01-04", "2021-02-01"), (("AAPL",), "2021-03-01", "2021-04-01")]
+    assert panel.index[0] == pd.Timestamp("2021-01-04")
+    assert panel.index[-1] == pd.Timestamp("2021-03-31")
+    assert panel.index.is_unique
+
+
+def test_tickers_missing_the_same_range_share_one_request(cache, downloader):
+    cache.get_many(["AAPL"], "2021-01-04", "2021-02-01")
+    cache.get_many(["AAPL", "MSFT", "KO"], "2021-01-04", "2021-02-01")
+
+    assert downloader.calls[1] == (("MSFT", "KO"), "2021-01-04", "2021-02-01")
+
+
+def test_empty_answers_next_to_data_are_not_requested_again(cache, downloader):
+    _, failed = cache.get_many(["AAPL", "DELISTED"], "2021-01-04", "2021-02-01")
+    _, failed_again = cache.get_many(["AAPL", "DELISTED"], "2021-01-04", "2021-02-01")
+    # A weekend-only tail is not requested at all
+    cache.get_many(["AAPL"], "2021-01-04", "2021-02-06")
+    calls = len(downloader.calls)
+    cache.get_many(["AAPL"], "2021-01-04", "2021-02-08")
+
+    assert failed == failed_again == ["DELISTED"]
+    assert len(downloader.calls) == calls
+
+
+def test_empty_answers_are_retried_after_a_day(cache, downloader, monkeypatch):
+    cache.get_many(["AAPL", "DELISTED"], "2021-01-04", "2021-02-01")
+    later = time.time() + price_cache.EMPTY_RETRY_SECONDS + 1
+    monkeypatch.setattr(price_cache.time, "time", lambda: later)
+    downloader.known.add("DELISTED")
+
+    _, failed = cache.get_many(["AAPL", "DELISTED"], "2021-01-04", "2021-02-01")
+    assert failed == []
+    assert downloader.calls[-1] == (("DELISTED",), "2021-01-04", "2021-02-01")
+
+
+class FlakyDownloader(FakeDownloader):
+    """
+    Answers nothing at all for the first failures calls, as a failed yfinance batch does.
+    """
+
+    def __init__(self, failures=1):
+        super().__init__()
+        self.failures = failures
+
+    def __call__(self, tickers, start, end):
+        prices = super().__call__(tickers, start, end)
+        if self.failures:
+            self.failures -= 1
+            return {}
+        return prices
+
+
+def test_failed_download_is_retried_on_the_next_call(tmp_path):
+    downloader = FlakyDownloader()
+    cache = PriceCache(cache_dir=str(tmp_path), downloader=downloader)
+
+    _, failed = cache.get_many(["AAPL", "MSFT"], "2021-01-04", "2021-02-01")
+    assert failed == ["AAPL", "MSFT"]
+    panel, failed = cache.get_many(["AAPL", "MSFT"], "2021-01-04", "2021-02-01")
+
+    assert failed == []
+    assert list(panel.columns) == ["AAPL", "MSFT"]
+    assert len(downloader.calls) == 2
+
+
+def test_failed_edge_download_keeps_the_gap_open(tmp_path):
+    downloader = FlakyDownloader(failures=0)
+    cache = PriceCache(cache_dir=str(tmp_path), downloader=downloader)
+    cache.get_many(["AAPL"], "2021-01-04", "2021-02-01")
+    downloader.failures = 1
+
+    panel, _ = cache.get_many(["AAPL"], "2021-01-04", "2021-03-01")
+    assert panel.index[-1] < pd.Timestamp("2021-02-01")
+    panel, _ = cache.get_many(["AAPL"], "2021-01-04", "2021-03-01")
+    assert panel.index[-1] == pd.Timestamp("2021-02-26")
+    assert downloader.calls[-1] == (("AAPL",), "2021-02-01", "2021-03-01")
+
+
+def test_least_recently_used_tickers_are_evicted(tmp_path, downloader):
+    cache = PriceCache(cache_dir=str(tmp_path), downloader=downloader, max_tickers=2)
+    cache.get_many(["AAPL"], "2021-01-04", "2021-02-01")
+    cache.get_many(["MSFT"], "2021-01-04", "2021-02-01")
+    cache.get_many(["AAPL"], "2021-01-04", "2021-02-01")  # AAPL is now the most recent
+    cache.get_many(["KO"], "2021-01-04", "2021-02-01")
+
+    reopened = PriceCache(cache_dir=str(tmp_path), downloader=downloader)
+    assert sorted(reopened._index) == ["AAPL", "KO"]
+    calls = len(downloader.calls)
+    reopened.get_many(["MSFT"], "2021-01-04", "2021-02-01")
+    assert len(downloader.calls) == calls + 1
+
+
+def test_unreadable_file_is_fetched_again(cache, downloader, tmp_path):
+    cache.get_many(["AAPL"], "2021-01-04", "2021-02-01")
+    with open(cache._path("AAPL"), "wb") as f:
+        f.write(b"not a price file")
+
+    panel, failed = cache.get_many(["AAPL"], "2021-01-04", "2021-02-01")
+    assert failed == []
+    assert len(panel) == 20
+    assert len(downloader.calls) == 2
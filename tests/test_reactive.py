@@ -0,0 +1,136 @@
+import numpy as np
+import pytest
+
+from reactive import Debouncer, Graph
+
+
+@pytest.fixture
+def graph():
+    """
+    a -> double -> total <- triple <- a, plus b -> total, and c on its own.
+    """
+    graph = Graph()
+    graph.calls = []
+
+    def node(name, func, *deps):
+        def compute(*args):
+            graph.calls.append(name)
+            return func(*args)
+        graph.node(name, compute, *deps)
+
+    graph.input("a", 1)
+    graph.input("b", 10)
+    graph.input("c", 100)
+    node("double", lambda a: 2 * a, "a")
+    node("triple", lambda a: 3 * a, "a")
+    node("total", lambda double, triple, b: double + triple + b, "double", "triple", "b")
+    node("c_squared", lambda c: c * c, "c")
+    return graph
+
+
+def test_nodes_are_computed_lazily_and_once(graph):
+    assert graph.calls == []
+    assert graph.get("total") == 15
+    assert graph.calls == ["double", "triple", "total"]
+    assert graph.get("total") == 15
+    assert graph.computations == 3
+
+
+def test_set_invalidates_only_downstream_nodes(graph):
+    graph.get("total")
+    graph.get("c_squared")
+    graph.calls.clear()
+
+    graph.set("b", 20)
+    assert [name for name in ("double", "triple", "total", "c_squared") if graph.stale(name)] == ["total"]
+    assert graph.get("total") == 25
+    assert graph.calls == ["total"]
+
+    graph.set("a", 2)
+    assert graph.get("total") == 30
+    assert graph.calls == ["total", "double", "triple", "total"]  # Dependencies before the node, each once
+    assert not graph.stale("c_squared")
+
+
+def test_unchanged_values_do_not_invalidate(graph):
+    graph.get("total")
+    graph.set("a", 1)
+    assert not graph.stale("total")
+
+    graph.input("weights", np.zeros(2))
+    graph.node("weights_sum", lambda weights: weights.sum(), "weights")
+    graph.get("weights_sum")
+    graph.set("weights", np.ones(2))  # Arrays compare elementwise; always counted as a change
+    assert graph.get("weights_sum") == 2
+
+
+def test_flush_runs_the_watchers_of_changed_nodes_in_order(graph):
+    seen = []
+    graph.watch(lambda total: seen.append(("total", total)), "total")
+    graph.watch(lambda c: seen.append(("c_squared", c)), "c_squared")
+    graph.watch(lambda double, b: seen.append(("double_b", double, b)), "double", "b")
+
+    graph.flush()
+    assert seen == []  # Nothing changed since the graph was built
+
+    graph.set("a", 2)
+    graph.set("c", 3)
+    graph.flush()
+    assert seen == [("total", 20), ("c_squared", 9), ("double_b", 4, 10)]
+
+    seen.clear()
+    graph.set("b", 11)
+    graph.flush()
+    graph.flush()
+    assert seen == [("total", 21), ("double_b", 4, 11)]
+
+
+def test_provided_values_hold_until_an_upstream_input_changes(graph):
+    graph.provide("total", 1000)
+    assert graph.get("total") == 1000
+    assert graph.calls == []
+
+    graph.set("b", 11)
+    assert graph.get("total") == 16
+
+
+def test_invalid_definitions_are_rejected(graph):
+    with pytest.raises(KeyError):
+        graph.set("total", 1)
+    with pytest.raises(KeyError):
+        graph.node("late", lambda x: x, "missing")
+
+
+class FakeRoot:
+    def __init__(self):
+        self.pending = {}
+        self.next_id = 0
+
+    def after(self, delay_ms, func):
+        self.next_id += 1
+        self.pending[self.next_id] = func
+        return self.next_id
+
+    def after_cancel(self, after_id):
+        del self.pending[after_id]
+
+    def run(self):
+        pending, self.pending = self.pending, {}
+        for func in pending.values():
+            func()
+
+
+def test_debouncer_coalesces_bursts():
+    root, fired = FakeRoot(), []
+    debounce = Debouncer(root, 300, lambda: fired.append(len(fired)))
+
+    for _ in range(5):
+        debounce("keystroke")
+    assert len(root.pending) == 1
+    root.run()
+    assert fired == [0]
+
+    debounce()
+    debounce.cancel()
+    root.run()
+    assert fired == [0]
@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+
+import engine
+import reports
+from batch import parse_tickers
+from returns_panel import ReturnsPanel
+from synthetic import SyntheticPriceSource, synthetic_factors
+
+
+@pytest.fixture(scope="module")
+def panel():
+    prices = pd.DataFrame(SyntheticPriceSource(0)(["AAPL", "KO", "BND"], "2021-01-01", "2023-01-01"))
+    return ReturnsPanel.from_prices(prices, synthetic_factors("2023-01-01"))
+
+
+@pytest.fixture
+def profiles():
+    profiles = pd.DataFrame({
+        "risk_tolerance": ["Medium", "Low", "High"],
+        "goal_type": ["Retirement", "House", "College"],
+        "goal_value": [500000, 200000, 300000],
+        "time_horizon": [10, 5, 15],
+        "tickers": ["AAPL KO", "XYZ", "KO XYZ"],
+    }, index=pd.Index(["a", "b", "c"], name="client_id"))
+    profiles["tickers"] = parse_tickers(profiles["tickers"])
+    return profiles
+
+
+def test_client_panel_keeps_stocks_with_data_and_bnd(panel):
+    profile = engine.Profile(risk_tolerance="High", tickers=["KO", "XYZ", "BND", "KO"])
+    client, failed = reports.client_panel(panel, profile)
+
+    assert client.tickers == ["BND", "KO"]
+    assert failed == ["XYZ"]
+    with pytest.raises(ValueError):
+        reports.client_panel(panel, engine.Profile(tickers=["XYZ"]))
+
+
+def test_summary_lines_describe_the_result(panel):
+    profile = engine.Profile(risk_tolerance="Medium", goal_type="House", goal_value=300000, time_horizon=8,
+                             tickers=["AAPL", "XYZ"])
+    client, failed = reports.client_panel(panel, profile)
+    result = engine.evaluate_panel(profile, client, failed, simulated_paths=200, seed=0)
+    lines = reports.summary_lines(profile, result)
+
+    assert lines[0] == "Goal Type: House"
+    assert "Selected Stocks: AAPL, XYZ" in lines
+    assert any(line.startswith("Chance of Reaching Goal: ") for line in lines)
+    assert "No data for: XYZ" in lines
+
+
+@pytest.mark.parametrize("file_format", ["png", "pdf"])
+def test_render_chunk_writes_one_page_per_client_with_data(panel, profiles, tmp_path, file_format, monkeypatch):
+    pytest.importorskip("matplotlib")
+    monkeypatch.setattr(reports, "_page", None)
+
+    written = reports.render_chunk(panel, (profiles, str(tmp_path), file_format, 200, 0))
+
+    assert written == [str(tmp_path / f"client_{client}.{file_format}") for client in ("a", "c")]
+    for path in written:
+        with open(path, "rb") as f:
+            assert f.read(4) == (b"\x89PNG" if file_format == "png" else b"%PDF")
+    page = reports._page
+    assert reports.render_chunk(panel, (profiles.iloc[:1], str(tmp_path), file_format, 200, 0)) == written[:1]
+    assert reports._page is page  # One figure per process, reused
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from returns_panel import ReturnsPanel, align_dates
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(1)
+    dates = pd.bdate_range("2022-01-03", periods=60)
+    frame = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (60, 3)), axis=0)),
+                         index=dates, columns=["AAPL", "KO", "BND"])
+    frame.iloc[10:15, 1] = np.nan  # KO missing for a week
+    frame.iloc[:5, 0] = np.nan  # AAPL listed late
+    return frame
+
+
+@pytest.fixture
+def factors(prices):
+    # Factors on a calendar with one extra day and two days missing
+    dates = prices.index[3:].delete([20, 21]).append(pd.DatetimeIndex(["2022-12-30"]))
+    rng = np.random.default_rng(2)
+    frame = pd.DataFrame(rng.normal(0, 1, (len(dates), 3)), index=dates, columns=["mktrf", "smb", "hml"])
+    frame["rf"] = 0.01  # Percent, like ff.factors_daily
+    return frame
+
+
+def test_returns_match_pandas(prices):
+    panel = ReturnsPanel.from_prices(prices)
+    expected = prices.pct_change(fill_method=None).iloc[1:]
+
+    np.testing.assert_allclose(panel.values, expected.to_numpy(), equal_nan=True)
+    np.testing.assert_array_equal(panel.mask, expected.notna().to_numpy())
+    np.testing.assert_allclose(panel.mean(), expected.mean().to_numpy())
+    np.testing.assert_allclose(panel.std(), expected.std().to_numpy())
+    np.testing.assert_allclose(panel.cov(), expected.cov().to_numpy())
+
+
+def test_factors_are_joined_by_date(prices, factors):
+    panel = ReturnsPanel.from_prices(prices, factors)
+    expected = factors.reindex(prices.index[1:])
+
+    assert panel.factors.shape == (len(panel), 3)
+    np.testing.assert_allclose(panel.factors, expected[["mktrf", "smb", "hml"]].to_numpy() / 100,
+                               equal_nan=True)
+    assert np.isnan(panel.factors[:2]).all()  # Before the factor calendar starts
+    assert np.isnan(panel.rf).sum() == expected["rf"].isna().sum()
+
+
+def test_factors_and_rf_are_daily_fractions(prices, factors):
+    panel = ReturnsPanel.from_prices(prices, factors)
+
+    assert np.nanmax(panel.rf) == pytest.approx(0.0001)
+    assert panel.rf_mean() == pytest.approx(0.0001)
+    assert panel.window("2022-02-01", "2022-03-01").rf_mean() == pytest.approx(0.0001)
+    assert np.nanstd(panel.factors, axis=0) == pytest.approx(np.full(3, 0.01), rel=0.2)
+
+
+def test_align_dates_marks_missing_days():
+    calendar = np.array(["2022-01-03", "2022-01-04", "2022-01-05", "2022-01-10"], dtype="datetime64[ns]")
+    dates = np.array(["2022-01-04", "2022-01-05", "2022-01-06"], dtype="datetime64[ns]")
+    np.testing.assert_array_equal(align_dates(calendar, dates), [-1, 0, 1, -1])
+    np.testing.assert_array_equal(align_dates(calendar, dates[:0]), [-1, -1, -1, -1])
+
+
+def test_window_and_select_share_the_calendar(prices, factors):
+    panel = ReturnsPanel.from_prices(prices, factors)
+
+    window = panel.window("2022-02-01", "2022-03-01")
+    assert window.dates[0] >= np.datetime64("2022-02-01")
+    assert window.dates[-1] < np.datetime64("2022-03-01")
+    assert np.shares_memory(window.values, panel.values)
+
+    selected = panel.select(["BND", "AAPL"])
+    assert selected.tickers == ["BND", "AAPL"]
+    np.testing.assert_allclose(selected.column("AAPL"), panel.column("AAPL"), equal_nan=True)
+    assert selected.rf is panel.rf
+    with pytest.raises(KeyError):
+        panel.select(["MSFT"])
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import risk_metrics
+from returns_panel import ReturnsPanel
+
+
+@pytest.fixture
+def panel():
+    rng = np.random.default_rng(5)
+    dates = pd.bdate_range("2022-01-03", periods=300)
+    values = rng.normal(0.0003, 0.012, (len(dates), 3))
+    values[:40, 0] = np.nan  # Listed late
+    values[200:210, 1] = np.nan
+    return ReturnsPanel(dates.to_numpy(dtype="datetime64[ns]"), ["AAPL", "KO", "BND"], values)
+
+
+def naive_metrics(column, window, confidence=risk_metrics.CONFIDENCE):
+    """
+    The metrics of one column of returns from pandas, one figure at a time.
+    """
+    returns = pd.Series(column).dropna()
+    recent = pd.Series(column[-window:]).dropna()
+    cutoff = recent.quantile(1 - confidence)
+    wealth = (1 + pd.Series(column).fillna(0)).cumprod()
+    peak = wealth.cummax().clip(lower=1)
+    downside = np.sqrt((returns.clip(upper=0) ** 2).mean())
+    return {
+        "var_historical": -cutoff,
+        "cvar_historical": -recent[recent <= cutoff].mean(),
+        "max_drawdown": 1 - (wealth / peak).min(),
+        "sortino": returns.mean() / downside * np.sqrt(252),
+        "volatility": returns.std() * np.sqrt(252),
+    }
+
+
+def test_compute_risk_matches_pandas_on_the_same_window(panel):
+    weights = np.array([0.5, 0.3, 0.2])
+    risk = risk_metrics.compute_risk(panel, weights, window=60)
+    portfolio = np.where(panel.mask, panel.values, 0) @ weights
+
+    columns = dict(zip(panel.tickers, panel.values.T))
+    columns["Portfolio"] = portfolio
+    for ticker, column in columns.items():
+        row = risk.row(ticker)
+        for name, expected in naive_metrics(column, 60).items():
+            assert row[name] == pytest.approx(expected), (ticker, name)
+
+
+def test_window_only_changes_historical_var(panel):
+    full = risk_metrics.compute_risk(panel)
+    recent = risk_metrics.compute_risk(panel, window=60)
+
+    var, cvar = risk_metrics.historical_var(panel.values[-60:])
+    np.testing.assert_allclose(recent.var_historical, var)
+    np.testing.assert_allclose(recent.cvar_historical, cvar)
+    np.testing.assert_allclose(recent.volatility, full.volatility)
+    np.testing.assert_allclose(recent.max_drawdown, full.max_drawdown)
+
+
+def test_parametric_var_uses_the_normal_quantile():
+    var, cvar = risk_metrics.parametric_var(np.array([0.001]), np.array([0.02]), 0.95)
+
+    assert var[0] == pytest.approx(1.6448536 * 0.02 - 0.001)
+    assert cvar[0] == pytest.approx(0.02 * 0.1031356 / 0.05 - 0.001, rel=1e-6)
+
+
+def test_rolling_volatility_matches_pandas(panel):
+    result = risk_metrics.rolling_volatility(panel.values, window=21)
+    expected = pd.DataFrame(panel.values).rolling(21, min_periods=2).std() * np.sqrt(252)
+
+    np.testing.assert_allclose(result[20:], expected.to_numpy()[20:], equal_nan=True)
+    assert np.isnan(result[:20]).all()
+
+
+@pytest.mark.parametrize("step", [1, 5])
+def test_rolling_var_matches_pandas(panel, step):
+    result = risk_metrics.rolling_var(panel.values, window=60, step=step, chunk_windows=7)
+    expected = -pd.DataFrame(panel.values).rolling(60, min_periods=1).quantile(0.05)
+
+    np.testing.assert_allclose(result, expected.to_numpy()[59::step], equal_nan=True)
+    assert risk_metrics.rolling_var(panel.values[:10], window=60).shape == (0, 3)
+
+
+@pytest.mark.parametrize("blocks", [[300], [1] * 300, [7, 100, 1, 192]])
+def test_risk_state_appends_match_a_full_recomputation(panel, blocks):
+    state = risk_metrics.RiskState(panel.tickers, window=60)
+    start = 0
+    for size in blocks:
+        state.append(panel.values[start:start + size])
+        start += size
+    incremental = state.metrics()
+    full = risk_metrics.risk_from_returns(panel.tickers, panel.values, window=60)
+
+    for name in ("var_historical", "cvar_historical", "var_parametric", "cvar_parametric",
+                 "max_drawdown", "sortino", "volatility"):
+        np.testing.assert_allclose(getattr(incremental, name), getattr(full, name), err_msg=name)
+
+
+def test_risk_state_covers_the_days_seen_before_the_window_fills(panel):
+    state = risk_metrics.RiskState(panel.tickers, window=60)
+    state.append(panel.values[:45])
+    state.append(np.empty((0, 3)))
+
+    expected = risk_metrics.risk_from_returns(panel.tickers, panel.values[:45])
+    np.testing.assert_allclose(state.metrics().var_historical, expected.var_historical, equal_nan=True)
+    np.testing.assert_allclose(state.metrics().max_drawdown, expected.max_drawdown)
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from price_cache import PriceCache
+from screening import ScreeningIndex
+from synthetic import SyntheticPriceSource, synthetic_factors
+
+
+UNIVERSE = {"AAPL": "Technology", "KO": "Consumer Defensive", "VTI": "Fund"}
+
+
+@pytest.fixture
+def index(tmp_path):
+    return ScreeningIndex(str(tmp_path / "screen"))
+
+
+@pytest.fixture
+def fetch_many(tmp_path):
+    cache = PriceCache(cache_dir=str(tmp_path / "prices"), downloader=SyntheticPriceSource(0))
+    calls = []
+
+    def fetch(tickers, start, end):
+        calls.append(list(tickers))
+        return cache.get_many(tickers, start, end)
+
+    fetch.calls = calls
+    return fetch
+
+
+def fetch_factors(start, end):
+    return synthetic_factors(end).loc[start:end]
+
+
+def test_refresh_fills_the_index_and_saves_once(index, fetch_many, monkeypatch):
+    saves = []
+    monkeypatch.setattr(index, "_save", lambda: saves.append(len(index)))
+
+    refreshed = index.refresh(UNIVERSE, fetch_many, fetch_factors, today="2024-06-14", batch_size=1)
+
+    assert refreshed == 3
+    assert saves == [3]
+    assert index.tickers.tolist() == ["AAPL", "KO", "VTI"]
+    assert index.row("VTI")["sector"] == "Fund"
+    assert index.updated.tolist() == [np.datetime64("2024-06-13")] * 3  # Last price before today
+
+
+def test_rows_stay_fresh_for_a_few_trading_days(index, fetch_many):
+    index.refresh(UNIVERSE, fetch_many, fetch_factors, today="2024-06-14")
+
+    assert index.stale(["AAPL", "MSFT"], today="2024-06-17") == ["MSFT"]
+    assert index.stale(["AAPL"], today="2024-06-20") == []  # Five trading days after the last price
+    assert index.stale(["AAPL"], today="2024-06-21") == ["AAPL"]
+
+    fetch_many.calls.clear()
+    assert index.refresh(UNIVERSE, fetch_many, fetch_factors, today="2024-06-18") == 0
+    assert fetch_many.calls == []
+
+
+def test_saved_index_is_reloaded(index, fetch_many):
+    index.refresh(UNIVERSE, fetch_many, fetch_factors, today="2024-06-14")
+    reopened = ScreeningIndex(index.store_dir)
+
+    assert reopened.tickers.tolist() == index.tickers.tolist()
+    np.testing.assert_array_equal(reopened.values, index.values)
+    assert reopened.query(sectors=["Technology"]) == ["AAPL"]
+
+
+def test_query_ranges_and_order(index):
+    index.update(["A", "B", "C", "D"], ["Fund", "Technology", "Fund", "Fund"],
+                 [[0.1, 0.9, 0.05], [0.3, 1.2, 0.20], [0.2, 1.0, 0.10], [0.5, 1.5, np.nan]], "2024-06-14")
+
+    assert index.query(volatility=(0, 0.25)) == ["C", "A"]
+    assert index.query(volatility=(0, 1), beta=(1.0, 2.0), descending=False) == ["C", "B"]
+    assert index.query(sectors=["Fund"], limit=1) == ["C"]
+    assert index.range("volatility", 0.2, 0.5).tolist() == [2, 1]
+    assert pd.isna(index.row("D")["annual_return"])
@@ -0,0 +1,154 @@
+import asyncio
+import gc
+import json
+import threading
+import time
+
+import pytest
+
+import server
+from price_cache import PriceCache
+from synthetic import SyntheticPriceSource, synthetic_factors
+
+
+class StubProviders:
+    """
+    Synthetic prices and factors behind slow, counted fetches.
+    """
+
+    def __init__(self, cache_dir, delay=0.1, fail=False):
+        self.cache = PriceCache(cache_dir=cache_dir, downloader=SyntheticPriceSource(0))
+        self.delay = delay
+        self.fail = fail
+        self.price_calls = []
+        self.factor_calls = 0
+        self._lock = threading.Lock()
+
+    def fetch_many(self, tickers, start, end):
+        with self._lock:
+            self.price_calls.append(sorted(tickers))
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("provider down")
+        return self.cache.get_many(tickers, start, end)
+
+    def fetch_fama_french(self, start, end):
+        with self._lock:
+            self.factor_calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("provider down")
+        return synthetic_factors(end).loc[start:end]
+
+
+@pytest.fixture
+def providers(tmp_path):
+    return StubProviders(str(tmp_path / "prices"))
+
+
+def make_service(providers, **options):
+    return server.AdvisorService(providers.fetch_many, providers.fetch_fama_french, simulated_paths=200,
+                                 start="2022-01-01", end="2023-01-01", **options)
+
+
+def body(**fields):
+    payload = {"risk_tolerance": "Medium", "goal_value": 500000, "time_horizon": 15, "tickers": ["AAPL", "MSFT"]}
+    payload.update(fields)
+    return json.dumps(payload).encode()
+
+
+def test_concurrent_requests_share_one_fetch_of_each_kind(providers):
+    service = make_service(providers)
+
+    async def run():
+        return await asyncio.gather(*(service.dispatch("POST", "/evaluate", body()) for _ in range(8)))
+
+    try:
+        responses = asyncio.run(run())
+    finally:
+        service.close()
+
+    assert [status for status, _ in responses] == [200] * 8
+    assert providers.price_calls == [["AAPL", "BND", "MSFT"]]
+    assert providers.factor_calls == 1
+    assert service.upstream_calls == 2
+    assert all(payload["weights"] == responses[0][1]["weights"] for _, payload in responses)
+
+
+def test_requests_over_max_pending_get_503_with_retry_after(providers):
+    service = make_service(providers, max_pending=2)
+
+    async def request(port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        data = body()
+        writer.write(b"POST /evaluate HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(data) + data)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return response
+
+    async def run():
+        listener = await asyncio.start_server(service.handle, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener:
+            first = [asyncio.ensure_future(request(port)) for _ in range(2)]
+            while service.pending < 2:
+                await asyncio.sleep(0.01)
+            rejected = await request(port)
+            return await asyncio.gather(*first), rejected
+
+    try:
+        accepted, rejected = asyncio.run(run())
+    finally:
+        service.close()
+
+    assert all(response.startswith(b"HTTP/1.1 200 ") for response in accepted)
+    assert rejected.startswith(b"HTTP/1.1 503 ")
+    assert b"Retry-After: 1\r\n" in rejected
+
+
+@pytest.mark.parametrize("data", [
+    b"[]", b'"x"', b"12", b'{"tickers": "AAPL"}', b"{not json",
+    body(time_horizon=0), body(time_horizon=-5), body(time_horizon=101), body(time_horizon=2.5),
+    body(time_horizon=True), body(time_horizon="soon"), body(time_horizon=float("inf")),
+    body(goal_value=0), body(goal_value=-1000), body(goal_value=float("nan")), body(goal_value=float("inf")),
+    body(goal_value=[1]), body(tickers=[f"T{i}" for i in range(server.MAX_TICKERS + 1)]),
+])
+def test_malformed_bodies_get_400(providers, data):
+    service = make_service(providers)
+    try:
+        status, payload = asyncio.run(service.dispatch("POST", "/evaluate", data))
+    finally:
+        service.close()
+
+    assert status == 400
+    assert "error" in payload
+    assert providers.price_calls == []
+
+
+def test_failed_fetch_fails_every_waiter_without_unretrieved_errors(tmp_path):
+    providers = StubProviders(str(tmp_path / "prices"), fail=True)
+    service = make_service(providers)
+    logged = []
+
+    async def run():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: logged.append(context))
+        results = await asyncio.gather(*(service.dispatch("POST", "/evaluate", body(tickers=tickers))
+                                         for tickers in (["AAPL"], ["AAPL", "MSFT"], ["KO"])),
+                                       return_exceptions=True)
+        while service.flights._calls:  # Let the first factor fetch fail before the next request starts
+            await asyncio.sleep(0.01)
+        # A lone request leaves the factor fetch without any other waiter
+        results += await asyncio.gather(service.dispatch("POST", "/evaluate", body()), return_exceptions=True)
+        return [type(result) for result in results]  # Drop the tracebacks, which keep the futures alive
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        service.close()
+    gc.collect()  # Futures nobody retrieved log an error when they are collected
+
+    assert results == [ConnectionError] * 4
+    assert providers.price_calls[:3] == [["AAPL", "BND"], ["MSFT"], ["KO"]]  # Later requests wait for AAPL and BND
+    assert providers.factor_calls == 2
+    assert logged == []
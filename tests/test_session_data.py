@@ -0,0 +1,88 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from session_data import SessionData
+
+
+class SlowProviders:
+    """
+    Prices for any ticker; a fetch can be held until release is set.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def fetch_many(self, tickers, start, end):
+        self.calls.append(tuple(tickers))
+        self.started.set()
+        assert self.release.wait(5)
+        dates = pd.bdate_range(start, end, inclusive="left")
+        return pd.DataFrame({ticker: range(1, len(dates) + 1) for ticker in tickers}, index=dates, dtype="float64"), []
+
+    def fetch_fama_french(self, start, end):
+        return pd.DataFrame({"rf": [0.01]})
+
+
+@pytest.fixture
+def providers():
+    return SlowProviders()
+
+
+@pytest.fixture
+def session(providers):
+    return SessionData(providers.fetch_many, providers.fetch_fama_french, "2022-01-03", "2022-03-01")
+
+
+def test_subsets_are_served_without_io(session, providers):
+    prices, failed = session.fetch_many(["AAPL", "KO"])
+    subset, _ = session.fetch_many(["KO"])
+    session.stats(["AAPL"])
+
+    assert providers.calls == [("AAPL", "BND", "KO")]
+    assert list(prices.columns) == ["AAPL", "KO"] and failed == []
+    assert list(subset.columns) == ["KO"]
+    assert session.panel(["KO"]) is session.panel(["AAPL", "KO"])
+
+
+def test_growing_the_selection_or_moving_the_window_reloads(session, providers):
+    session.fetch_many(["AAPL"])
+    session.fetch_many(["AAPL", "KO"])
+    session.set_window("2022-02-01", "2022-03-01")
+    prices, _ = session.fetch_many(["KO"])
+
+    assert providers.calls == [("AAPL", "BND"), ("AAPL", "BND", "KO"), ("BND", "KO")]
+    assert prices.index[0] == pd.Timestamp("2022-02-01")
+
+
+def test_loaded_data_is_readable_while_a_download_runs(session, providers):
+    session.fetch_many(["AAPL"])
+    providers.started.clear()
+    providers.release.clear()
+    loader = threading.Thread(target=session.fetch_many, args=(["AAPL", "MSFT"],))
+    loader.start()
+    assert providers.started.wait(5)
+
+    stats = session.stats(["AAPL"])  # Would block until release if the lock were held over the download
+    assert list(stats.index) == ["AAPL"]
+
+    providers.release.set()
+    loader.join(5)
+    assert session.loaded()[0] == {"AAPL", "BND", "MSFT"}
+
+
+def test_download_finishing_after_invalidate_is_not_kept(session, providers):
+    providers.release.clear()
+    loader = threading.Thread(target=session.fetch_many, args=(["AAPL"],))
+    loader.start()
+    assert providers.started.wait(5)
+    session.invalidate()
+    providers.release.set()
+    loader.join(5)
+
+    assert session.loaded()[0] is None
+    assert session.fetch_fama_french()["rf"].tolist() == [0.01]
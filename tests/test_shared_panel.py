@@ -0,0 +1,102 @@
+import os
+import pickle
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import shared_panel
+from returns_panel import ReturnsPanel
+from synthetic import synthetic_profiles, synthetic_tickers
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def panel():
+    rng = np.random.default_rng(6)
+    dates = pd.bdate_range("2022-01-03", periods=50)
+    values = rng.normal(0, 0.01, (len(dates), 3))
+    values[:5, 0] = np.nan
+    return ReturnsPanel(dates.to_numpy(dtype="datetime64[ns]"), ["AAPL", "KO", "BND"], values,
+                        rng.normal(0, 0.01, (len(dates), 3)), np.full(len(dates), 0.0001))
+
+
+def column_means(panel, column):
+    return float(panel.mean()[column])
+
+
+def assert_same_panel(attached, panel):
+    assert attached.tickers == panel.tickers
+    np.testing.assert_array_equal(attached.dates, panel.dates)
+    np.testing.assert_array_equal(attached.values, panel.values)
+    np.testing.assert_array_equal(attached.mask, panel.mask)
+    np.testing.assert_array_equal(attached.factors, panel.factors)
+    np.testing.assert_array_equal(attached.rf, panel.rf)
+
+
+def test_attach_gives_read_only_views_once_per_process(panel):
+    with shared_panel.publish(panel) as handle:
+        attached = shared_panel.attach(handle)
+        assert_same_panel(attached, panel)
+        assert not attached.values.flags.writeable
+        assert shared_panel.attach(handle) is attached
+
+
+def test_close_unmaps_panels_attached_in_process(panel):
+    handle = shared_panel.publish(panel)
+    blocks = list(shared_panel.attach(handle)._blocks)
+
+    handle.close()
+
+    assert handle.id not in shared_panel._attached
+    assert all(block.buf is None for block in blocks)
+    with pytest.raises(FileNotFoundError):
+        shared_panel._open_block(handle.arrays["values"][0])
+
+
+def test_memory_mapped_files(panel, tmp_path):
+    with shared_panel.publish(panel, folder=str(tmp_path)) as handle:
+        assert_same_panel(shared_panel.attach(handle), panel)
+    assert handle.id not in shared_panel._attached
+
+
+def test_parallel_map_matches_a_loop(panel):
+    with shared_panel.publish(panel) as handle:
+        results = shared_panel.parallel_map(handle, column_means, range(3), workers=2)
+    assert results == pytest.approx([column_means(panel, column) for column in range(3)])
+
+
+def test_worker_pool_leaves_stderr_clean(tmp_path):
+    profiles = synthetic_profiles(200, synthetic_tickers(20), seed=1)
+    profiles["tickers"] = profiles["tickers"].map(" ".join)
+    profiles.to_csv(tmp_path / "profiles.csv", index=False)
+
+    completed = subprocess.run(
+        [sys.executable, os.path.join(ROOT, "batch.py"), str(tmp_path / "profiles.csv"), str(tmp_path / "out.csv"),
+         "--offline", "--backtest", "quarterly", "--workers", "2"],
+        cwd=ROOT, env=dict(os.environ, HOME=str(tmp_path)), capture_output=True, text=True, timeout=300,
+    )
+
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stderr == ""
+    assert len(pd.read_csv(tmp_path / "out.csv")) == 200
+
+
+def test_unrelated_process_attaching_leaves_the_blocks_alone(panel, tmp_path):
+    # A process not started by the publisher has no resource tracker of its own to share
+    script = ("import pickle, sys, shared_panel; "
+              "handle = pickle.load(open(sys.argv[1], 'rb')); "
+              "print(shared_panel.attach(handle).values.shape)")
+    with shared_panel.publish(panel) as handle:
+        with open(tmp_path / "handle.pickle", "wb") as f:
+            pickle.dump(handle, f)
+        completed = subprocess.run([sys.executable, "-c", script, str(tmp_path / "handle.pickle")],
+                                   cwd=ROOT, capture_output=True, text=True, timeout=60)
+
+        assert completed.returncode == 0, completed.stderr
+        assert completed.stderr == ""
+        shared_panel._open_block(handle.arrays["values"][0]).close()  # Still there after the process exits
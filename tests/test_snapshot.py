@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import factor_model
+import montecarlo
+import risk_metrics
+import snapshot
+from returns_panel import ReturnsPanel
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(7)
+    dates = pd.bdate_range("2022-01-03", periods=80, name="Date")
+    frame = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (80, 3)), axis=0)),
+                         index=dates, columns=["AAPL", "KO", "BND"])
+    frame.iloc[:4, 0] = np.nan
+    return frame
+
+
+@pytest.fixture
+def factors(prices):
+    rng = np.random.default_rng(8)
+    frame = pd.DataFrame(rng.normal(0, 1, (len(prices), 3)), index=prices.index.rename("date"),
+                         columns=["mktrf", "smb", "hml"])
+    frame["rf"] = 0.01
+    return frame
+
+
+STATE = {"goal_type": "Retirement", "goal_value": 500000.0, "tickers": ["AAPL", "KO"], "allocation": {"Stocks": 60}}
+
+
+def test_session_round_trip(tmp_path, prices, factors):
+    panel = ReturnsPanel.from_prices(prices, factors)
+    fit = factor_model.fit_factors(panel)
+    risk = risk_metrics.compute_risk(panel, [0.3, 0.3, 0.4])
+    simulation = montecarlo.SimulationResult(0.75, np.arange(1, 4), {10: np.ones(3), 50: np.full(3, 2.0)}, 500)
+    path = str(tmp_path / "session.smartinvest")
+
+    snapshot.save_snapshot(path, STATE, prices=prices, factors=factors, panel=panel,
+                           results={"factor_fit": fit, "risk": risk, "simulation": simulation, "missing": None})
+    loaded = snapshot.load_snapshot(path)
+
+    assert loaded.state == STATE
+    pd.testing.assert_frame_equal(loaded.prices(), prices, check_freq=False, check_index_type=False)
+    pd.testing.assert_frame_equal(loaded.factors(), factors, check_freq=False, check_index_type=False)
+
+    restored = loaded.panel()
+    assert restored.tickers == panel.tickers
+    for name in ("dates", "values", "mask", "factors", "rf"):
+        np.testing.assert_array_equal(getattr(restored, name), getattr(panel, name))
+    assert restored.rf_mean() == pytest.approx(panel.rf_mean())
+
+    restored_fit = loaded.result("factor_fit")
+    assert restored_fit.tickers == fit.tickers
+    np.testing.assert_array_equal(restored_fit.coefficients, fit.coefficients)
+    assert restored_fit.row("KO") == fit.row("KO")
+    assert loaded.result("risk").row("Portfolio") == risk.row("Portfolio")
+    restored_simulation = loaded.result("simulation")
+    assert restored_simulation.probability == 0.75
+    assert restored_simulation.paths == 500
+    assert sorted(restored_simulation.bands) == [10, 50]
+    np.testing.assert_array_equal(restored_simulation.bands[50], simulation.bands[50])
+    assert loaded.result("missing") is None
+
+
+def test_arrays_are_memory_mapped_and_aligned(tmp_path, prices):
+    path = str(tmp_path / "session.smartinvest")
+    snapshot.save_snapshot(path, {}, prices=prices)
+    loaded = snapshot.load_snapshot(path)
+
+    values = loaded.array("prices.values")
+    assert isinstance(values, np.memmap)
+    assert not values.flags.writeable
+    assert values.offset % snapshot.ALIGNMENT == 0
+    assert loaded.panel() is None
+    assert loaded.factors() is None
+
+
+def test_format_1_panels_have_factors_in_percent(tmp_path, prices, factors, monkeypatch):
+    panel = ReturnsPanel.from_prices(prices, factors)
+    old = ReturnsPanel(panel.dates, panel.tickers, panel.values, panel.factors * 100, panel.rf * 100)
+    path = str(tmp_path / "old.smartinvest")
+    monkeypatch.setattr(snapshot, "SNAPSHOT_VERSION", 1)
+    snapshot.save_snapshot(path, {}, panel=old)
+    monkeypatch.undo()
+
+    loaded = snapshot.load_snapshot(path)
+    assert loaded.version == 1
+    np.testing.assert_allclose(loaded.panel().factors, panel.factors)
+    np.testing.assert_allclose(loaded.panel().rf, panel.rf)
+
+
+def test_foreign_and_newer_files_are_rejected(tmp_path, monkeypatch):
+    path = str(tmp_path / "session.smartinvest")
+    (tmp_path / "other").write_bytes(b"not a snapshot at all")
+    with pytest.raises(ValueError):
+        snapshot.load_snapshot(str(tmp_path / "other"))
+
+    monkeypatch.setattr(snapshot, "SNAPSHOT_VERSION", snapshot.SNAPSHOT_VERSION + 1)
+    snapshot.save_snapshot(path, {})
+    monkeypatch.undo()
+    with pytest.raises(ValueError):
+        snapshot.load_snapshot(path)
+
+    with pytest.raises(TypeError):
+        snapshot.save_snapshot(path, {}, results={"weights": {"AAPL": 1.0}})